@@ -0,0 +1,48 @@
+"""
+Times the balance evolution chart for growing ledgers.
+
+    python benchmarks/bench_balance_chart.py --sizes 1000 10000 100000 1000000
+"""
+from pathlib import Path
+import argparse
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ledger_generator import write_ledger
+from budget_manager.data_manager import DataManager
+from budget_manager.limits_manager import LimitsManager
+from budget_manager.stats_manager import StatsManager
+
+
+def time_chart(stats_manager, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stats_manager.chart_cache.clear()
+        stats_manager.render_chart("balance")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        limits_manager = LimitsManager(Path(tmp) / "categories.csv")
+        print(f"{'rows':>10} {'render [s]':>12}")
+        for rows in args.sizes:
+            data_path = Path(tmp) / f"budget_data_{rows}.csv"
+            write_ledger(data_path, rows)
+            data_manager = DataManager(limits_manager, data_path)
+            stats_manager = StatsManager(data_manager, limits_manager)
+            print(f"{rows:>10} {time_chart(stats_manager, args.repeat):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
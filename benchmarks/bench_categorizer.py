@@ -0,0 +1,86 @@
+"""
+Times the categorizer on synthetic bank statement descriptions.
+
+    python benchmarks/bench_categorizer.py --history 200000 --descriptions 1000000
+
+Every category has its own merchants; a description is a merchant, a city and a terminal number,
+so almost all descriptions are distinct. The categorizer learns the history, then classifies
+new descriptions in one batch and learns new records one at a time.
+"""
+from pathlib import Path
+import argparse
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from ledger_generator import category_names
+from budget_manager.categorizer import Categorizer
+
+CITIES = ["Warszawa", "Krakow", "Gdansk", "Poznan", "Wroclaw", "Lodz", "Szczecin", "Lublin"]
+MERCHANTS_PER_CATEGORY = 25
+INCREMENTAL_RECORDS = 1000
+
+
+def merchant_name(rng):
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    return "".join(rng.choice(letters, rng.integers(5, 10))).capitalize()
+
+
+def generate(rng, merchants, count):
+    """
+    Returns (descriptions, categories) of count records.
+    """
+    names = list(merchants)
+    categories = rng.choice(len(names), count)
+    picks = rng.integers(0, MERCHANTS_PER_CATEGORY, count)
+    cities = rng.integers(0, len(CITIES), count)
+    terminals = rng.integers(0, 100000, count)
+    descriptions = [f"{merchants[names[category]][pick]} {CITIES[city]} {terminal}"
+                    for category, pick, city, terminal in zip(categories.tolist(), picks.tolist(),
+                                                               cities.tolist(), terminals.tolist())]
+    return descriptions, np.array(names, dtype=object)[categories]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", type=int, default=200000, help="labelled records learned first")
+    parser.add_argument("--descriptions", type=int, default=1000000, help="descriptions classified in one batch")
+    parser.add_argument("--categories", type=int, default=20, help="number of categories")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    merchants = {name: [merchant_name(rng) for _ in range(MERCHANTS_PER_CATEGORY)]
+                 for name in category_names(args.categories)}
+    history, history_categories = generate(rng, merchants, args.history)
+    descriptions, categories = generate(rng, merchants, args.descriptions)
+
+    categorizer = Categorizer()
+    start = time.perf_counter()
+    categorizer.learn(history, history_categories)
+    learned = time.perf_counter() - start
+
+    start = time.perf_counter()
+    guesses, confidences = categorizer.classify(descriptions)
+    classified = time.perf_counter() - start
+
+    new, new_categories = generate(rng, merchants, INCREMENTAL_RECORDS)
+    start = time.perf_counter()
+    for description, category in zip(new, new_categories):
+        categorizer.learn([description], [category])
+        categorizer.suggest(description)
+    incremental = (time.perf_counter() - start) / INCREMENTAL_RECORDS
+
+    print(f"learn {args.history} records:       {learned:8.3f} s")
+    print(f"classify {args.descriptions} descriptions: {classified:8.3f} s "
+          f"({args.descriptions / classified:.0f} per second)")
+    print(f"learn + suggest one record:    {incremental * 1000:8.3f} ms")
+    print(f"accuracy: {np.mean(guesses == categories):.1%}, "
+          f"assigned with confidence >= {categorizer.min_confidence:.0%}: {np.mean(confidences >= categorizer.min_confidence):.1%}")
+
+
+if __name__ == "__main__":
+    main()
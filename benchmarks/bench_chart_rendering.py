@@ -0,0 +1,126 @@
+"""
+Compares the two ways of putting a chart on screen while the ledger changes between refreshes.
+
+    python benchmarks/bench_chart_rendering.py --rows 100000 --refreshes 20
+
+png: a new figure for every refresh, saved as PNG into memory and decoded again (the old path)
+direct: figures reused between refreshes, with the RGBA pixels of the Agg canvas taken as they are
+
+Every refresh adds a record first, so the chart caches are never hit. The time is the average per refresh,
+the memory is the peak allocated during one refresh as seen by tracemalloc (Python and NumPy buffers,
+not the buffers Pillow allocates itself, such as the decoded PNG). With a display, the images are also
+turned into Tk photo images, the direct path pasting into the photo of the previous refresh.
+"""
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image
+
+from ledger_generator import category_names, write_categories, write_ledger
+from budget_manager.data_manager import DataManager
+from budget_manager.limits_manager import LimitsManager
+from budget_manager.stats_manager import ChartFigures, StatsManager, draw_chart
+
+CHARTS = ["pie", "limits", "balance"]
+
+
+def open_tk():
+    """
+    Returns a hidden Tk root window, or None if there is no display.
+    """
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.withdraw()
+    return root
+
+
+def png_path(chart, data, state, tk_root):
+    png = draw_chart(chart, data)
+    img = Image.open(io.BytesIO(png))
+    img.load()
+    if tk_root is not None:
+        from PIL import ImageTk
+        state["photo"] = ImageTk.PhotoImage(img)
+
+
+def direct_path(chart, data, state, tk_root):
+    image = state["figures"].draw(chart, data)
+    img = image.to_pil()
+    if tk_root is not None:
+        from PIL import ImageTk
+        photo = state.get("photo")
+        if photo is not None and (photo.width(), photo.height()) == img.size:
+            photo.paste(img)
+        else:
+            state["photo"] = ImageTk.PhotoImage(img)
+
+
+def run(path, chart, data_manager, stats_manager, category, refreshes, tk_root):
+    """
+    Returns (average seconds, average peak MB) of a refresh of a chart with one of the paths.
+    """
+    state = {"figures": ChartFigures()}
+    # The first refresh imports Matplotlib and builds the figures of the direct path.
+    path(chart, stats_manager.chart_data(chart), state, tk_root)
+    seconds = 0.0
+    for _ in range(refreshes):
+        data_manager.add_record("expense", category, 12.5, "2024-12-31", description="Benchmark")
+        data = stats_manager.chart_data(chart)
+        start = time.perf_counter()
+        path(chart, data, state, tk_root)
+        seconds += time.perf_counter() - start
+    # Memory is measured in a separate refresh, tracing allocations slows the drawing down.
+    data_manager.add_record("expense", category, 12.5, "2024-12-31", description="Benchmark")
+    data = stats_manager.chart_data(chart)
+    tracemalloc.start()
+    try:
+        path(chart, data, state, tk_root)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds / refreshes, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="number of records in the ledger")
+    parser.add_argument("--categories", type=int, default=20, help="number of expense categories")
+    parser.add_argument("--refreshes", type=int, default=20, help="refreshes of each chart")
+    args = parser.parse_args()
+
+    tk_root = open_tk()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(tmp) / "budget_data.csv"
+        categories_path = Path(tmp) / "categories.csv"
+        write_ledger(data_path, args.rows, args.categories)
+        write_categories(categories_path, args.categories)
+        with contextlib.redirect_stdout(io.StringIO()):
+            limits_manager = LimitsManager(categories_path)
+            data_manager = DataManager(limits_manager, data_path, snapshots=False)
+        stats_manager = StatsManager(data_manager, limits_manager)
+        category = category_names(args.categories)[0]
+
+        print(f"{args.rows} records, {args.refreshes} refreshes, Tk photo images: {'yes' if tk_root else 'no display'}")
+        print(f"{'chart':<10} {'png [ms]':>10} {'direct [ms]':>12} {'speedup':>8} {'png [MB]':>10} {'direct [MB]':>12}")
+        for chart in CHARTS:
+            png = run(png_path, chart, data_manager, stats_manager, category, args.refreshes, tk_root)
+            direct = run(direct_path, chart, data_manager, stats_manager, category, args.refreshes, tk_root)
+            print(f"{chart:<10} {png[0] * 1000:>10.1f} {direct[0] * 1000:>12.1f} {png[0] / direct[0]:>7.1f}x"
+                  f" {png[1]:>10.1f} {direct[1]:>12.1f}")
+    if tk_root is not None:
+        tk_root.destroy()
+
+
+if __name__ == "__main__":
+    main()
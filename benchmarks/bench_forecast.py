@@ -0,0 +1,96 @@
+"""
+Times the forecasts on a synthetic ten-year ledger.
+
+    python benchmarks/bench_forecast.py --rows 1000000 --months 12
+
+On top of the generated records, the ledger gets a monthly salary, rent and subscription
+and a weekly expense for all ten years, which the forecaster has to find among the others.
+Every run adds a record first, so the cached results are never used; the cached time is
+the same calls again without a change.
+"""
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from ledger_generator import DAYS, START_DATE, category_names, write_categories, write_ledger
+from budget_manager.data_manager import DataManager
+from budget_manager.forecast import Forecaster
+from budget_manager.limits_manager import LimitsManager
+
+
+def recurring_records(categories):
+    """
+    Returns a DataFrame with the recurring records added to the generated ledger.
+    """
+    start, end = pd.Timestamp(START_DATE), pd.Timestamp(START_DATE + DAYS - 1)
+    months = pd.date_range(start, end - pd.Timedelta(days=14), freq="MS")
+    weeks = pd.date_range(start, end, freq="7D")
+    frames = [
+        pd.DataFrame({"Type": "income", "Category": "Work Income", "Amount": 7200.0,
+                      "Date": months + pd.Timedelta(days=9), "Description": "Salary"}),
+        pd.DataFrame({"Type": "expense", "Category": categories[-1], "Amount": 2100.0,
+                      "Date": months, "Description": "Flat rental"}),
+        pd.DataFrame({"Type": "expense", "Category": categories[2], "Amount": 49.99,
+                      "Date": months + pd.Timedelta(days=14), "Description": "Streaming subscription"}),
+        pd.DataFrame({"Type": "expense", "Category": categories[1], "Amount": 35.0,
+                      "Date": weeks, "Description": "Weekly parking"}),
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000, help="number of generated records")
+    parser.add_argument("--categories", type=int, default=20, help="number of expense categories")
+    parser.add_argument("--months", type=int, default=12, help="months projected")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    categories = category_names(args.categories)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(tmp) / "budget_data.csv"
+        categories_path = Path(tmp) / "categories.csv"
+        write_ledger(data_path, args.rows, args.categories)
+        write_categories(categories_path, args.categories)
+        with contextlib.redirect_stdout(io.StringIO()):
+            limits_manager = LimitsManager(categories_path)
+            data_manager = DataManager(limits_manager, data_path, snapshots=False)
+            data_manager.add_records(recurring_records(categories))
+        forecaster = Forecaster(data_manager, limits_manager)
+        last_day = str(np.datetime64(START_DATE + DAYS - 1, "D"))
+
+        def forecast():
+            return (forecaster.recurring(last_day), forecaster.project(args.months, last_day),
+                    forecaster.month_end_projection(last_day))
+
+        cold = []
+        for _ in range(args.repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                data_manager.add_record("expense", categories[0], 12.5, last_day, description="Benchmark")
+            start = time.perf_counter()
+            recurring, projection, _ = forecast()
+            cold.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        forecast()
+        cached = time.perf_counter() - start
+
+    print(f"{len(data_manager.records)} records over {DAYS} days, {args.months} months projected")
+    print(f"recurring + project + month end: {min(cold) * 1000:8.1f} ms (after a change), "
+          f"{cached * 1000:.3f} ms (cached)")
+    for item in recurring:
+        print(f"  {item['period']} {item['type']:<8} {item['category']:<14} {item['description']:<24} "
+              f"{item['amount']:>9.2f}  next {item['next']}")
+    print(f"balance in {projection['months'][-1]}: {projection['balance'][-1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
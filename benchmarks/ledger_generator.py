@@ -0,0 +1,119 @@
+"""
+Generates seeded synthetic ledgers for benchmarks.
+
+    python benchmarks/ledger_generator.py budget_data.csv categories.csv --rows 1000000 --categories 20
+
+The same rows, number of categories and seed always give the same files.
+"""
+from pathlib import Path
+import argparse
+import string
+import numpy as np
+import pandas as pd
+
+BASE_CATEGORIES = ["Food", "Transport", "Entertainment", "Other"]
+INCOME_CATEGORY = "Work Income"
+INCOME_SHARE = 0.05
+DESCRIPTIONS = ["Shop", "Card payment", "Transfer", "Subscription", "Cash", "Synthetic record"]
+START_DATE = np.datetime64("2015-01-01")
+DAYS = 3650
+CHUNK_ROWS = 1000000
+
+
+def category_names(count):
+    """
+    Returns the names of count expense categories. Names contain only letters, like the ones added in the app.
+    """
+    names = BASE_CATEGORIES[:count]
+    index = 0
+    while len(names) < count:
+        suffix = ""
+        value = index
+        while True:
+            suffix = string.ascii_uppercase[value % 26] + suffix
+            value = value // 26 - 1
+            if value < 0:
+                break
+        names.append("Category" + suffix)
+        index += 1
+    return names
+
+
+def generate_chunk(rng, first_row, rows, total_rows, categories):
+    """
+    Returns a DataFrame with the records first_row..first_row + rows of a ledger with total_rows records.
+    Dates grow with the row number, expense categories follow a Zipf-like popularity and amounts are log-normal.
+    """
+    positions = np.arange(first_row, first_row + rows)
+    days = positions * DAYS // max(total_rows, 1)
+    is_income = rng.random(rows) < INCOME_SHARE
+
+    weights = 1.0 / np.arange(1, len(categories) + 1)
+    codes = rng.choice(len(categories), size=rows, p=weights / weights.sum())
+    names = np.array(categories + [INCOME_CATEGORY], dtype=object)
+    codes[is_income] = len(categories)
+
+    amounts = np.where(is_income, rng.normal(6000, 800, rows), rng.lognormal(3.5, 1.0, rows))
+    return pd.DataFrame({
+        "Type": np.where(is_income, "income", "expense"),
+        "Category": names[codes],
+        "Amount": np.round(np.clip(amounts, 0.01, None), 2),
+        "Date": START_DATE + days.astype("timedelta64[D]"),
+        "Description": np.array(DESCRIPTIONS, dtype=object)[rng.integers(0, len(DESCRIPTIONS), rows)],
+    })
+
+
+def iter_ledger(rows, categories=4, seed=0, chunk_rows=CHUNK_ROWS):
+    """
+    Yields the synthetic ledger as DataFrames of at most chunk_rows records.
+    """
+    rng = np.random.default_rng(seed)
+    names = category_names(categories)
+    for first_row in range(0, rows, chunk_rows):
+        yield generate_chunk(rng, first_row, min(chunk_rows, rows - first_row), rows, names)
+
+
+def generate_ledger(rows, categories=4, seed=0):
+    """
+    Returns the whole synthetic ledger as one DataFrame.
+    """
+    chunks = list(iter_ledger(rows, categories, seed))
+    if not chunks:
+        return generate_chunk(np.random.default_rng(seed), 0, 0, 0, category_names(categories))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_ledger(path, rows, categories=4, seed=0):
+    """
+    Writes a synthetic ledger to a CSV data file, chunk by chunk so that memory use does not grow with rows.
+    """
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
+        file.write(",".join(["Type", "Category", "Amount", "Date", "Description"]) + "\n")
+        for chunk in iter_ledger(rows, categories, seed):
+            chunk.to_csv(file, header=False, index=False, date_format="%Y-%m-%d")
+
+
+def write_categories(path, categories=4, limit=500.0):
+    """
+    Writes a categories file with the categories used by the synthetic ledger.
+    """
+    rows = [(name, limit) for name in category_names(categories)] + [(INCOME_CATEGORY, 0.0)]
+    pd.DataFrame(rows, columns=["Category", "Limit"]).to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("data_file", type=Path, help="CSV data file to write")
+    parser.add_argument("categories_file", type=Path, help="categories file to write")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--categories", type=int, default=4, help="number of expense categories")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_ledger(args.data_file, args.rows, args.categories, args.seed)
+    write_categories(args.categories_file, args.categories)
+    print(f"Wrote {args.rows} records in {args.categories} categories to '{args.data_file}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Load test of the HTTP/JSON API server (budget_manager.server) on a local instance.
+
+    python benchmarks/load_test_server.py --rows 100000 --clients 50 --duration 10 --writes 0.5
+
+Starts `python -m budget_manager serve` on a synthetic ledger in a temporary directory, then keeps
+--clients keep-alive connections busy for --duration seconds, each sending requests back to back:
+a --writes share of POST /records, the rest GET /summary and GET /limits. Prints the sustained
+requests per second, the latencies of each endpoint and how many records the writer committed at once.
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from ledger_generator import category_names, write_categories, write_ledger
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def request(reader, writer, method, path, body=None):
+    """
+    Sends one request on a keep-alive connection and returns (status, body bytes).
+    """
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+                 + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        if key.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def client(port, deadline, writes, categories, latencies, errors, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            if rng.random() < writes:
+                name, method, path = "POST /records", "POST", "/records"
+                body = {"type": "expense", "category": rng.choice(categories), "amount": round(rng.uniform(1, 200), 2),
+                        "date": "2024-12-28", "description": "Load test"}
+            else:
+                path = rng.choice(["/summary", "/limits"])
+                name, method, body = f"GET {path}", "GET", None
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, method, path, body)
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+            if status >= 400:
+                errors[name] = errors.get(name, 0) + 1
+    finally:
+        writer.close()
+
+
+async def load(port, clients, duration, writes, categories):
+    latencies, errors = {}, {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(port, deadline, writes, categories, latencies, errors, seed)
+                           for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, stats = await request(reader, writer, "GET", "/stats")
+    writer.close()
+    return elapsed, latencies, errors, json.loads(stats)
+
+
+def wait_for_server(port, process, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The server exited before listening, see its output above.")
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"The server did not listen on port {port} within {timeout} s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="number of records in the ledger")
+    parser.add_argument("--categories", type=int, default=20, help="number of expense categories")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--writes", type=float, default=0.5, help="share of requests adding a record")
+    args = parser.parse_args()
+
+    categories = category_names(args.categories)
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(tmp) / "budget_data.csv"
+        categories_path = Path(tmp) / "categories.csv"
+        write_ledger(data_path, args.rows, args.categories)
+        write_categories(categories_path, args.categories)
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        process = subprocess.Popen([sys.executable, "-m", "budget_manager", "--data", str(data_path),
+                                    "--categories", str(categories_path), "serve", "--port", str(port)],
+                                   env=env, stdout=subprocess.DEVNULL)
+        try:
+            wait_for_server(port, process)
+            elapsed, latencies, errors, stats = asyncio.run(
+                load(port, args.clients, args.duration, args.writes, categories))
+        finally:
+            process.terminate()
+            process.wait()
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.rows} records, {args.clients} clients, {args.duration:.0f} s, {args.writes:.0%} writes")
+    print(f"sustained: {total / elapsed:.0f} requests per second ({total} requests)")
+    print(f"{'endpoint':<16} {'requests':>9} {'per s':>8} {'p50 [ms]':>9} {'p99 [ms]':>9} {'errors':>7}")
+    for name, values in sorted(latencies.items()):
+        values = np.array(values) * 1000
+        print(f"{name:<16} {len(values):>9} {len(values) / elapsed:>8.0f} {np.percentile(values, 50):>9.2f} "
+              f"{np.percentile(values, 99):>9.2f} {errors.get(name, 0):>7}")
+    if stats["commits"]:
+        print(f"writer: {stats['committed_records']} records in {stats['commits']} commits "
+              f"({stats['committed_records'] / stats['commits']:.1f} records per commit)")
+
+
+if __name__ == "__main__":
+    main()
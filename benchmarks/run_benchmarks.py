@@ -0,0 +1,228 @@
+"""
+Times the data manager and the charts on synthetic ledgers and writes the results as JSON.
+
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 1000000 --output results.json
+    python benchmarks/run_benchmarks.py --output new.json --compare results.json
+
+Each benchmark reports the best time of --repeat runs and the peak memory allocated during one run
+(measured with tracemalloc, which also sees NumPy and pandas buffers). With --compare, benchmarks
+that got slower than --tolerance times the old result are listed and the exit status is 1.
+"""
+from pathlib import Path
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from ledger_generator import category_names, write_categories, write_ledger
+from budget_manager.data_manager import create_data_manager
+from budget_manager.limits_manager import LimitsManager
+from budget_manager.stats_manager import StatsManager
+from budget_manager.storage import migrate
+
+FORMATS = {"csv": ".csv", "sqlite": ".sqlite", "parquet": ".parquet", "feather": ".feather"}
+ADD_RECORD_CALLS = 100
+MIN_COMPARED_SECONDS = 0.005
+
+
+def measure(function, repeat):
+    """
+    Returns (best seconds, peak MB) of a function. Output printed by the function is discarded.
+    """
+    best = float("inf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak / 2**20
+
+
+def records_table_population(data_manager, categories):
+    """
+    Returns a function that fills the records window: a real RecordsTable if a display is available,
+    otherwise the same data manager calls and row formatting that the window does when it opens.
+    """
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        root = None
+
+    from budget_manager.records_view import RecordsTable
+
+    if root is not None:
+        def populate():
+            table = RecordsTable(data_manager, categories, master=root)
+            root.update_idletasks()
+            table.window.destroy()
+        return populate
+
+    def populate():
+        data_manager.count_records()
+        page = data_manager.get_records_page(0, RecordsTable.CHUNK_SIZE)
+        list(zip(page["Type"].astype(str), page["Category"].astype(str), page["Amount"],
+                 page["Date"].dt.strftime("%Y-%m-%d").fillna(""), page["Description"]))
+    return populate
+
+
+def run_size(tmp, rows, categories, data_format, seed, repeat):
+    """
+    Runs all benchmarks on a ledger with the given number of records and returns {name: result}.
+    """
+    csv_path = Path(tmp) / f"budget_data_{rows}.csv"
+    categories_path = Path(tmp) / f"categories_{rows}.csv"
+    write_ledger(csv_path, rows, categories, seed)
+    write_categories(categories_path, categories)
+    data_path = csv_path.with_suffix(FORMATS[data_format])
+    if data_path != csv_path:
+        with contextlib.redirect_stdout(io.StringIO()):
+            migrate(csv_path, data_path)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        limits_manager = LimitsManager(categories_path)
+        data_manager = create_data_manager(limits_manager, data_path)
+    stats_manager = StatsManager(data_manager, limits_manager)
+    category = category_names(categories)[0]
+
+    def add_records():
+        for _ in range(ADD_RECORD_CALLS):
+            data_manager.add_record("expense", category, 12.5, "2024-12-31", description="Benchmark")
+
+    def render(chart):
+        def function():
+            stats_manager.chart_cache.clear()
+            stats_manager.render_chart(chart)
+        return function
+
+    def render_image(chart):
+        def function():
+            stats_manager.chart_cache.clear()
+            stats_manager.render_image(chart)
+        return function
+
+    functions = {
+        "open": lambda: create_data_manager(limits_manager, data_path, snapshots=False),
+        "open_snapshot": lambda: create_data_manager(limits_manager, data_path),
+        "get_total_incomes": data_manager.get_total_incomes,
+        "get_total_expenses": data_manager.get_total_expenses,
+        "get_balance": data_manager.get_balance,
+        "get_category_expenses": lambda: data_manager.get_category_expenses(category),
+        "get_expenses_by_category": data_manager.get_expenses_by_category,
+        "get_balance_evolution": data_manager.get_balance_evolution,
+        "get_monthly_balance": data_manager.get_monthly_balance,
+        "chart_pie": render("pie"),
+        "chart_limits": render("limits"),
+        "chart_balance": render("balance"),
+        "screen_pie": render_image("pie"),
+        "screen_limits": render_image("limits"),
+        "screen_balance": render_image("balance"),
+        "show_all_records": records_table_population(data_manager, limits_manager.get_all_categories()),
+    }
+
+    results = {}
+    for name, function in functions.items():
+        seconds, peak_mb = measure(function, repeat)
+        results[name] = {"seconds": seconds, "peak_mb": peak_mb}
+    # Adding records changes the ledger, so it runs last.
+    seconds, peak_mb = measure(add_records, repeat)
+    results["add_record"] = {"seconds": seconds / ADD_RECORD_CALLS, "peak_mb": peak_mb}
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the benchmarks that got slower than tolerance times the baseline and returns their number.
+    """
+    regressions = 0
+    for rows, size_results in results["results"].items():
+        for name, result in size_results.items():
+            old = baseline["results"].get(rows, {}).get(name)
+            if old is None or max(old["seconds"], result["seconds"]) < MIN_COMPARED_SECONDS:
+                continue
+            ratio = result["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+            if ratio > tolerance:
+                regressions += 1
+                print(f"Regression: {name} on {rows} rows took {result['seconds']:.4f} s, "
+                      f"was {old['seconds']:.4f} s ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000],
+                        help="numbers of records, up to 10000000")
+    parser.add_argument("--categories", type=int, default=20, help="number of expense categories")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="csv", help="storage format of the ledger")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="JSON file for the results")
+    parser.add_argument("--compare", type=Path, help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown against --compare")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "format": args.format,
+            "categories": args.categories,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            size_results = run_size(tmp, rows, args.categories, args.format, args.seed, args.repeat)
+            results["results"][str(rows)] = size_results
+            print(f"{rows} records:")
+            for name, result in size_results.items():
+                print(f"  {name:<26} {result['seconds'] * 1000:>11.3f} ms {result['peak_mb']:>10.1f} MB")
+    results["meta"]["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Results saved to '{args.output}'")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+        print(f"No regressions against '{args.compare}'")
+
+
+if __name__ == "__main__":
+    main()
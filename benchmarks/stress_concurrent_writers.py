@@ -0,0 +1,119 @@
+"""
+Stress test of many processes writing to the same budget_data.csv and categories.csv at once.
+
+    python benchmarks/stress_concurrent_writers.py --writers 8 --records 500 --batch 1
+
+Every writer process opens the ledger, adds a category of its own and then adds records with
+descriptions unique to it, some of the writers also rewriting the whole data file from time to time.
+At the end the ledger is read again and checked: every record must be in the file exactly once
+and every category must be in the categories file.
+The exit status is 1 if any check fails.
+"""
+from pathlib import Path
+import argparse
+import collections
+import multiprocessing
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from budget_manager.data_manager import DataManager
+from budget_manager.limits_manager import LimitsManager
+
+
+def writer_category(number):
+    """
+    Returns the category of a writer, spelled with letters only (category names may not contain digits).
+    """
+    return "Writer" + "".join(chr(ord("A") + int(digit)) for digit in str(number))
+
+
+def writer(number, data_file, categories_file, records, batch, save_every, start):
+    """
+    Adds records in batches of batch records, rewriting the whole data file every save_every batches
+    (never if save_every is 0).
+    """
+    limits_manager = LimitsManager(categories_file)
+    data_manager = DataManager(limits_manager, data_file, snapshots=False)
+    category = writer_category(number)
+    limits_manager.add_category(category, 100.0)
+    start.wait()
+
+    for first in range(0, records, batch):
+        rows = [{"Type": "expense", "Category": category, "Amount": 1.0, "Date": "2025-01-19",
+                 "Description": f"writer {number} record {index}"}
+                for index in range(first, min(first + batch, records))]
+        if len(rows) == 1:
+            row = rows[0]
+            data_manager.add_record(row["Type"], row["Category"], row["Amount"], row["Date"], row["Description"])
+        else:
+            data_manager.add_records(rows)
+        if save_every and (first // batch + 1) % save_every == 0:
+            data_manager.save_to_csv()
+    return number
+
+
+def check(data_file, categories_file, writers, records):
+    """
+    Returns a list of problems found in the ledger written by the writers.
+    """
+    problems = []
+    limits_manager = LimitsManager(categories_file)
+    data_manager = DataManager(limits_manager, data_file, snapshots=False)
+    counts = collections.Counter(data_manager.df["Description"])
+    for number in range(writers):
+        if not limits_manager.has_category(writer_category(number)):
+            problems.append(f"category {writer_category(number)} is missing")
+        for index in range(records):
+            count = counts.pop(f"writer {number} record {index}", 0)
+            if count != 1:
+                problems.append(f"record {index} of writer {number} is in the file {count} times")
+    if counts:
+        problems.append(f"{sum(counts.values())} unexpected records")
+    expected = writers * records
+    if round(data_manager.get_total_expenses(), 2) != expected:
+        problems.append(f"total expenses are {data_manager.get_total_expenses():.2f}, expected {expected:.2f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8, help="number of writer processes")
+    parser.add_argument("--records", type=int, default=500, help="records added by each writer")
+    parser.add_argument("--batch", type=int, default=1, help="records added in one call (1 means add_record)")
+    parser.add_argument("--savers", type=int, default=2, help="how many of the writers also rewrite the whole file")
+    parser.add_argument("--save-every", type=int, default=50, help="batches between the rewrites of the savers")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = Path(directory) / "budget_data.csv"
+        categories_file = Path(directory) / "categories.csv"
+        context = multiprocessing.get_context("spawn")
+        start = context.Manager().Event()
+        with context.Pool(args.writers) as pool:
+            jobs = [pool.apply_async(writer, (number, data_file, categories_file, args.records, args.batch,
+                                              args.save_every if number < args.savers else 0, start))
+                    for number in range(args.writers)]
+            # Give every writer time to open the ledger before they all start writing.
+            time.sleep(2.0)
+            began = time.perf_counter()
+            start.set()
+            for job in jobs:
+                job.get()
+            elapsed = time.perf_counter() - began
+
+        problems = check(data_file, categories_file, args.writers, args.records)
+
+    total = args.writers * args.records
+    print(f"{args.writers} writers added {total} records in {elapsed:.2f} s ({total / elapsed:.0f} records/s)")
+    if problems:
+        for problem in problems[:20]:
+            print(f"FAILED: {problem}")
+        sys.exit(1)
+    print("OK: no lost or duplicated records, all categories present")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,26 @@
-from .data_manager import DataManager
-from .limits_manager import LimitsManager
-from .stats_manager import StatsManager
-from .ui_main import App
+import importlib
 
-__all__ = ["DataManager", "LimitsManager", "StatsManager", "App"]
\ No newline at end of file
+_EXPORTS = {
+    "DataManager": "data_manager",
+    "LimitsManager": "limits_manager",
+    "LimitAlerts": "alerts",
+    "Categorizer": "categorizer",
+    "Forecaster": "forecast",
+    "LedgerRegistry": "ledgers",
+    "SqliteDataManager": "sqlite_manager",
+    "StatsManager": "stats_manager",
+    "BudgetServer": "server",
+    "App": "ui_main",
+}
+
+__all__ = ["DataManager", "LimitsManager", "LimitAlerts", "Categorizer", "Forecaster", "LedgerRegistry",
+           "SqliteDataManager", "StatsManager", "BudgetServer", "App"]
+
+
+def __getattr__(name):
+    # The managers are imported on first use, so scripts and the command line interface
+    # do not pay for pandas, Matplotlib or Tkinter unless they need them.
+    if name in _EXPORTS:
+        module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
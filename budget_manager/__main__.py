@@ -0,0 +1,3 @@
+from budget_manager.cli import main
+
+main()
@@ -0,0 +1,99 @@
+from collections import defaultdict
+import pandas as pd
+from budget_manager.record_store import to_grosze
+from budget_manager.storage import format_dates
+
+class AggregateStore:
+    """
+    Running totals by record type, by category and by category and month. They are summed as int grosze,
+    like the record store, so they do not drift; amounts are converted to zł only when they are read.
+    """
+    def __init__(self):
+        self.totals_by_type = defaultdict(int)
+        self.spend_by_category = defaultdict(int)
+        self.spend_by_category_month = defaultdict(int)
+
+    def reset(self):
+        """
+        Clear all running totals.
+        """
+        self.totals_by_type.clear()
+        self.spend_by_category.clear()
+        self.spend_by_category_month.clear()
+
+    def add(self, record_type, category, amount, date):
+        """
+        Update the running totals with a single record.
+        """
+        amount = int(to_grosze([amount])[0])
+        self.totals_by_type[record_type] += amount
+        if record_type == "expense":
+            self.spend_by_category[category] += amount
+            self.spend_by_category_month[(category, str(date)[:7])] += amount
+
+    def rebuild(self, df):
+        """
+        Recompute all running totals from scratch from the DataFrame.
+        """
+        self.reset()
+        self.add_frame(df)
+
+    def add_frame(self, df):
+        """
+        Update the running totals with all records of a DataFrame.
+        """
+        if df.empty:
+            return
+        df = df.assign(Amount=to_grosze(df["Amount"]))
+        for record_type, total in df.groupby("Type", observed=True)["Amount"].sum().items():
+            self.totals_by_type[record_type] += int(total)
+        expenses = df[df["Type"] == "expense"]
+        for category, total in expenses.groupby("Category", observed=True)["Amount"].sum().items():
+            self.spend_by_category[category] += int(total)
+        if pd.api.types.is_datetime64_any_dtype(expenses["Date"]):
+            months = format_dates(expenses["Date"], unit="M")
+        else:
+            months = expenses["Date"].astype(str).str[:7]
+        by_month = expenses.groupby([expenses["Category"], months], observed=True)["Amount"].sum()
+        for key, total in by_month.items():
+            self.spend_by_category_month[key] += int(total)
+
+    def get_total(self, record_type):
+        """
+        Returns the sum of all records of the given type.
+        """
+        return self.totals_by_type.get(record_type, 0) / 100
+
+    def get_balance(self):
+        """
+        Returns the total income minus the total expenses, subtracted in grosze.
+        """
+        return (self.totals_by_type.get("income", 0) - self.totals_by_type.get("expense", 0)) / 100
+
+    def get_category_expenses(self, category, month=None):
+        """
+        Returns the sum of expenses for a category, for all time or for a month given as 'YYYY-MM'.
+        """
+        if month is None:
+            return self.spend_by_category.get(category, 0) / 100
+        return self.spend_by_category_month.get((category, month), 0) / 100
+
+    def get_expenses_by_category(self):
+        """
+        Returns a dict with the sum of expenses for each category that has any, sorted by category.
+        """
+        return {category: total / 100 for category, total in sorted(self.spend_by_category.items())}
+
+    def verify(self, df):
+        """
+        Returns True if the running totals match a full recompute from the DataFrame.
+        """
+        expected = AggregateStore()
+        expected.rebuild(df)
+        for name in ("totals_by_type", "spend_by_category", "spend_by_category_month"):
+            current = getattr(self, name)
+            recomputed = getattr(expected, name)
+            for key in set(current) | set(recomputed):
+                if current.get(key, 0) != recomputed.get(key, 0):
+                    return False
+        return True
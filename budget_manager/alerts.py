@@ -0,0 +1,256 @@
+"""
+Limit alerts: the spending of every category against its limit in the current month and week,
+kept up to date as records are added, with an event for each threshold (50%, 80%, 100% of the limit) crossed.
+
+    alerts = LimitAlerts(data_manager, limits_manager)
+    alerts.subscribe(print)
+    data_manager.add_record("expense", "Food", 120.0, "2025-01-19")
+
+The limits in categories.csv are monthly, the weekly limit is the monthly one spread over the weeks of a year.
+Adding a record updates one running sum per period and compares it to the precomputed threshold amounts
+of its category, so it takes the same time for any ledger size. The sum of a period is read once from the
+date index of the data manager the first time a record falls into it.
+"""
+from pathlib import Path
+import datetime
+import json
+import numpy as np
+from budget_manager.currency import DEFAULT_CURRENCY, currency_label
+from budget_manager.timeseries import to_day
+
+THRESHOLDS = (0.5, 0.8, 1.0)
+PERIODS = ("M", "W")
+PERIOD_SHARES = {"M": 1.0, "W": 12 / 52}
+PERIOD_NAMES = {"M": "monthly", "W": "weekly"}
+
+
+def period_bounds(day, period):
+    """
+    Returns the first and last day (as days since 1970-01-01) of the month ('M') or week
+    starting on Monday ('W') of a day.
+    """
+    if period == "M":
+        month = np.datetime64(day, "D").astype("datetime64[M]")
+        start = int(month.astype("datetime64[D]").astype("int64"))
+        end = int((month + 1).astype("datetime64[D]").astype("int64")) - 1
+        return start, end
+    if period == "W":
+        # 1970-01-01 was a Thursday, so Mondays are the days with (day + 3) % 7 == 0.
+        start = day - (day + 3) % 7
+        return start, start + 6
+    raise ValueError(f"Unknown period '{period}', expected one of {PERIODS}")
+
+
+def day_to_date(day):
+    return str(np.datetime64(day, "D"))
+
+
+def format_alert(alert):
+    """
+    Returns a message for an alert, for example:
+    "Food: 80% of the monthly limit reached (412.00 zł / 500.00 zł, 88.00 zł left)".
+    """
+    label = currency_label(alert.get("currency", DEFAULT_CURRENCY))
+    if alert["remaining"] < 0:
+        left = f"exceeded by {-alert['remaining']:.2f} {label}"
+    else:
+        left = f"{alert['remaining']:.2f} {label} left"
+    return (f"{alert['category']}: {alert['threshold']:.0%} of the {PERIOD_NAMES[alert['period']]} limit reached "
+            f"({alert['spent']:.2f} {label} / {alert['limit']:.2f} {label}, {left})")
+
+
+class AlertLog:
+    """
+    Subscriber that appends every alert as a line of JSON to a file.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def __call__(self, alert):
+        with open(self.path, mode="a", encoding="utf-8") as file:
+            file.write(json.dumps(alert) + "\n")
+
+
+class LimitAlerts:
+    """
+    Spending of each category in each month and week, compared to its limit as records are added.
+    It listens to a data manager (DataManager or SqliteDataManager) and calls its subscribers with an alert
+    (a dict, see check) for every threshold the spending of a category crosses in a period.
+    """
+    def __init__(self, data_manager, limits_manager, thresholds=THRESHOLDS, periods=PERIODS):
+        """
+        thresholds: fractions of the limit that raise an alert, for example: (0.5, 0.8, 1.0)
+        periods: 'M' for months and 'W' for weeks starting on Monday
+        """
+        for period in periods:
+            if period not in PERIOD_SHARES:
+                raise ValueError(f"Unknown period '{period}', expected one of {PERIODS}")
+        self.data_manager = data_manager
+        self.limits_manager = limits_manager
+        # Limits are in the reporting currency of the data manager, like the amounts it passes on.
+        self.currency = data_manager.currency
+        self.thresholds = tuple(sorted(thresholds))
+        self.periods = tuple(periods)
+        self.subscribers = []
+        self.spent = {}
+        self.levels = {}
+        self.limits_version = None
+        data_manager.add_listener(self)
+
+    def subscribe(self, callback):
+        """
+        Calls callback(alert) for every alert from now on. Returns the callback.
+        """
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def close(self):
+        """
+        Stops listening to the data manager.
+        """
+        self.data_manager.remove_listener(self)
+
+    def get_levels(self, category, period):
+        """
+        Returns the limit of a category for a period and the amounts at which its thresholds are reached,
+        or None if the category has no limit. Recomputed only when the limits change.
+        """
+        if self.limits_version != self.limits_manager.version:
+            self.levels = {}
+            self.limits_version = self.limits_manager.version
+        key = (category, period)
+        if key not in self.levels:
+            limit = self.limits_manager.get_limit(category)
+            if not limit or limit <= 0:
+                self.levels[key] = None
+            else:
+                limit *= PERIOD_SHARES[period]
+                self.levels[key] = (limit, [threshold * limit for threshold in self.thresholds])
+        return self.levels[key]
+
+    def get_spent(self, category, period, start, end):
+        """
+        Returns the running sum of the expenses of a category in a period, read from the data manager on first use.
+        """
+        key = (category, period, start)
+        if key not in self.spent:
+            self.spent[key] = self.data_manager.get_range_total("expense", day_to_date(start),
+                                                                day_to_date(end), category)
+        return self.spent[key]
+
+    def check(self, category, period, start, previous, spent):
+        """
+        Sends an alert to the subscribers for every threshold between the previous and the new spending.
+        """
+        self.spent[(category, period, start)] = spent
+        levels = self.get_levels(category, period)
+        if levels is None or not self.subscribers:
+            return
+        limit, amounts = levels
+        for threshold, amount in zip(self.thresholds, amounts):
+            if previous < amount <= spent:
+                alert = {
+                    "category": category,
+                    "period": period,
+                    "start": day_to_date(start),
+                    "threshold": threshold,
+                    "spent": spent,
+                    "limit": limit,
+                    "remaining": limit - spent,
+                    "currency": self.currency,
+                }
+                for callback in list(self.subscribers):
+                    callback(alert)
+
+    def add(self, record_type, category, amount, date):
+        """
+        Called by the data manager after a record was added.
+        """
+        if record_type != "expense":
+            return
+        day = to_day(date)
+        if day is None:
+            return
+        amount = float(amount)
+        for period in self.periods:
+            start, end = period_bounds(day, period)
+            if (category, period, start) in self.spent:
+                previous = self.spent[(category, period, start)]
+            else:
+                # The data manager already counts the new record.
+                previous = self.get_spent(category, period, start, end) - amount
+            self.check(category, period, start, previous, previous + amount)
+
+    def add_frame(self, df):
+        """
+        Called by the data manager after all records of a DataFrame were added.
+        The records are summed per category and period first, so each period is checked once.
+        """
+        expenses = df[(df["Type"] == "expense") & df["Date"].notna()]
+        if expenses.empty:
+            return
+        days = expenses["Date"].to_numpy(dtype="datetime64[D]")
+        categories = expenses["Category"].astype(object).to_numpy()
+        for period in self.periods:
+            if period == "M":
+                starts = days.astype("datetime64[M]").astype("datetime64[D]").astype("int64")
+            else:
+                starts = days.astype("int64") - (days.astype("int64") + 3) % 7
+            totals = expenses["Amount"].groupby([categories, starts]).sum()
+            for (category, start), amount in totals.items():
+                start = int(start)
+                if (category, period, start) in self.spent:
+                    previous = self.spent[(category, period, start)]
+                else:
+                    _, end = period_bounds(start, period)
+                    previous = self.get_spent(category, period, start, end) - amount
+                self.check(category, period, start, previous, previous + amount)
+
+    def reset(self):
+        """
+        Called by the data manager when its records were replaced, the running sums are read again when needed.
+        """
+        self.spent = {}
+
+    def remaining(self, category, period="M", date=None):
+        """
+        Returns how much is left of the limit of a category in the period of a date (today by default),
+        negative if it is exceeded, or None if the category has no limit.
+        """
+        levels = self.get_levels(category, period)
+        if levels is None:
+            return None
+        day = to_day(date if date is not None else datetime.date.today())
+        start, end = period_bounds(day, period)
+        return levels[0] - self.get_spent(category, period, start, end)
+
+    def status(self, date=None):
+        """
+        Returns a list with a dict for every category with a limit and every period containing the date
+        (today by default): the spending, the limit, what is left and the highest threshold reached (or None).
+        """
+        day = to_day(date if date is not None else datetime.date.today())
+        rows = []
+        for category in self.limits_manager.get_all_categories():
+            for period in self.periods:
+                levels = self.get_levels(category, period)
+                if levels is None:
+                    continue
+                limit, amounts = levels
+                start, end = period_bounds(day, period)
+                spent = self.get_spent(category, period, start, end)
+                reached = [threshold for threshold, amount in zip(self.thresholds, amounts) if spent >= amount]
+                rows.append({
+                    "category": category,
+                    "period": period,
+                    "start": day_to_date(start),
+                    "threshold": reached[-1] if reached else None,
+                    "spent": spent,
+                    "limit": limit,
+                    "remaining": limit - spent,
+                    "currency": self.currency,
+                })
+        return rows
@@ -0,0 +1,359 @@
+"""
+Automatic categories for records from their descriptions, learned from the records already in the ledger.
+
+    categorizer = Categorizer(data_manager)
+    categorizer.suggest("Biedronka Warszawa", "expense")   # ('Food', 0.97)
+    categories, confidences = categorizer.classify(descriptions)
+
+Descriptions are split into words, and an inverted index keeps how many records of each category used
+each word. A category is scored by its share of the records and the frequency of the words of the
+description in it (naive Bayes), so new labelled records only add to the counts, nothing is retrained.
+Rules (a keyword and its category, for example: biedronka,Food) take precedence over the counts.
+Classifying works on the distinct descriptions only, with all their words scored at once in NumPy.
+"""
+from pathlib import Path
+import re
+import numpy as np
+import pandas as pd
+
+TOKEN = re.compile(r"[^\W\d_]{2,}")
+# Words, or the line breaks separating the descriptions tokenized together.
+TOKEN_OR_BREAK = re.compile(r"[^\W\d_]{2,}|\n")
+# Descriptions that say nothing about the record, the window saves an empty one as "No description".
+EMPTY_DESCRIPTIONS = ["", "No description"]
+TYPES = ("expense", "income")
+MIN_CONFIDENCE = 0.5
+BATCH_SIZE = 50000
+
+
+def tokenize(description):
+    """
+    Returns the distinct words (letters only, at least two) of a description in lower case, in order.
+    """
+    if not isinstance(description, str) or description.strip() in EMPTY_DESCRIPTIONS:
+        return []
+    return list(dict.fromkeys(TOKEN.findall(description.lower())))
+
+
+def tokenize_many(descriptions):
+    """
+    Tokenizes many descriptions at once, see tokenize. Returns a tuple (documents, words): for every word
+    the position of its description and the word itself, in the order of the descriptions.
+    All descriptions are joined into one text and split with a single regular expression pass.
+    """
+    descriptions = pd.Series(descriptions, dtype=object).fillna("").astype(str)
+    descriptions[descriptions.isin(EMPTY_DESCRIPTIONS)] = ""
+    text = "\n".join(descriptions)
+    if text.count("\n") != max(len(descriptions) - 1, 0):
+        # Some descriptions have line breaks of their own.
+        text = "\n".join(descriptions.str.replace("\n", " "))
+    tokens = np.array(TOKEN_OR_BREAK.findall(text.lower()), dtype=object)
+    breaks = tokens == "\n"
+    documents = np.cumsum(breaks)[~breaks]
+    words = pd.DataFrame({"document": documents, "word": tokens[~breaks]}).drop_duplicates()
+    return words["document"].to_numpy(), words["word"].to_numpy()
+
+class Categorizer:
+    """
+    Suggests the category of a record from its description and type.
+    With a data manager, it learns from its records and picks up new ones before every suggestion.
+    """
+    def __init__(self, data_manager=None, rules_file=None, alpha=1.0, min_confidence=MIN_CONFIDENCE):
+        """
+        rules_file: optional CSV file with the columns Keyword and Category
+        alpha: smoothing of the word counts, a word never seen in a category still gets alpha of a count
+        min_confidence: categories guessed with a lower probability are not assigned by categorize
+        """
+        self.data_manager = data_manager
+        self.alpha = alpha
+        self.min_confidence = min_confidence
+        self.rules = {}
+        self.clear()
+        if rules_file is not None:
+            self.load_rules(rules_file)
+        if data_manager is not None:
+            data_manager.add_listener(self)
+
+    def clear(self):
+        """
+        Forgets everything learned from the records (but not the rules).
+        """
+        self.vocabulary = {}
+        self.words = None
+        self.categories = []
+        self.category_codes = {}
+        # counts[word, category]: number of records of the category with the word in their description
+        self.counts = np.zeros((1024, 16))
+        self.records = np.zeros(16)
+        self.type_records = np.zeros((len(TYPES), 16))
+        self.learned = 0
+        self.data_version = None
+        self.log_probabilities = None
+
+    def add_rule(self, keyword, category):
+        """
+        Assigns a category to every description with the keyword (a single word, in any case).
+        """
+        words = tokenize(keyword)
+        if len(words) != 1:
+            raise ValueError(f"Rule keyword '{keyword}' must be a single word of letters!")
+        self.rules[words[0]] = category
+
+    def load_rules(self, path):
+        """
+        Reads rules from a CSV file with the columns Keyword and Category.
+        """
+        df = pd.read_csv(path, dtype=str).fillna("")
+        missing = {"Keyword", "Category"}.difference(df.columns)
+        if missing:
+            raise ValueError(f"File '{path}' has no column {', '.join(sorted(missing))}!")
+        for keyword, category in zip(df["Keyword"], df["Category"]):
+            self.add_rule(keyword, category.strip())
+
+    def save_rules(self, path):
+        pd.DataFrame({"Keyword": list(self.rules), "Category": list(self.rules.values())}).to_csv(
+            Path(path), index=False)
+
+    def category_code(self, category):
+        """
+        Returns the column of a category in the counts, adding it if it is new.
+        """
+        code = self.category_codes.get(category)
+        if code is None:
+            code = self.category_codes[category] = len(self.categories)
+            self.categories.append(category)
+            if code >= self.counts.shape[1]:
+                self.resize(self.counts.shape[0], 2 * self.counts.shape[1])
+        return code
+
+    def resize(self, words, categories):
+        """
+        Grows the count arrays to room for the given number of words and categories.
+        """
+        counts = np.zeros((words, categories))
+        counts[:self.counts.shape[0], :self.counts.shape[1]] = self.counts
+        self.counts = counts
+        records = np.zeros(categories)
+        records[:len(self.records)] = self.records
+        self.records = records
+        type_records = np.zeros((len(TYPES), categories))
+        type_records[:, :self.type_records.shape[1]] = self.type_records
+        self.type_records = type_records
+
+    def word_index(self):
+        """
+        Returns a pandas Index of the known words in the order of their ids, for looking up many words at once.
+        """
+        if self.words is None or len(self.words) != len(self.vocabulary):
+            self.words = pd.Index(list(self.vocabulary), dtype=object)
+        return self.words
+
+    def word_ids(self, words, add=False):
+        """
+        Returns an int64 array with the ids of words, -1 for unknown ones unless add is True.
+        """
+        if len(words) < 1000:
+            ids = np.fromiter((self.vocabulary.get(word, -1) for word in words), dtype="int64", count=len(words))
+        else:
+            ids = self.word_index().get_indexer(words).astype("int64")
+        if not add:
+            return ids
+        missing = ids < 0
+        if missing.any():
+            new_words = pd.unique(np.asarray(words, dtype=object)[missing])
+            first = len(self.vocabulary)
+            self.vocabulary.update(zip(new_words.tolist(), range(first, first + len(new_words))))
+            ids[missing] = pd.Index(new_words).get_indexer(np.asarray(words, dtype=object)[missing]) + first
+        if len(self.vocabulary) > self.counts.shape[0]:
+            self.resize(max(len(self.vocabulary), 2 * self.counts.shape[0]), self.counts.shape[1])
+        return ids
+
+    def learn(self, descriptions, categories, types=None):
+        """
+        Adds labelled records to the counts.
+        descriptions, categories: sequences of the same length
+        types: optional sequence with 'income' or 'expense' for each record
+        """
+        df = pd.DataFrame({
+            "Description": pd.Series(descriptions, dtype=object).to_numpy(),
+            "Category": pd.Series(categories, dtype=object).to_numpy(),
+            "Type": pd.Series(types, dtype=object).to_numpy() if types is not None else "expense",
+        })
+        df = df[df["Category"].notna()]
+        if df.empty:
+            return
+        self.log_probabilities = None
+
+        codes, uniques = pd.factorize(df["Category"], sort=False)
+        categories = np.array([self.category_code(str(category)) for category in uniques], dtype="int64")[codes]
+        incomes = (df["Type"].to_numpy() == "income").astype("int64")
+        np.add.at(self.records, categories, 1)
+        np.add.at(self.type_records, (incomes, categories), 1)
+
+        # Records with the same description and category are counted once per word, with their number.
+        codes, uniques = pd.factorize(df["Description"].fillna(""), sort=False)
+        pairs = pd.Series(1, index=pd.MultiIndex.from_arrays([codes, categories])).groupby(level=[0, 1]).sum()
+        documents = pairs.index.get_level_values(0).to_numpy()
+        word_documents, words = tokenize_many(uniques)
+        lengths = np.bincount(word_documents, minlength=len(uniques))
+        ids = self.word_ids(words, add=True)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        # The words of the description of every pair, with the category and number of records of the pair.
+        pair_lengths = lengths[documents]
+        offsets = np.arange(pair_lengths.sum()) - np.repeat(np.cumsum(pair_lengths) - pair_lengths, pair_lengths)
+        pair_words = ids[np.repeat(starts[documents], pair_lengths) + offsets]
+        cells = pair_words * self.counts.shape[1] + np.repeat(pairs.index.get_level_values(1).to_numpy(), pair_lengths)
+        weights = np.repeat(pairs.to_numpy().astype("float64"), pair_lengths)
+        if len(cells) > self.counts.size // 8:
+            self.counts += np.bincount(cells, weights=weights, minlength=self.counts.size).reshape(self.counts.shape)
+        else:
+            # A few new records, adding to the cells directly does not allocate a whole new count matrix.
+            np.add.at(self.counts.reshape(-1), cells, weights)
+
+    def update(self):
+        """
+        Learns the records added to the data manager since the last update, if it has changed.
+        """
+        if self.data_manager is None or self.data_version == self.data_manager.version:
+            return
+        self.data_manager.wait_until_loaded()
+        version = self.data_manager.version
+        count = self.data_manager.count_records()
+        if count > self.learned:
+            new_rows = self.data_manager.get_records_page(self.learned, count - self.learned)
+            self.learn(new_rows["Description"], new_rows["Category"].astype(object), new_rows["Type"].astype(object))
+            self.learned = count
+        self.data_version = version
+
+    def add(self, record_type, category, amount, date):
+        """
+        Called by the data manager after a record was added, it is learned on the next update.
+        """
+
+    def add_frame(self, df):
+        """
+        Called by the data manager after many records were added, they are learned on the next update.
+        """
+
+    def reset(self):
+        """
+        Called by the data manager when its records were replaced, everything is learned again.
+        """
+        self.clear()
+
+    def get_log_probabilities(self):
+        """
+        Returns the log probability of each word in the records of each category (words x categories),
+        computed again only after new records were learned.
+        """
+        if self.log_probabilities is None:
+            words, categories = len(self.vocabulary), len(self.categories)
+            counts = self.counts[:words, :categories]
+            totals = counts.sum(axis=0)
+            # Single precision is plenty for comparing the scores and halves the memory of summing them.
+            log_probabilities = np.log(counts + self.alpha) - np.log(totals + self.alpha * max(words, 1))
+            self.log_probabilities = log_probabilities.astype("float32")
+        return self.log_probabilities
+
+    def classify(self, descriptions, types=None):
+        """
+        Returns a tuple (categories, confidences): an object array with the most likely category
+        of each description (None if none of its words is known) and a float array with its probability.
+        types: optional sequence with the record types, only categories seen with the type are chosen
+        Every distinct (description, type) pair is scored once, in batches of BATCH_SIZE.
+        """
+        self.update()
+        descriptions = pd.Series(descriptions, dtype=object).fillna("").to_numpy()
+        if types is None:
+            keys = descriptions
+        else:
+            keys = pd.MultiIndex.from_arrays([descriptions, pd.Series(types, dtype=object).to_numpy()])
+        codes, uniques = pd.factorize(keys, sort=False)
+        categories = np.empty(len(uniques), dtype=object)
+        confidences = np.zeros(len(uniques))
+        for start in range(0, len(uniques), BATCH_SIZE):
+            batch = uniques[start:start + BATCH_SIZE]
+            if types is None:
+                batch_descriptions, batch_types = batch, None
+            else:
+                batch_descriptions = batch.get_level_values(0).to_numpy()
+                batch_types = batch.get_level_values(1).to_numpy()
+            batch_categories, batch_confidences = self.classify_unique(batch_descriptions, batch_types)
+            categories[start:start + len(batch)] = batch_categories
+            confidences[start:start + len(batch)] = batch_confidences
+        return categories[codes], confidences[codes]
+
+    def classify_unique(self, descriptions, types=None):
+        """
+        Scores distinct descriptions, see classify.
+        """
+        count = len(descriptions)
+        documents, flat = tokenize_many(descriptions)
+        categories = np.full(count, None, dtype=object)
+        confidences = np.zeros(count)
+
+        if self.categories:
+            ids = self.word_ids(flat)
+            known = ids >= 0
+            scores = np.zeros((count, len(self.categories)))
+            if known.any():
+                # Rows of the known words of each description, summed per description in one pass.
+                known_documents = documents[known]
+                starts = np.flatnonzero(np.r_[True, known_documents[1:] != known_documents[:-1]])
+                scores[known_documents[starts]] = np.add.reduceat(self.get_log_probabilities()[ids[known]], starts)
+            records = self.records[:len(self.categories)]
+            scores += np.log(records / records.sum())
+            if types is not None:
+                type_records = self.type_records[:, :len(self.categories)]
+                for type_code, record_type in enumerate(TYPES):
+                    rows = np.asarray(types) == record_type
+                    if rows.any() and type_records[type_code].any():
+                        scores[np.ix_(rows, type_records[type_code] == 0)] = -np.inf
+            best = scores.argmax(axis=1)
+            probabilities = np.exp(scores - scores[np.arange(count), best][:, None])
+            confidence = 1.0 / probabilities.sum(axis=1)
+            has_words = np.zeros(count, dtype=bool)
+            has_words[documents[known]] = True
+            names = np.array(self.categories, dtype=object)
+            categories[has_words] = names[best[has_words]]
+            confidences[has_words] = confidence[has_words]
+
+        if self.rules and len(flat):
+            rules = pd.Index(list(self.rules))
+            hits = np.flatnonzero(rules.get_indexer(flat) >= 0)
+            if len(hits):
+                # The first keyword of a description decides.
+                matched, first = np.unique(documents[hits], return_index=True)
+                categories[matched] = [self.rules[flat[position]] for position in hits[first]]
+                confidences[matched] = 1.0
+        return categories, confidences
+
+    def suggest(self, description, record_type=None):
+        """
+        Returns a tuple (category, confidence) for a single description, (None, 0.0) if it cannot be guessed.
+        """
+        categories, confidences = self.classify([description], None if record_type is None else [record_type])
+        return categories[0], float(confidences[0])
+
+    def categorize(self, df, overwrite=False, min_confidence=None):
+        """
+        Returns a copy of a DataFrame of records with the categories guessed from the descriptions
+        filled in for the rows without one (all rows if overwrite is True), when the guess has at least
+        min_confidence (self.min_confidence by default). Other rows keep their category.
+        """
+        if min_confidence is None:
+            min_confidence = self.min_confidence
+        df = df.copy()
+        category = df["Category"].astype(object) if "Category" in df.columns else pd.Series(None, index=df.index,
+                                                                                              dtype=object)
+        rows = np.ones(len(df), dtype=bool) if overwrite else category.isna().to_numpy()
+        if not rows.any():
+            return df
+        types = df["Type"].astype(object).to_numpy()[rows] if "Type" in df.columns else None
+        guesses, confidences = self.classify(df["Description"].to_numpy()[rows], types)
+        accepted = (confidences >= min_confidence) & pd.notna(guesses)
+        category = category.to_numpy(copy=True)
+        category[np.flatnonzero(rows)[accepted]] = guesses[accepted]
+        df["Category"] = category
+        return df
@@ -0,0 +1,68 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from budget_manager.stats_manager import DEFAULT_FIGSIZE, draw_chart_image
+
+class ChartRenderer:
+    """
+    Renders StatsManager charts in a background worker, so the Tk window stays responsive.
+    The data is collected on the Tk thread, drawing to RGBA pixels runs in the worker on figures it keeps
+    between requests (see ChartFigures), and the result is handed back on the Tk thread by polling with root.after.
+    Only the latest request is delivered, older ones are cancelled.
+    """
+    POLL_INTERVAL_MS = 25
+
+    def __init__(self, root, stats_manager, use_processes=False):
+        self.root = root
+        self.stats_manager = stats_manager
+        if use_processes:
+            self.executor = ProcessPoolExecutor(max_workers=1)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-renderer")
+        self.pending = None
+
+    def request(self, chart, on_done, figsize=DEFAULT_FIGSIZE):
+        """
+        Starts rendering a chart and calls on_done(image) on the Tk thread when it is ready.
+        image is a ChartImage, or None if there is no data to show. Returns True if the chart came from the cache.
+        """
+        self.cancel()
+        key = self.stats_manager.chart_key(chart, figsize, "image")
+        found, image = self.stats_manager.get_cached_chart(key)
+        if found:
+            on_done(image)
+            return True
+
+        data = self.stats_manager.chart_data(chart)
+        if data is None:
+            self.stats_manager.store_chart(key, None)
+            on_done(None)
+            return True
+
+        future = self.executor.submit(draw_chart_image, chart, data, figsize, self.stats_manager.data_manager.currency)
+        self.pending = (future, key, on_done)
+        self.root.after(self.POLL_INTERVAL_MS, self.poll, future)
+        return False
+
+    def poll(self, future):
+        """Delivers the result of a request once its worker has finished, stale requests are dropped."""
+        if self.pending is None or self.pending[0] is not future:
+            return
+        if not future.done():
+            self.root.after(self.POLL_INTERVAL_MS, self.poll, future)
+            return
+
+        _, key, on_done = self.pending
+        self.pending = None
+        image = future.result()
+        self.stats_manager.store_chart(key, image)
+        on_done(image)
+
+    def cancel(self):
+        """Cancels the request in progress, its result will never be delivered."""
+        if self.pending is not None:
+            self.pending[0].cancel()
+            self.pending = None
+
+    def shutdown(self):
+        """Stops the background worker."""
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,319 @@
+"""
+Command line interface for using a budget without the graphical interface:
+
+    python -m budget_manager summary
+    python -m budget_manager limits
+    python -m budget_manager alerts
+    python -m budget_manager chart pie pie.png
+    python -m budget_manager forecast --months 6
+    python -m budget_manager import statement.csv --map Amount=Kwota --auto-category
+    python -m budget_manager suggest "Biedronka Warszawa"
+    python -m budget_manager households households/
+    python -m budget_manager serve --port 8080
+
+Only argparse is imported at startup, pandas and Matplotlib are loaded by the commands that need them.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+CHARTS = ["pie", "limits", "projected", "balance"]
+
+
+def open_managers(args):
+    from budget_manager.data_manager import create_data_manager
+    from budget_manager.limits_manager import LimitsManager
+
+    # The managers report loading on stdout, keep it free for the command output (for example JSON).
+    with contextlib.redirect_stdout(sys.stderr):
+        limits_manager = LimitsManager(args.categories)
+        data_manager = create_data_manager(limits_manager, args.data, currency=args.currency)
+    return data_manager, limits_manager
+
+
+def get_summary(data_manager):
+    return {
+        "total_income": float(data_manager.get_total_incomes()),
+        "total_expenses": float(data_manager.get_total_expenses()),
+        "balance": float(data_manager.get_balance()),
+    }
+
+
+def get_limits_status(data_manager, limits_manager, month=None):
+    if month is None:
+        expenses_by_category = data_manager.get_expenses_by_category()
+    else:
+        monthly_status = limits_manager.get_monthly_status(data_manager, month)
+        expenses_by_category = {category: row["spent"] for category, row in monthly_status.items()}
+    status = []
+    for category in limits_manager.get_all_categories():
+        spent = float(expenses_by_category.get(category, 0.0))
+        limit = limits_manager.get_limit(category)
+        status.append({
+            "category": category,
+            "spent": spent,
+            "limit": limit,
+            "left": limit - spent if limit else None,
+            "exceeded": bool(limit) and spent > limit,
+        })
+    return status
+
+
+def summary_command(args):
+    from budget_manager.currency import currency_label
+
+    data_manager, _ = open_managers(args)
+    summary = get_summary(data_manager)
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        label = currency_label(data_manager.currency)
+        print(f"Total Income: {summary['total_income']:.2f} {label} | Total Expenses: "
+              f"{summary['total_expenses']:.2f} {label} | Your Balance: {summary['balance']:.2f} {label}")
+
+
+def limits_command(args):
+    from budget_manager.currency import currency_label
+
+    data_manager, limits_manager = open_managers(args)
+    status = get_limits_status(data_manager, limits_manager, args.month)
+    if args.json:
+        print(json.dumps(status))
+        return
+    label = currency_label(data_manager.currency)
+    for row in status:
+        if not row["limit"]:
+            line = f"{row['spent']:.2f} {label} spent, no limit"
+        elif row["exceeded"]:
+            line = f"{row['spent']:.2f} {label} / {row['limit']:.2f} {label}, exceeded by {-row['left']:.2f} {label}"
+        else:
+            line = f"{row['spent']:.2f} {label} / {row['limit']:.2f} {label}, {row['left']:.2f} {label} left"
+        print(f"{row['category']}: {line}")
+
+
+def alerts_command(args):
+    from budget_manager.alerts import PERIOD_NAMES, LimitAlerts
+    from budget_manager.currency import currency_label
+
+    data_manager, limits_manager = open_managers(args)
+    limit_alerts = LimitAlerts(data_manager, limits_manager, thresholds=args.thresholds)
+    status = [row for row in limit_alerts.status(args.date) if args.all or row["threshold"] is not None]
+    if args.json:
+        print(json.dumps(status))
+        return
+    if not status:
+        print("No limit thresholds reached.")
+    label = currency_label(data_manager.currency)
+    for row in status:
+        reached = f"{row['threshold']:.0%} reached" if row["threshold"] is not None else "no threshold reached"
+        if row["remaining"] < 0:
+            left = f"exceeded by {-row['remaining']:.2f} {label}"
+        else:
+            left = f"{row['remaining']:.2f} {label} left"
+        print(f"{row['category']} ({PERIOD_NAMES[row['period']]} from {row['start']}): "
+              f"{row['spent']:.2f} {label} / {row['limit']:.2f} {label}, {reached}, {left}")
+
+
+def chart_command(args):
+    from budget_manager.stats_manager import StatsManager
+
+    data_manager, limits_manager = open_managers(args)
+    stats_manager = StatsManager(data_manager, limits_manager)
+    if not stats_manager.export_chart(args.chart, args.output, figsize=(args.width, args.height)):
+        print(f"There is no data to show on the '{args.chart}' chart.", file=sys.stderr)
+        return 1
+    print(f"Chart saved to '{args.output}'")
+
+
+def get_forecast(data_manager, limits_manager, months=6, as_of=None):
+    from budget_manager.forecast import Forecaster
+
+    forecaster = Forecaster(data_manager, limits_manager)
+    projection = forecaster.project(months, as_of)
+    return {
+        "as_of": projection["as_of"],
+        "recurring": forecaster.recurring(as_of),
+        "months": [{"month": month, "income": float(income), "expenses": float(expenses), "balance": float(balance)}
+                   for month, income, expenses, balance in zip(projection["months"], projection["incomes"],
+                                                               projection["expenses"], projection["balance"])],
+        "month_end": forecaster.month_end_projection(as_of),
+    }
+
+
+def forecast_command(args):
+    from budget_manager.currency import currency_label
+
+    data_manager, limits_manager = open_managers(args)
+    forecast = get_forecast(data_manager, limits_manager, args.months, args.as_of)
+    if args.json:
+        print(json.dumps(forecast))
+        return
+    label = currency_label(data_manager.currency)
+    print(f"Recurring records (as of {forecast['as_of']}):")
+    for item in forecast["recurring"]:
+        period = "monthly" if item["period"] == "M" else "weekly"
+        print(f"  {item['description']} ({item['category']}, {item['type']}): {item['amount']:.2f} {label} "
+              f"{period}, next on {item['next']}")
+    print("Projection:")
+    for row in forecast["months"]:
+        print(f"  {row['month']}: Income: {row['income']:.2f} {label} | Expenses: {row['expenses']:.2f} {label} "
+              f"| Balance at month end: {row['balance']:.2f} {label}")
+    print("This month's expenses projected for its end:")
+    for category, row in forecast["month_end"].items():
+        line = f"{row['spent']:.2f} {label} spent, {row['projected']:.2f} {label} projected"
+        if row["limit"]:
+            line += f" / {row['limit']:.2f} {label}" + (", over the limit" if row["projected"] > row["limit"] else "")
+        print(f"  {category}: {line}")
+
+
+def import_command(args):
+    from budget_manager import importer
+    from budget_manager.alerts import LimitAlerts, format_alert
+
+    data_manager, limits_manager = open_managers(args)
+    limit_alerts = LimitAlerts(data_manager, limits_manager)
+    limit_alerts.subscribe(lambda alert: print(f"Limit alert: {format_alert(alert)}"))
+    importer.run(args, data_manager, limits_manager)
+
+
+def suggest_command(args):
+    from budget_manager.categorizer import Categorizer
+
+    data_manager, _ = open_managers(args)
+    categorizer = Categorizer(data_manager, rules_file=args.category_rules)
+    types = [args.type] * len(args.descriptions) if args.type else None
+    categories, confidences = categorizer.classify(args.descriptions, types)
+    suggestions = [{"description": description, "category": category, "confidence": float(confidence)}
+                   for description, category, confidence in zip(args.descriptions, categories, confidences)]
+    if args.json:
+        print(json.dumps(suggestions))
+        return
+    for row in suggestions:
+        if row["category"] is None:
+            print(f"{row['description']}: no suggestion")
+        else:
+            print(f"{row['description']}: {row['category']} ({row['confidence']:.0%})")
+
+
+def serve_command(args):
+    from budget_manager import server
+
+    data_manager, limits_manager = open_managers(args)
+    return server.run(args, data_manager, limits_manager)
+
+
+def households_command(args):
+    from budget_manager.currency import currency_label
+    from budget_manager.ledgers import LedgerRegistry
+
+    registry = LedgerRegistry(max_workers=args.workers, currency=args.currency)
+    for directory in args.directories:
+        registry.add_directory(directory)
+    totals = registry.get_totals()
+    if args.json:
+        print(json.dumps(totals))
+        return
+    for name, ledger in totals.items():
+        label = currency_label(ledger["currency"])
+        print(f"{name}: Total Income: {ledger['total_income']:.2f} {label} | Total Expenses: "
+              f"{ledger['total_expenses']:.2f} {label} | Balance: {ledger['balance']:.2f} {label}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="budget_manager", description="Home Budget Manager without the GUI.")
+    parser.add_argument("--data", default="budget_data.csv", help="data file (.csv, .parquet, .feather, .sqlite)")
+    parser.add_argument("--categories", default="categories.csv", help="categories and limits file")
+    parser.add_argument("--currency", default="PLN",
+                        help="reporting currency of the totals, for example: EUR (rates are read from fx_rates.csv)")
+    parser.add_argument("--metrics", help="record timings of the managers into a .json or .prom file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    summary = commands.add_parser("summary", help="print total income, expenses and balance")
+    summary.add_argument("--json", action="store_true", help="print the result as JSON")
+    summary.set_defaults(handler=summary_command)
+
+    limits = commands.add_parser("limits", help="print spending against the limit of each category")
+    limits.add_argument("--json", action="store_true", help="print the result as JSON")
+    limits.add_argument("--month", help="only count expenses of a month, for example: 2025-01")
+    limits.set_defaults(handler=limits_command)
+
+    alerts = commands.add_parser("alerts", help="print the limit thresholds reached this month and week")
+    alerts.add_argument("--date", help="report the month and week of this date instead of today")
+    alerts.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.8, 1.0],
+                        help="fractions of the limit to report, for example: 0.5 0.8 1.0")
+    alerts.add_argument("--all", action="store_true", help="also list categories below every threshold")
+    alerts.add_argument("--json", action="store_true", help="print the result as JSON")
+    alerts.set_defaults(handler=alerts_command)
+
+    chart = commands.add_parser("chart", help="save a chart to a PNG or SVG file")
+    chart.add_argument("chart", choices=CHARTS)
+    chart.add_argument("output", help="image file, for example: pie.png or pie.svg")
+    chart.add_argument("--width", type=float, default=9, help="width in inches")
+    chart.add_argument("--height", type=float, default=6, help="height in inches")
+    chart.set_defaults(handler=chart_command)
+
+    forecast = commands.add_parser("forecast", help="print recurring records and the projected balance and expenses")
+    forecast.add_argument("--months", type=int, default=6, help="number of months to project")
+    forecast.add_argument("--as-of", help="project from this date instead of today, for example: 2025-01-15")
+    forecast.add_argument("--json", action="store_true", help="print the result as JSON")
+    forecast.set_defaults(handler=forecast_command)
+
+    suggest = commands.add_parser("suggest", help="suggest categories for descriptions from the ledger history")
+    suggest.add_argument("descriptions", nargs="+", help="descriptions of records, for example: 'Biedronka 123'")
+    suggest.add_argument("--type", choices=["expense", "income"], help="type of the records")
+    suggest.add_argument("--category-rules", help="CSV file with Keyword,Category rules")
+    suggest.add_argument("--json", action="store_true", help="print the result as JSON")
+    suggest.set_defaults(handler=suggest_command)
+
+    households = commands.add_parser("households", help="print the totals of many ledgers, one per subdirectory")
+    households.add_argument("directories", nargs="+", help="directories with one subdirectory per ledger")
+    households.add_argument("--workers", type=int, help="number of worker processes")
+    households.add_argument("--json", action="store_true", help="print the result as JSON")
+    households.set_defaults(handler=households_command)
+
+    serve = commands.add_parser("serve", help="serve the ledger over a local HTTP/JSON API")
+    add_serve_arguments(serve)
+    serve.set_defaults(handler=serve_command)
+
+    import_parser = commands.add_parser("import", help="import records from an external CSV file")
+    add_import_arguments(import_parser)
+    import_parser.set_defaults(handler=import_command)
+    return parser
+
+
+def add_serve_arguments(parser):
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to listen on, other than 127.0.0.1 (like 0.0.0.0) only with --token")
+    parser.add_argument("--token", help="token that requests must send as 'Authorization: Bearer <token>', "
+                                        "default: the BUDGET_API_TOKEN environment variable")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument("--max-batch", type=int, default=10000,
+                        help="largest number of records written to the data file at once")
+
+
+def add_import_arguments(parser):
+    parser.add_argument("file", help="CSV file to import")
+    parser.add_argument("--map", action="append", metavar="COLUMN=SOURCE",
+                        help="map a ledger column to a column of the file, for example: --map Amount=Kwota")
+    parser.add_argument("--signed-amounts", action="store_true",
+                        help="take the record type from the sign of the amount")
+    parser.add_argument("--default-category", help="category for rows without one")
+    parser.add_argument("--default-currency", default="PLN", help="currency of rows without one")
+    parser.add_argument("--auto-category", action="store_true",
+                        help="guess the category of rows without one from their descriptions")
+    parser.add_argument("--category-rules", help="CSV file with Keyword,Category rules for --auto-category")
+    parser.add_argument("--skip-invalid", action="store_true", help="skip rows that cannot be imported")
+    parser.add_argument("--sep", default=",", help="field separator of the file")
+    parser.add_argument("--decimal", default=".", help="decimal separator of the file")
+    parser.add_argument("--chunksize", type=int, default=100000, help="number of rows read at once")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # instrumentation.ENV_VAR, checked here so the module is only imported when metrics are recorded.
+    if args.metrics or os.environ.get("BUDGET_MANAGER_METRICS"):
+        from budget_manager import instrumentation
+        instrumentation.enable_from_env(args.metrics)
+    sys.exit(args.handler(args))
@@ -0,0 +1,166 @@
+"""
+Currencies of the records and their conversion to the reporting currency of a ledger.
+
+Exchange rates are read from a local CSV file (fx_rates.csv next to the data file by default):
+
+    Date,Currency,Rate
+    2025-01-02,EUR,4.27
+    2025-01-02,USD,4.12
+
+where Rate is the value of one unit of the currency in PLN on that date. A date without a rate takes the last
+rate before it (rates are not published on weekends), dates before the first rate take the first one.
+Rates are looked up once per currency and date and remembered, so converting a ledger costs one
+binary search per distinct date, not per record.
+"""
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from budget_manager.locking import file_state
+
+DEFAULT_CURRENCY = "PLN"
+FX_RATES_FILE = "fx_rates.csv"
+SYMBOLS = {"PLN": "zł", "EUR": "€", "USD": "$", "GBP": "£"}
+# Days of records without a date, see record_store.MISSING_DAY.
+MISSING_DAY = np.iinfo("int32").min
+
+
+def currency_label(currency):
+    """
+    Returns the symbol shown after amounts in a currency, for example 'zł' for PLN, or the code itself.
+    """
+    return SYMBOLS.get(currency, currency)
+
+
+def normalize_currency(currency):
+    """
+    Returns a currency code in upper case, DEFAULT_CURRENCY for a missing one.
+    """
+    if currency is None or currency != currency or not str(currency).strip():
+        return DEFAULT_CURRENCY
+    return str(currency).strip().upper()
+
+
+class FxRates:
+    """
+    Exchange rates by currency and date, with DEFAULT_CURRENCY (PLN) as the base currency.
+    """
+    def __init__(self, path=None):
+        """
+        path: CSV file with the columns Date, Currency and Rate; without a file only PLN is known
+        """
+        self.path = Path(path) if path is not None else None
+        self.rates = {}
+        self.memo = {}
+        self.state = None
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def load(self):
+        """
+        Read the rates file. Every currency gets its days sorted, for binary search by date.
+        """
+        df = pd.read_csv(self.path, dtype={"Currency": str})
+        missing = {"Date", "Currency", "Rate"}.difference(df.columns)
+        if missing:
+            raise ValueError(f"File '{self.path}' has no column {', '.join(sorted(missing))}!")
+        days = pd.to_datetime(df["Date"], format="ISO8601", errors="coerce").to_numpy(dtype="datetime64[D]")
+        rates = pd.to_numeric(df["Rate"], errors="coerce").to_numpy(dtype="float64")
+        valid = ~np.isnat(days) & (rates > 0)
+        df = pd.DataFrame({
+            "Currency": df["Currency"][valid].map(normalize_currency).to_numpy(),
+            "Day": days[valid].astype("int64"),
+            "Rate": rates[valid],
+        }).sort_values(["Currency", "Day"], kind="stable")
+        self.rates = {
+            currency: (group["Day"].to_numpy(), group["Rate"].to_numpy())
+            for currency, group in df.groupby("Currency", sort=False)
+        }
+        self.memo = {}
+        self.state = file_state(self.path)
+
+    def currencies(self):
+        """
+        Returns the list of currencies with known rates, the base currency first.
+        """
+        return [DEFAULT_CURRENCY] + sorted(currency for currency in self.rates if currency != DEFAULT_CURRENCY)
+
+    def has_currency(self, currency):
+        return currency == DEFAULT_CURRENCY or currency in self.rates
+
+    def rates_on(self, currency, days):
+        """
+        Returns a float64 array with the value in PLN of one unit of a currency on each day
+        (int days since 1970-01-01, MISSING_DAY takes the latest rate).
+        Each distinct day is looked up once and remembered.
+        """
+        days = np.asarray(days, dtype="int64")
+        if currency == DEFAULT_CURRENCY:
+            return np.ones(len(days))
+        if currency not in self.rates:
+            raise ValueError(f"No exchange rate for currency '{currency}'! Add it to the exchange rates file first.")
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        unique_rates = np.empty(len(unique_days))
+        unknown = []
+        for position, day in enumerate(unique_days.tolist()):
+            rate = self.memo.get((currency, day))
+            if rate is None:
+                unknown.append(position)
+            else:
+                unique_rates[position] = rate
+        if unknown:
+            rate_days, rates = self.rates[currency]
+            lookup = unique_days[unknown]
+            lookup = np.where(lookup == MISSING_DAY, rate_days[-1], lookup)
+            positions = np.maximum(np.searchsorted(rate_days, lookup, side="right") - 1, 0)
+            unique_rates[unknown] = rates[positions]
+            for day, rate in zip(unique_days[unknown].tolist(), rates[positions].tolist()):
+                self.memo[(currency, day)] = rate
+        return unique_rates[inverse]
+
+    def rate(self, currency, day):
+        """
+        Returns the value in PLN of one unit of a currency on a day (see rates_on).
+        """
+        rate = self.memo.get((currency, day))
+        if rate is None:
+            rate = float(self.rates_on(currency, [day])[0])
+        return rate
+
+    def convert(self, amounts, currencies, days, to=DEFAULT_CURRENCY, skipped=None):
+        """
+        Returns a float64 array with amounts in many currencies converted to one currency on their days,
+        in one batched operation: the rates are gathered per distinct currency and day.
+        amounts: amounts in their own currencies
+        currencies: currency code of each amount
+        days: int days since 1970-01-01 of each amount (MISSING_DAY for no date)
+        skipped: optional set, amounts in currencies without rates are then converted to 0 and their
+                 currencies added to it instead of raising ValueError
+        """
+        amounts = np.asarray(amounts, dtype="float64")
+        days = np.asarray(days, dtype="int64")
+        if isinstance(currencies, (list, tuple)):
+            currencies = np.array(currencies, dtype=object)
+        codes, names = pd.factorize(currencies)
+        if len(names) == 1 and names[0] == to or not len(amounts):
+            return amounts
+        factors = np.ones(len(amounts))
+        for code, currency in enumerate(names):
+            if currency == DEFAULT_CURRENCY:
+                continue
+            positions = np.flatnonzero(codes == code)
+            if skipped is not None and currency not in self.rates:
+                factors[positions] = 0.0
+                skipped.add(currency)
+                continue
+            factors[positions] = self.rates_on(currency, days[positions])
+        if to != DEFAULT_CURRENCY:
+            factors /= self.rates_on(to, days)
+        return amounts * factors
+
+    def convert_one(self, amount, currency, day, to=DEFAULT_CURRENCY):
+        """
+        Returns a single amount converted from one currency to another on a day.
+        """
+        if currency == to:
+            return float(amount)
+        return float(amount) * self.rate(currency, day) / self.rate(to, day)
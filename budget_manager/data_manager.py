@@ -1,48 +1,337 @@
 from pathlib import Path
+import os
+import threading
+import numpy as np
 import pandas as pd
+from budget_manager.aggregates import AggregateStore
+from budget_manager.currency import DEFAULT_CURRENCY, FX_RATES_FILE, FxRates, normalize_currency
+from budget_manager.locking import file_state
+from budget_manager.record_store import MISSING_DAY, RecordStore, to_days
+from budget_manager.snapshot import load_snapshot, save_snapshot
+from budget_manager.timeseries import TimeSeriesIndex, to_day
+from budget_manager.storage import COLUMNS, CsvStorage, SqliteStorage, apply_schema, open_storage
+
+# Bytes appended to the data file after which the snapshot is taken again.
+SNAPSHOT_REFRESH_BYTES = 4 * 2**20
 
 class DataManager:
-    def __init__(self, limits_manager, csv_file_path="budget_data.csv"):
+    def __init__(self, limits_manager, csv_file_path="budget_data.csv", storage=None, background=False,
+                 snapshots=True, currency=DEFAULT_CURRENCY, fx_rates=None):
+        """
+        csv_file_path: data file, the storage format is chosen by its extension (.csv, .parquet, .feather)
+        storage: optional storage backend object, overrides the one chosen from csv_file_path
+        background: load the records in a background thread, so the caller does not wait for large files
+        snapshots: keep a snapshot of the parsed CSV file next to it (see budget_manager.snapshot)
+        currency: reporting currency, all totals, limits and charts are in it
+        fx_rates: FxRates with the exchange rates, by default read from fx_rates.csv next to the data file
+        """
         self.csv_file_path = Path(csv_file_path)
+        self.currency = normalize_currency(currency)
+        self.fx_rates = fx_rates if fx_rates is not None else FxRates(self.csv_file_path.with_name(FX_RATES_FILE))
+        self.storage = storage if storage is not None else open_storage(self.csv_file_path)
+        if isinstance(self.storage, SqliteStorage):
+            raise ValueError(f"'{self.csv_file_path}' is an SQLite database, open it with SqliteDataManager "
+                             f"(or create_data_manager, which picks the data manager from the file extension)!")
+        self.shared = isinstance(self.storage, CsvStorage)
+        self.snapshots = snapshots and self.shared
+        self.known_state = None
+        self.snapshot_state = None
         self.limits_manager = limits_manager
-        self.df = self.load_or_init_data()
+        self._records_view = None
+        self.version = 0
+        self.records = RecordStore(limits_manager)
+        self.aggregates = AggregateStore()
+        self.timeseries = TimeSeriesIndex()
+        self.listeners = []
+        self.load_progress = {"rows": 0, "total_income": 0.0, "total_expenses": 0.0}
+        # Currencies of records without exchange rates, their amounts count as 0 in the totals.
+        self.unconverted = set()
+        self.load_error = None
+        self.loader = None
+        if background:
+            self.loader = threading.Thread(target=self.load_records, daemon=True)
+            self.loader.start()
+        else:
+            self.load_records()
+
+    @property
+    def df(self):
+        """
+        A DataFrame with all records, built from the compact record store on every access.
+        Amounts are in the currency of each record, as stored in the data file.
+        The getters below work on the store directly and should be preferred.
+        """
+        return self.records.to_frame()
+
+    @df.setter
+    def df(self, df):
+        self.wait_until_loaded()
+        df = apply_schema(df)
+        converted = self.convert(df)
+        self.records.clear()
+        self.aggregates.reset()
+        self.timeseries.reset()
+        self.ingest(df, converted, self.records, self.aggregates, self.timeseries)
+        self.version += 1
+        self.notify("reset")
+
+    def convert(self, df, strict=False):
+        """
+        Returns a float array with the amounts of a DataFrame of records converted to the reporting currency
+        in one batched operation, or None if they all are in it already.
+        Amounts in a currency without exchange rates count as 0 and the currency is reported, so one such record
+        does not stop the ledger from loading. strict: raise ValueError for them instead (for new records).
+        """
+        currencies = df["Currency"]
+        if currencies.cat.categories.tolist() == [self.currency] or df.empty:
+            return None
+        skipped = None if strict else set()
+        converted = self.fx_rates.convert(df["Amount"].to_numpy(dtype="float64"), currencies.array,
+                                          to_days(df["Date"]), self.currency, skipped)
+        if skipped:
+            self.report_unconverted(skipped)
+        return converted
+
+    def report_unconverted(self, currencies):
+        """
+        Remembers currencies of records without exchange rates and prints the ones not reported before.
+        """
+        new = set(currencies).difference(self.unconverted)
+        if new:
+            self.unconverted.update(new)
+            print(f"Records in {', '.join(sorted(new))} have no exchange rate and count as 0 in the totals. "
+                  f"Add the rates to '{self.fx_rates.path or FX_RATES_FILE}'.")
+
+    def convert_one(self, amount, currency, date):
+        """
+        Returns a single amount converted to the reporting currency.
+        """
+        if currency == self.currency:
+            return amount
+        day = to_day(date)
+        return self.fx_rates.convert_one(amount, currency, MISSING_DAY if day is None else day, self.currency)
+
+    def ingest(self, df, converted, records, aggregates, timeseries):
+        """
+        Adds a DataFrame of records with their amounts in the reporting currency (see convert)
+        to a record store, running totals and date index. Returns the DataFrame with the converted amounts.
+        """
+        reporting = df if converted is None else df.assign(Amount=converted)
+        records.extend(df, converted)
+        aggregates.add_frame(reporting)
+        timeseries.add_frame(reporting)
+        return reporting
+
+    def load_records(self):
+        """
+        Load the records from the data file chunk by chunk, so the file is never held in memory as one DataFrame.
+        The records and running totals are collected aside and replace the current (empty) ones
+        once the whole file is read; load_progress shows the rows and totals read so far.
+        If the file does not exist or is empty, it is created with the column headers only.
+        """
+        if not self.storage.exists():
+            # Another process may create the file at the same time, only one of them may write it.
+            with self.storage.lock:
+                if not self.storage.exists():
+                    print(f"File '{self.csv_file_path}' not found or is empty. Creating new DataFrame...")
+                    self.save_df_to_csv(self.create_default_df())
+                    return
+
+        try:
+            if not self.load_snapshot():
+                self.load_chunks()
+        except pd.errors.EmptyDataError:
+            print(f"File '{self.csv_file_path}' is empty or corrupted. Creating new DataFrame...")
+            self.save_df_to_csv(self.create_default_df())
+            return
+        except Exception as error:
+            self.load_error = error
+            raise
+        print(f"Data successfully loaded from '{self.csv_file_path}'")
+
+    def load_chunks(self):
+        """
+        Parse the whole data file chunk by chunk and take a snapshot of the result.
+        """
+        if self.shared:
+            # Only the bytes present now are read, records other processes append meanwhile are left to sync().
+            with self.storage.lock:
+                self.storage.recover_torn_tail()
+                stat = os.stat(self.csv_file_path)
+            chunks = self.storage.iter_chunks(size=stat.st_size)
+        else:
+            stat = os.stat(self.csv_file_path)
+            chunks = self.storage.iter_chunks()
+        records = RecordStore(self.limits_manager)
+        aggregates = AggregateStore()
+        timeseries = TimeSeriesIndex()
+        for chunk in chunks:
+            self.ingest(chunk, self.convert(chunk), records, aggregates, timeseries)
+            self.update_load_progress(records, aggregates)
+        self.set_loaded(records, aggregates, timeseries, stat)
+
+        # The snapshot would not match the records if the file changed while it was read.
+        current = os.stat(self.csv_file_path)
+        if self.snapshots and (current.st_size, current.st_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            self.take_snapshot(stat)
 
-    def load_or_init_data(self):
+    def load_snapshot(self):
         """
-        Try to load the data from the CSV file.
-        If the file does not exist or is empty, create a new DataFrame.
+        Load the records from the snapshot of the data file and parse only the records appended after it.
+        Returns False if snapshots are off or the snapshot does not match the file (for example after a
+        manual edit), then the whole file has to be parsed.
         """
-        if not self.csv_file_path.exists() or self.csv_file_path.stat().st_size == 0:
-            print(f"File '{self.csv_file_path}' not found or is empty. Creating new DataFrame...")
-            df = self.create_default_df()
-            self.save_df_to_csv(df)
-            return df
+        if not self.snapshots:
+            return False
+        with self.storage.lock:
+            self.storage.recover_torn_tail()
+            stat = os.stat(self.csv_file_path)
+        snapshot = load_snapshot(self, stat)
+        if snapshot is None:
+            return False
+
+        records, aggregates, timeseries, size, unconverted = snapshot
+        self.report_unconverted(unconverted)
+        if stat.st_size > size:
+            new_rows = self.storage.read_from(size, stat.st_size)
+            self.ingest(new_rows, self.convert(new_rows), records, aggregates, timeseries)
+        self.update_load_progress(records, aggregates)
+        self.set_loaded(records, aggregates, timeseries, stat)
+
+        if stat.st_size > size:
+            self.take_snapshot(stat)
         else:
-            try:
-                print(f"Data successfully loaded from '{self.csv_file_path}'")
-                df = pd.read_csv(self.csv_file_path)
-                return df
-            except pd.errors.EmptyDataError:
-                print(f"File '{self.csv_file_path}' is empty or corrupted. Creating new DataFrame...")
-                df = self.create_default_df()
-                self.save_df_to_csv(df)
-                return df
+            self.snapshot_state = file_state_of(stat)
+        return True
+
+    def take_snapshot(self, stat):
+        save_snapshot(self, stat)
+        self.snapshot_state = file_state_of(stat)
+
+    def refresh_snapshot(self):
+        """
+        Takes the snapshot again if records were written since it was taken, so the next start
+        neither hashes the file nor parses the records appended meanwhile. Returns True if it was taken.
+        """
+        if not self.snapshots or not self.is_loaded() or self.known_state == self.snapshot_state:
+            return False
+        with self.storage.lock:
+            self.sync()
+            stat = os.stat(self.csv_file_path)
+            if file_state_of(stat) != self.known_state:
+                return False
+            self.take_snapshot(stat)
+        return True
+
+    def update_load_progress(self, records, aggregates):
+        self.load_progress = {
+            "rows": len(records),
+            "total_income": aggregates.get_total("income"),
+            "total_expenses": aggregates.get_total("expense"),
+        }
+
+    def set_loaded(self, records, aggregates, timeseries, stat=None):
+        """
+        Replace the records and running totals with loaded ones.
+        stat: os.stat of the data file the records were read from
+        """
+        self.records, self.aggregates, self.timeseries = records, aggregates, timeseries
+        if stat is not None:
+            self.known_state = file_state_of(stat)
+        self.version += 1
+        self.notify("reset")
+
+    def add_listener(self, listener):
+        """
+        Registers an object told about every change of the records, with the same methods as the running totals:
+        add(record_type, category, amount, date) after a record is added, add_frame(df) after many records
+        are added at once and reset() after all records are replaced (for example by a reload).
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def notify(self, method, *args):
+        for listener in self.listeners:
+            getattr(listener, method)(*args)
+
+    def sync(self):
+        """
+        Bring the records up to date with the CSV data file, which other processes (another window of the app,
+        a script importing records, ...) may have changed. Records they appended are read and added,
+        a file rewritten as a whole is loaded again. Returns True if the records changed.
+        """
+        if not self.shared or self.known_state is None or not self.is_loaded():
+            return False
+        with self.storage.lock:
+            state = file_state(self.csv_file_path)
+            if state is None or state == self.known_state:
+                return False
+            inode, size, _ = self.known_state
+            rewritten = state[0] != inode or state[1] <= size
+            # Only the raw bytes are read under the lock, they are parsed after other writers may go on.
+            new_bytes = None if rewritten else self.storage.read_bytes(size, state[1])
+        if rewritten:
+            self.load_chunks()
+            return True
+        new_rows = self.storage.parse_lines(new_bytes)
+        new_rows = self.ingest(new_rows, self.convert(new_rows), self.records, self.aggregates, self.timeseries)
+        self.known_state = state
+        self.version += 1
+        self.notify("add_frame", new_rows)
+        return True
+
+    def write_rows(self, rows):
+        """
+        Append rows to the data file under its lock, after adding the records other processes appended
+        since the last write, so the records in memory stay in the order of the file.
+        Most of them are read before taking the lock, so it is only held for the last few.
+        """
+        self.sync()
+        with self.storage.lock:
+            self.sync()
+            self.storage.append(rows)
+            if self.shared:
+                self.known_state = file_state(self.csv_file_path)
+        snapshot_size = self.snapshot_state[1] if self.snapshot_state else 0
+        if self.snapshots and self.known_state and self.known_state[1] - snapshot_size >= SNAPSHOT_REFRESH_BYTES:
+            self.refresh_snapshot()
+
+    def is_loaded(self):
+        """
+        Returns True once the records are loaded (always True without background loading).
+        """
+        return self.loader is None or not self.loader.is_alive()
+
+    def wait_until_loaded(self):
+        """
+        Blocks until a background load is finished. Raises the error of the load if it failed.
+        Everything that changes the records waits here, so no record is written while the file is being read.
+        """
+        if self.loader is not None:
+            self.loader.join()
+        if self.load_error is not None:
+            raise ValueError(f"Loading '{self.csv_file_path}' failed: {self.load_error}")
 
     def create_default_df(self):
         """
         Create a new empty default DataFrame with columns only:
         """
-        df = pd.DataFrame(columns=["Type", "Category", "Amount", "Date", "Description"])
+        df = apply_schema(pd.DataFrame(columns=COLUMNS))
 
         return df
 
     def save_df_to_csv(self, df):
         """
-        Save the DataFrame to a CSV file.
+        Save the DataFrame to the data file.
         """
-        df.to_csv(self.csv_file_path, index=False)
+        with self.storage.lock:
+            self.storage.save(df)
+            if self.shared:
+                self.known_state = file_state(self.csv_file_path)
 
-    def add_record(self, record_type, category, amount, date, description=""):
+    def add_record(self, record_type, category, amount, date, description="", currency=DEFAULT_CURRENCY):
         """
         Adding new row to the DataFrame function.
         Parameters:
@@ -52,41 +341,291 @@ class DataManager:
         amount: expense amount (float type)
         date: for example: '2025-01-01'
         description: additional information (optional)
+        currency: currency of the amount, for example: 'EUR' (PLN by default)
         """
-        if category not in self.limits_manager.get_all_categories():
+        if not self.limits_manager.has_category(category):
             raise ValueError(f"Category '{category}' does not exist! You have to add it first!")
+        self.wait_until_loaded()
+        currency = normalize_currency(currency)
+        converted = self.convert_one(amount, currency, date)
         new_row = {
             "Type": record_type,
             "Category": category,
             "Amount": amount,
             "Date": date,
-            "Description": description
+            "Description": description,
+            "Currency": currency
         }
-        self.df = pd.concat([self.df, pd.DataFrame([new_row])], ignore_index=True)
-        self.save_to_csv()
+        self.write_rows([new_row])
+        self.records.append(record_type, category, amount, date, description, currency, converted)
+        self.aggregates.add(record_type, category, converted, date)
+        self.timeseries.add(record_type, category, converted, date)
+        self.version += 1
+        self.notify("add", record_type, category, converted, date)
+        if self.storage.needs_compaction():
+            self.save_to_csv()
+
+    def add_records(self, rows):
+        """
+        Adding many rows at once, with a single write to the data file.
+        rows: list of dicts with the keys 'Type', 'Category', 'Amount', 'Date' and optional 'Description'
+              and 'Currency', or a DataFrame with these columns (much faster for large batches)
+        """
+        if isinstance(rows, pd.DataFrame):
+            self.add_frame(rows)
+            return
+        self.wait_until_loaded()
+        new_rows = []
+        converted = []
+        for row in rows:
+            if not self.limits_manager.has_category(row["Category"]):
+                raise ValueError(f"Category '{row['Category']}' does not exist! You have to add it first!")
+            new_row = {column: row.get(column, "") for column in COLUMNS}
+            new_row["Currency"] = normalize_currency(new_row["Currency"])
+            converted.append(self.convert_one(new_row["Amount"], new_row["Currency"], new_row["Date"]))
+            new_rows.append(new_row)
+        if not new_rows:
+            return
+        self.write_rows(new_rows)
+        for row, amount in zip(new_rows, converted):
+            self.records.append(row["Type"], row["Category"], row["Amount"], row["Date"], row["Description"],
+                                row["Currency"], amount)
+            self.aggregates.add(row["Type"], row["Category"], amount, row["Date"])
+            self.timeseries.add(row["Type"], row["Category"], amount, row["Date"])
+        self.version += 1
+        for row, amount in zip(new_rows, converted):
+            self.notify("add", row["Type"], row["Category"], amount, row["Date"])
+        if self.storage.needs_compaction():
+            self.save_to_csv()
+
+    def add_frame(self, df):
+        """
+        Adding all rows of a DataFrame at once, using vectorized operations only.
+        """
+        df = apply_schema(df)
+        if df.empty:
+            return
+        unknown = ~df["Category"].isin(self.limits_manager.get_all_categories())
+        if unknown.any() and self.limits_manager.refresh():
+            unknown = ~df["Category"].isin(self.limits_manager.get_all_categories())
+        if unknown.any():
+            category = df.loc[unknown, "Category"].iloc[0]
+            raise ValueError(f"Category '{category}' does not exist! You have to add it first!")
+        self.wait_until_loaded()
+        converted = self.convert(df, strict=True)
+        self.write_rows(df)
+        df = self.ingest(df, converted, self.records, self.aggregates, self.timeseries)
+        self.version += 1
+        self.notify("add_frame", df)
+        if self.storage.needs_compaction():
+            self.save_to_csv()
 
     def save_to_csv(self):
         """
-        Save the DataFrame to a CSV file.
+        Save the DataFrame to the data file, with the records other processes appended meanwhile.
         """
-        self.df.to_csv(self.csv_file_path, index=False)
+        self.wait_until_loaded()
+        with self.storage.lock:
+            self.sync()
+            self.save_df_to_csv(self.df)
 
     def get_total_expenses(self):
         """
         Return the sum of all expenses.
         """
-        expenses = self.df[self.df["Type"] == "expense"]
-        return expenses["Amount"].sum()
+        return self.aggregates.get_total("expense")
 
     def get_total_incomes(self):
         """
         Return the sum of all incomes.
         """
-        incomes = self.df[self.df["Type"] == "income"]
-        return incomes["Amount"].sum()
+        return self.aggregates.get_total("income")
 
     def get_balance(self):
         """
         Return the difference between total income and total expenses.
         """
-        return self.get_total_incomes() - self.get_total_expenses()
+        return self.aggregates.get_balance()
+
+    def get_category_expenses(self, category, month=None):
+        """
+        Return the sum of expenses for a category.
+        month: optional month in 'YYYY-MM' form, for example: '2025-01'
+        """
+        return self.aggregates.get_category_expenses(category, month)
+
+    def get_range_total(self, record_type, start_date=None, end_date=None, category=None):
+        """
+        Return the sum of the records of a type between two dates (both inclusive, None means open ended).
+        Uses binary search over the date index, so the cost does not depend on the number of records.
+        """
+        return self.timeseries.sum(record_type, category, start_date, end_date)
+
+    def get_rollup(self, period="M", record_type="expense", category=None):
+        """
+        Return a dict with the sum of the records of a type for each day ('D'), week ('W', labelled
+        by its Monday) or month ('M'), optionally for one category only.
+        """
+        return self.timeseries.rollup(period, record_type, category)
+
+    def get_expenses_by_category(self):
+        """
+        Return a dict with the sum of expenses for each category that has any expenses, sorted by category.
+        """
+        return self.aggregates.get_expenses_by_category()
+
+    def get_balance_evolution(self):
+        """
+        Return a NumPy array with the balance after each consecutive record.
+        The running sum is exact, it is computed in grosze.
+        """
+        return np.cumsum(self.records.signed_amounts()) / 100
+
+    def get_monthly_balance(self):
+        """
+        Return a dict with the difference between incomes and expenses for each month ('YYYY-MM'), sorted by month.
+        """
+        days = self.records.days
+        dated = days != MISSING_DAY
+        if not dated.any():
+            return {}
+        months = days[dated].astype("datetime64[D]").astype("datetime64[M]")
+        labels, inverse = np.unique(months, return_inverse=True)
+        totals = np.bincount(inverse, weights=self.records.signed_amounts()[dated]) / 100
+        return dict(zip(np.datetime_as_string(labels, unit="M").tolist(), totals.tolist()))
+
+    def filter_mask(self, start_date=None, end_date=None, record_type=None, category=None):
+        """
+        Return a boolean NumPy array selecting the records matching all given filters.
+        start_date, end_date: inclusive date range, for example: '2025-01-01'
+        """
+        records = self.records
+        mask = np.ones(len(records), dtype=bool)
+        if start_date is not None or end_date is not None:
+            days = records.days
+            mask &= days != MISSING_DAY
+            if start_date is not None:
+                mask &= days >= to_days([start_date])[0]
+            if end_date is not None:
+                mask &= days <= to_days([end_date])[0]
+        if record_type is not None:
+            mask &= records.is_income() == (record_type == "income")
+        if category is not None:
+            mask &= records.categories == records.category_code(category)
+        return mask
+
+    def get_records(self, start_date=None, end_date=None, record_type=None, category=None):
+        """
+        Return a DataFrame with the records matching all given filters.
+        start_date, end_date: inclusive date range, for example: '2025-01-01'
+        """
+        positions = np.flatnonzero(self.filter_mask(start_date, end_date, record_type, category))
+        return self.records.to_frame(positions)
+
+    def get_record_positions(self, sort_by=None, ascending=True, **filters):
+        """
+        Return a NumPy array with the row positions of the records matching the filters, in display order.
+        The result is cached until the data, the filters or the sort order change,
+        so paging through the same view only slices the array.
+        """
+        key = (self.version, sort_by, ascending, tuple(sorted(filters.items())))
+        if self._records_view is not None and self._records_view[0] == key:
+            return self._records_view[1]
+
+        positions = np.flatnonzero(self.filter_mask(**filters))
+        if sort_by is not None:
+            if sort_by not in COLUMNS:
+                raise ValueError(f"Cannot sort by '{sort_by}'!")
+            values = self.sort_keys(sort_by)[positions]
+            order = np.argsort(values if ascending else -values, kind="stable")
+            positions = positions[order]
+
+        self._records_view = (key, positions)
+        return positions
+
+    def sort_keys(self, column):
+        """
+        Return an int64 array whose order is the order of the records by a column.
+        Category names and descriptions are replaced by their rank in alphabetical order. Amounts are sorted
+        as the records table shows them, in their own currencies.
+        """
+        records = self.records
+        if column == "Type":
+            return records.flags.astype("int64")
+        if column == "Amount":
+            return records.view("original_amounts").astype("int64")
+        if column == "Date":
+            return records.days.astype("int64")
+        if column == "Category":
+            names, codes = self.limits_manager.category_names, records.categories
+        elif column == "Currency":
+            names, codes = records.currency_names, records.view("currencies")
+        else:
+            names, codes = records.pool.strings[:records.pool.size], records.descriptions
+        ranks = np.empty(len(names), dtype="int64")
+        ranks[np.argsort(np.array(names, dtype=object).astype(str), kind="stable")] = np.arange(len(names))
+        return ranks[codes]
+
+    def count_records(self, **filters):
+        """
+        Return the number of records matching the filters (see get_records).
+        """
+        return len(self.get_record_positions(**filters))
+
+    def get_records_page(self, offset, limit, sort_by=None, ascending=True, **filters):
+        """
+        Return a DataFrame with at most limit records starting at offset,
+        from the records matching the filters sorted by the sort_by column.
+        """
+        positions = self.get_record_positions(sort_by, ascending, **filters)
+        return self.records.to_frame(positions[offset:offset + limit])
+
+    def memory_usage(self):
+        """
+        Returns an estimate of the memory held by the records in bytes.
+        Descriptions are estimated from a sample, so the estimate is cheap even for large ledgers.
+        """
+        return self.records.nbytes()
+
+    def close(self):
+        """
+        Records are written to the data file as soon as they are added, so closing only takes the snapshot
+        again (if records were added since it was taken) and releases the storage.
+        """
+        self.refresh_snapshot()
+        self.storage.close()
+
+    def check_aggregates(self):
+        """
+        Compare the running totals with a full recompute from the DataFrame.
+        Rebuilds them and returns False if they have drifted.
+        """
+        self.wait_until_loaded()
+        df = self.records.to_frame(converted=True)
+        if self.aggregates.verify(df):
+            return True
+        print("Running totals do not match the data. Recomputing...")
+        self.aggregates.rebuild(df)
+        return False
+
+
+def file_state_of(stat):
+    """
+    Returns the (inode, size, modification time) of an os.stat result, like locking.file_state.
+    """
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def create_data_manager(limits_manager, data_file_path="budget_data.csv", background=False,
+                        currency=DEFAULT_CURRENCY, fx_rates=None, snapshots=True):
+    """
+    Returns the data manager for a data file.
+    SQLite databases (.sqlite, .db) get a SqliteDataManager that keeps the records on disk,
+    other formats are loaded into a DataManager, in a background thread if background is True.
+    currency, fx_rates, snapshots: see DataManager
+    """
+    if Path(data_file_path).suffix.lower() in (".sqlite", ".db"):
+        from budget_manager.sqlite_manager import SqliteDataManager
+        return SqliteDataManager(limits_manager, data_file_path, currency=currency, fx_rates=fx_rates)
+    return DataManager(limits_manager, data_file_path, background=background, snapshots=snapshots,
+                       currency=currency, fx_rates=fx_rates)
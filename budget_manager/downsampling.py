@@ -0,0 +1,29 @@
+import numpy as np
+
+def min_max_downsample(values, max_points):
+    """
+    Reduce a series to at most max_points points for plotting.
+    The series is split into max_points // 2 equal buckets and the minimum and maximum of each
+    bucket are kept, so peaks and dips stay visible. The first and last point are always kept.
+    Returns a tuple (indices, values) with the kept positions in increasing order.
+    """
+    values = np.asarray(values, dtype="float64")
+    count = len(values)
+    if count <= max_points or max_points < 4:
+        return np.arange(count), values
+
+    buckets = (max_points - 2) // 2
+    bucket_size = -(-count // buckets)
+    padded = np.full(buckets * bucket_size, np.nan)
+    padded[:count] = values
+    padded = padded.reshape(buckets, bucket_size)
+
+    offsets = np.arange(buckets) * bucket_size
+    valid = offsets < count
+    grid = padded[valid]
+    offsets = offsets[valid]
+    min_indices = offsets + np.nanargmin(grid, axis=1)
+    max_indices = offsets + np.nanargmax(grid, axis=1)
+
+    indices = np.unique(np.concatenate(([0, count - 1], min_indices, max_indices)))
+    return indices, values[indices]
@@ -0,0 +1,358 @@
+"""
+Forecasts of the ledger: recurring records (salary, rent, subscriptions) found in its history,
+and the balance and spending of each category projected some months ahead.
+
+    forecaster = Forecaster(data_manager, limits_manager)
+    forecaster.recurring()                  # [{'description': 'salary from work', 'period': 'M', ...}, ...]
+    forecaster.project(months=6)            # balance, incomes and expenses for each month
+    forecaster.month_end_projection()       # spending of each category at the end of this month
+
+Records with the same type, category and description (ignoring case and digits) that come back
+every month or every week with a similar amount are recurring, and they are projected on their day.
+The other records of a category are projected at their average monthly amount over the last months.
+Everything is computed with NumPy over whole arrays of the records, and the results are cached
+until the records (or the limits) change.
+"""
+import re
+import numpy as np
+import pandas as pd
+from budget_manager.record_store import INCOME, MISSING_DAY
+from budget_manager.timeseries import to_day
+
+TYPES = ("expense", "income")
+MIN_OCCURRENCES = 3
+# Mean and largest standard deviation of the days between the records of a recurring group,
+# and how long after its last record a group is still expected to come back.
+PERIODS = {
+    "M": {"interval": (26.0, 34.0), "spread": 4.0, "active_days": 45},
+    "W": {"interval": (6.5, 7.5), "spread": 1.0, "active_days": 11},
+}
+MAX_AMOUNT_VARIATION = 0.25
+HISTORY_MONTHS = 6
+DIGITS = re.compile(r"[\d\W_]+")
+
+
+def normalize_description(description):
+    """
+    Returns a description in lower case without digits and punctuation, so that for example
+    'Rent 01/2025' and 'rent 02/2025' are the same recurring record.
+    """
+    return DIGITS.sub(" ", str(description).lower()).strip()
+
+
+def month_bounds(months):
+    """
+    Returns the first days and the numbers of days of months given as int months since 1970-01.
+    """
+    months = np.asarray(months, dtype="int64")
+    starts = months.astype("datetime64[M]").astype("datetime64[D]").astype("int64")
+    ends = (months + 1).astype("datetime64[M]").astype("datetime64[D]").astype("int64")
+    return starts, ends - starts
+
+
+def ledger_arrays(data_manager):
+    """
+    Returns a dict of NumPy arrays with the dated records of a data manager: 'types' (0 expense, 1 income),
+    'categories' (codes into 'category_names'), 'amounts' in the reporting currency, 'days' and
+    'descriptions' (codes into 'description_names'). A DataManager is read straight from its record store.
+    """
+    data_manager.wait_until_loaded()
+    if hasattr(data_manager, "records"):
+        records = data_manager.records
+        dated = records.days != MISSING_DAY
+        return {
+            "types": (records.flags[dated] & INCOME).astype("int64"),
+            "categories": records.categories[dated].astype("int64"),
+            "category_names": np.array(data_manager.limits_manager.category_names, dtype=object),
+            "amounts": records.amounts[dated] / 100,
+            "days": records.days[dated].astype("int64"),
+            "descriptions": records.descriptions[dated].astype("int64"),
+            "description_names": records.pool.strings[:records.pool.size],
+        }
+    df = data_manager.get_records()
+    df = df[df["Date"].notna()]
+    converted = data_manager.convert(df)
+    categories, category_names = pd.factorize(df["Category"].astype(object))
+    descriptions, description_names = pd.factorize(df["Description"].astype(object))
+    return {
+        "types": (df["Type"].astype(object).to_numpy() == "income").astype("int64"),
+        "categories": categories.astype("int64"),
+        "category_names": np.asarray(category_names, dtype=object),
+        "amounts": df["Amount"].to_numpy(dtype="float64") if converted is None else converted,
+        "days": df["Date"].to_numpy(dtype="datetime64[D]").astype("int64"),
+        "descriptions": descriptions.astype("int64"),
+        "description_names": np.asarray(description_names, dtype=object),
+    }
+
+
+class Forecaster:
+    """
+    Recurring records and projections of a data manager (DataManager or SqliteDataManager),
+    cached per data version.
+    """
+    def __init__(self, data_manager, limits_manager, history_months=HISTORY_MONTHS):
+        """
+        history_months: number of full months before the current one whose average gives
+                        the projected amount of the records that are not recurring
+        """
+        self.data_manager = data_manager
+        self.limits_manager = limits_manager
+        self.history_months = history_months
+        self.cache = {}
+        self.data_version = None
+
+    def cached(self, key, compute):
+        """
+        Returns the cached result for a key, computing it with compute() if the data changed since.
+        """
+        if self.data_version != self.data_manager.version:
+            self.cache = {}
+            self.data_version = self.data_manager.version
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+
+    def arrays(self, as_of=None):
+        """
+        Returns the arrays of the records (see ledger_arrays), only up to the day as_of if it is given,
+        so a forecast from a past day does not see the records after it.
+        """
+        arrays = self.cached("arrays", lambda: ledger_arrays(self.data_manager))
+        if as_of is None or not len(arrays["days"]) or as_of >= arrays["days"].max():
+            return arrays
+        return self.cached(("arrays", as_of), lambda: self.cut_arrays(arrays, as_of))
+
+    def cut_arrays(self, arrays, as_of):
+        kept = arrays["days"] <= as_of
+        return dict(arrays, **{name: arrays[name][kept]
+                               for name in ("types", "categories", "amounts", "days", "descriptions")})
+
+    def as_of_day(self, as_of=None):
+        """
+        Returns the day the forecasts start from: the given date, or today.
+        Records dated after it are left out, as if they were not entered yet.
+        """
+        if as_of is None:
+            return to_day(np.datetime64("today", "D"))
+        day = to_day(as_of)
+        if day is None:
+            raise ValueError(f"Invalid date '{as_of}'!")
+        return day
+
+    def find_recurring(self, as_of):
+        """
+        Returns a dict of arrays describing the recurring groups up to a day (see recurring), and a boolean array
+        marking the records that belong to one.
+        """
+        arrays = self.arrays(as_of)
+        names = arrays["description_names"]
+        normalized, normalized_names = pd.factorize(pd.Series(names, dtype=object).map(normalize_description))
+        descriptions = normalized[arrays["descriptions"]] if len(names) else arrays["descriptions"]
+        keys = (arrays["types"] * (len(arrays["category_names"]) + 1) + arrays["categories"]) \
+            * (len(normalized_names) + 1) + descriptions
+        # Records sorted by group and day, every group is a contiguous run.
+        order = np.lexsort((arrays["days"], keys))
+        keys, days, amounts = keys[order], arrays["days"][order], arrays["amounts"][order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype="int64")
+        counts = np.diff(np.r_[starts, len(keys)])
+        groups = np.repeat(np.arange(len(starts)), counts)
+
+        intervals = np.diff(days).astype("float64")
+        same_group = groups[1:] == groups[:-1]
+        interval_groups = groups[1:][same_group]
+        intervals = intervals[same_group]
+        gaps = np.maximum(counts - 1, 1)
+        mean_interval = np.bincount(interval_groups, intervals, len(starts)) / gaps
+        spread = np.sqrt(np.maximum(
+            np.bincount(interval_groups, intervals ** 2, len(starts)) / gaps - mean_interval ** 2, 0))
+        mean_amount = np.bincount(groups, amounts, len(starts)) / counts
+        amount_spread = np.sqrt(np.maximum(np.bincount(groups, amounts ** 2, len(starts)) / counts
+                                           - mean_amount ** 2, 0))
+        ends = starts + counts - 1
+        last_days = days[ends]
+
+        periods = np.full(len(starts), "", dtype=object)
+        for period, rule in PERIODS.items():
+            low, high = rule["interval"]
+            matches = ((counts >= MIN_OCCURRENCES) & (mean_interval >= low) & (mean_interval <= high)
+                       & (spread <= rule["spread"]) & (amount_spread <= MAX_AMOUNT_VARIATION * mean_amount)
+                       & (as_of - last_days <= rule["active_days"]))
+            periods[matches & (periods == "")] = period
+        recurring = periods != ""
+
+        in_recurring = np.zeros(len(order), dtype=bool)
+        in_recurring[order] = recurring[groups]
+        last = order[ends[recurring]]
+        return {
+            "periods": periods[recurring],
+            "types": arrays["types"][last],
+            "categories": arrays["categories"][last],
+            "descriptions": arrays["descriptions"][last],
+            "amounts": amounts[ends[recurring]],
+            "last_days": last_days[recurring],
+            "counts": counts[recurring],
+        }, in_recurring
+
+    def recurring_groups(self, as_of):
+        return self.cached(("recurring", as_of), lambda: self.find_recurring(as_of))
+
+    def recurring(self, as_of=None):
+        """
+        Returns a list with a dict for every recurring record up to as_of (today by default):
+        its type, category, description, period ('M' monthly or 'W' weekly), last amount, number of records,
+        last date and next expected date.
+        """
+        as_of = self.as_of_day(as_of)
+        return self.cached(("recurring_items", as_of), lambda: self.list_recurring(as_of))
+
+    def list_recurring(self, as_of):
+        groups, _ = self.recurring_groups(as_of)
+        arrays = self.arrays(as_of)
+        items = []
+        for position in range(len(groups["periods"])):
+            period = groups["periods"][position]
+            last_day = int(groups["last_days"][position])
+            days, valid = self.next_days(period, groups["last_days"][position:position + 1], as_of, 2)
+            items.append({
+                "type": TYPES[groups["types"][position]],
+                "category": arrays["category_names"][groups["categories"][position]],
+                "description": arrays["description_names"][groups["descriptions"][position]],
+                "period": period,
+                "amount": float(groups["amounts"][position]),
+                "count": int(groups["counts"][position]),
+                "last": str(np.datetime64(last_day, "D")),
+                "next": str(np.datetime64(int(days[valid][0]), "D")),
+            })
+        return items
+
+    def next_days(self, period, last_days, after, months):
+        """
+        Returns an int64 array (groups x occurrences) with the days of the next occurrences of recurring
+        groups after a day, over a number of months, and a boolean array marking the real ones.
+        Monthly groups come back on the day of the month of their last record (or the last day of shorter months).
+        """
+        if period == "M":
+            day_of_month = last_days - month_bounds(last_days.astype("datetime64[D]").astype("datetime64[M]")
+                                                    .astype("int64"))[0]
+            first_month = np.datetime64(after, "D").astype("datetime64[M]").astype("int64")
+            month_starts, month_lengths = month_bounds(first_month + np.arange(months + 1))
+            days = month_starts[None, :] + np.minimum(day_of_month[:, None], month_lengths[None, :] - 1)
+        else:
+            steps = np.arange(1, months * 31 // 7 + 7)
+            days = last_days[:, None] + 7 * steps[None, :]
+        return days, (days > after) & (days > last_days[:, None])
+
+    def future_amounts(self, as_of, months):
+        """
+        Returns a float array (types x categories x months) with the amounts projected from the day after as_of
+        to the end of each of the months starting with the month of as_of.
+        """
+        arrays = self.arrays(as_of)
+        groups, in_recurring = self.recurring_groups(as_of)
+        category_count = len(arrays["category_names"])
+        first_month = int(np.datetime64(as_of, "D").astype("datetime64[M]").astype("int64"))
+        month_starts, month_lengths = month_bounds(first_month + np.arange(months))
+        end = month_starts[-1] + month_lengths[-1]
+        future = np.zeros((len(TYPES), category_count, months))
+
+        # Recurring records on their days.
+        for period in PERIODS:
+            selected = groups["periods"] == period
+            if not selected.any():
+                continue
+            days, valid = self.next_days(period, groups["last_days"][selected], as_of, months)
+            valid &= days < end
+            month_index = np.searchsorted(month_starts, days, side="right") - 1
+            rows = np.broadcast_to(np.flatnonzero(selected)[:, None], days.shape)[valid]
+            cells = (groups["types"][rows] * category_count + groups["categories"][rows]) * months \
+                + month_index[valid]
+            future += np.bincount(cells, groups["amounts"][rows], future.size).reshape(future.shape)
+
+        # Other records at their average per month over the full months before the current one,
+        # spread evenly over the days of a month.
+        history_start = month_bounds([first_month - self.history_months])[0][0]
+        history_end = month_starts[0]
+        in_history = ~in_recurring & (arrays["days"] >= history_start) & (arrays["days"] < history_end)
+        if in_history.any():
+            covered_from = max(history_start, int(arrays["days"].min()))
+            history_months = max(1.0, (history_end - covered_from) / 30.44)
+            cells = arrays["types"][in_history] * category_count + arrays["categories"][in_history]
+            monthly = np.bincount(cells, arrays["amounts"][in_history], len(TYPES) * category_count) / history_months
+            remaining = np.minimum(np.maximum(month_starts + month_lengths - 1 - as_of, 0), month_lengths)
+            future += monthly.reshape(len(TYPES), category_count)[:, :, None] * (remaining / month_lengths)
+        return future
+
+    def actual_amounts(self, as_of):
+        """
+        Returns a float array (types x categories) with the amounts recorded in the month of as_of up to that day.
+        """
+        arrays = self.arrays(as_of)
+        category_count = len(arrays["category_names"])
+        month_start = month_bounds([np.datetime64(as_of, "D").astype("datetime64[M]").astype("int64")])[0][0]
+        in_month = (arrays["days"] >= month_start) & (arrays["days"] <= as_of)
+        cells = arrays["types"][in_month] * category_count + arrays["categories"][in_month]
+        totals = np.bincount(cells, arrays["amounts"][in_month], len(TYPES) * category_count)
+        return totals.reshape(len(TYPES), category_count)
+
+    def project(self, months=6, as_of=None):
+        """
+        Returns a dict with the projection of the months starting with the month of as_of
+        (today by default):
+        'months': labels ('YYYY-MM'), 'incomes' and 'expenses': totals of each month (recorded and projected),
+        'balance': projected balance at the end of each month, 'expenses_by_category': {category: totals}
+        """
+        if months < 1:
+            raise ValueError("The number of months must be at least 1!")
+        as_of = self.as_of_day(as_of)
+        return self.cached(("project", months, as_of), lambda: self.compute_projection(months, as_of))
+
+    def compute_projection(self, months, as_of):
+        arrays = self.arrays(as_of)
+        future = self.future_amounts(as_of, months)
+        totals = future.copy()
+        totals[:, :, 0] += self.actual_amounts(as_of)
+        expenses, incomes = totals.sum(axis=1)
+        net = future[1].sum(axis=0) - future[0].sum(axis=0)
+        first_month = np.datetime64(as_of, "D").astype("datetime64[M]")
+        spent = totals[0].any(axis=1)
+        return {
+            "as_of": str(np.datetime64(as_of, "D")),
+            "months": [str(first_month + offset) for offset in range(months)],
+            "incomes": incomes,
+            "expenses": expenses,
+            "balance": self.balance_on(as_of) + np.cumsum(net),
+            "expenses_by_category": dict(zip(arrays["category_names"][spent].tolist(), totals[0][spent])),
+        }
+
+    def balance_on(self, as_of):
+        """
+        Returns the balance at the end of a day: the balance of the data manager without the records after it.
+        """
+        arrays = self.arrays()
+        later = arrays["days"] > as_of
+        signed = np.where(arrays["types"][later] == 1, arrays["amounts"][later], -arrays["amounts"][later])
+        return self.data_manager.get_balance() - signed.sum()
+
+    def month_end_projection(self, as_of=None):
+        """
+        Returns a dict {category: {'spent', 'projected', 'limit'}} with the expenses recorded so far in the
+        month of as_of and projected for its end, for every category with a limit or with expenses.
+        """
+        as_of = self.as_of_day(as_of)
+        key = ("month_end", as_of, self.limits_manager.version)
+        return self.cached(key, lambda: self.compute_month_end(as_of))
+
+    def compute_month_end(self, as_of):
+        arrays = self.arrays(as_of)
+        spent = self.actual_amounts(as_of)[0]
+        projected = spent + self.future_amounts(as_of, 1)[0, :, 0]
+        codes = {name: code for code, name in enumerate(arrays["category_names"].tolist())}
+        result = {}
+        for category in self.limits_manager.get_all_categories():
+            limit = self.limits_manager.get_limit(category)
+            code = codes.get(category)
+            category_spent = float(spent[code]) if code is not None else 0.0
+            category_projected = float(projected[code]) if code is not None else 0.0
+            if limit or category_projected:
+                result[category] = {"spent": category_spent, "projected": category_projected, "limit": limit or 0.0}
+        return result
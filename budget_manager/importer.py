@@ -0,0 +1,180 @@
+import argparse
+import numpy as np
+import pandas as pd
+from budget_manager.storage import COLUMNS, apply_schema
+
+RECORD_TYPES = ("income", "expense")
+
+
+def record_hashes(df):
+    """
+    Returns a NumPy array with a content hash of each record.
+    Records with the same type, category, amount (to the grosz), date, description and currency get the same hash.
+    """
+    df = apply_schema(df)
+    key = pd.DataFrame({
+        "Type": df["Type"].astype(str),
+        "Category": df["Category"].astype(str),
+        "Amount": df["Amount"].round(2),
+        "Date": df["Date"].to_numpy(dtype="datetime64[D]").astype("int64"),
+        "Description": df["Description"].astype(str),
+        "Currency": df["Currency"].astype(str),
+    })
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+
+class BulkImporter:
+    """
+    Imports large external CSV files (for example bank statements) into a data manager.
+    The file is read in chunks, its columns are mapped to the ledger columns, rows are validated
+    and rows already in the ledger are skipped. All accepted rows are committed in one batched write.
+    """
+    def __init__(self, data_manager, limits_manager, column_map=None, chunksize=100000,
+                 signed_amounts=False, default_category=None, skip_invalid=False, default_currency=None,
+                 categorizer=None):
+        """
+        column_map: dict mapping ledger columns to columns of the imported file, for example: {'Amount': 'Kwota'}
+        signed_amounts: if the file has no Type column, negative amounts are expenses and positive ones incomes
+        default_category: category for rows without one
+        skip_invalid: skip rows that cannot be imported instead of raising ValueError
+        default_currency: currency for rows without one (PLN if not given)
+        categorizer: optional Categorizer guessing the category of rows without one from their descriptions,
+                     before default_category is used
+        """
+        self.data_manager = data_manager
+        self.limits_manager = limits_manager
+        self.column_map = {column: column for column in COLUMNS}
+        self.column_map.update(column_map or {})
+        self.chunksize = chunksize
+        self.signed_amounts = signed_amounts
+        self.default_category = default_category
+        self.skip_invalid = skip_invalid
+        self.default_currency = default_currency
+        self.categorizer = categorizer
+
+    def map_chunk(self, chunk, decimal="."):
+        """
+        Returns a DataFrame with the ledger columns built from a chunk of the imported file.
+        """
+        mapped = pd.DataFrame(index=chunk.index)
+        for column in COLUMNS:
+            source = self.column_map.get(column)
+            if source in chunk.columns:
+                mapped[column] = chunk[source]
+            else:
+                mapped[column] = None
+
+        amounts = mapped["Amount"]
+        if decimal != "." and amounts.dtype == object:
+            amounts = amounts.str.replace(decimal, ".", regex=False)
+        amounts = pd.to_numeric(amounts, errors="coerce")
+        if self.column_map["Type"] not in chunk.columns and self.signed_amounts:
+            mapped["Type"] = np.where(amounts < 0, "expense", "income")
+        mapped["Amount"] = amounts.abs() if self.signed_amounts else amounts
+        mapped["Type"] = mapped["Type"].astype(str).str.strip().str.lower()
+        if self.categorizer is not None:
+            mapped = self.categorizer.categorize(mapped)
+        if self.default_category is not None:
+            mapped["Category"] = mapped["Category"].fillna(self.default_category)
+        if self.default_currency is not None:
+            mapped["Currency"] = mapped["Currency"].fillna(self.default_currency)
+        return apply_schema(mapped)
+
+    def validate_chunk(self, chunk):
+        """
+        Returns a boolean Series marking the rows that can be imported.
+        Categories and currencies are checked with a single vectorized set lookup each.
+        """
+        fx_rates = self.data_manager.fx_rates
+        currencies = [currency for currency in chunk["Currency"].cat.categories if fx_rates.has_currency(currency)]
+        valid = chunk["Type"].isin(RECORD_TYPES)
+        valid &= chunk["Category"].isin(set(self.limits_manager.categories))
+        valid &= chunk["Amount"].notna() & (chunk["Amount"] > 0)
+        valid &= chunk["Date"].notna()
+        valid &= chunk["Currency"].isin(currencies)
+        return valid
+
+    def import_file(self, path, decimal=".", **read_csv_kwargs):
+        """
+        Imports all rows of a CSV file.
+        decimal: decimal separator of the amounts, for example: ','
+        Extra keyword arguments are passed to pd.read_csv, for example: sep=';'
+        Returns a dict with the number of read, imported, duplicate and invalid rows.
+        """
+        existing = self.data_manager.get_records()
+        seen = pd.Index(record_hashes(existing))
+        result = {"read": 0, "imported": 0, "duplicates": 0, "invalid": 0}
+        accepted = []
+
+        for chunk in pd.read_csv(path, chunksize=self.chunksize, dtype=str, **read_csv_kwargs):
+            result["read"] += len(chunk)
+            chunk = self.map_chunk(chunk, decimal)
+
+            valid = self.validate_chunk(chunk)
+            if not valid.all():
+                if not self.skip_invalid:
+                    row = chunk.index[~valid.to_numpy()][0]
+                    raise ValueError(f"Data row {row + 1} of '{path}' cannot be imported: {chunk.loc[row].to_dict()}")
+                result["invalid"] += int((~valid).sum())
+                chunk = chunk[valid]
+
+            duplicates = pd.Index(record_hashes(chunk)).isin(seen)
+            result["duplicates"] += int(duplicates.sum())
+            accepted.append(chunk[~duplicates])
+
+        if accepted:
+            new_rows = pd.concat(accepted, ignore_index=True)
+            if not new_rows.empty:
+                self.data_manager.add_records(new_rows)
+            result["imported"] = len(new_rows)
+        return result
+
+
+def parse_column_map(pairs):
+    """
+    Parses 'LedgerColumn=FileColumn' pairs into a column map.
+    """
+    column_map = {}
+    for pair in pairs or []:
+        column, _, source = pair.partition("=")
+        if column not in COLUMNS or not source:
+            raise ValueError(f"Invalid column mapping '{pair}', expected for example: Amount=Kwota")
+        column_map[column] = source
+    return column_map
+
+
+def run(args, data_manager, limits_manager):
+    categorizer = None
+    if args.auto_category or args.category_rules:
+        from budget_manager.categorizer import Categorizer
+        categorizer = Categorizer(data_manager, rules_file=args.category_rules)
+    importer = BulkImporter(data_manager, limits_manager, column_map=parse_column_map(args.map),
+                            chunksize=args.chunksize, signed_amounts=args.signed_amounts,
+                            default_category=args.default_category, skip_invalid=args.skip_invalid,
+                            default_currency=args.default_currency, categorizer=categorizer)
+    result = importer.import_file(args.file, sep=args.sep, decimal=args.decimal)
+    print(f"Read {result['read']} rows: imported {result['imported']}, "
+          f"skipped {result['duplicates']} duplicates and {result['invalid']} invalid rows")
+    return result
+
+
+def main(argv=None):
+    from budget_manager.data_manager import create_data_manager
+    from budget_manager.limits_manager import LimitsManager
+
+    from budget_manager.cli import add_import_arguments
+
+    parser = argparse.ArgumentParser(description="Import records from an external CSV file.")
+    add_import_arguments(parser)
+    parser.add_argument("--data", default="budget_data.csv", help="data file of the ledger")
+    parser.add_argument("--categories", default="categories.csv", help="categories file of the ledger")
+    parser.add_argument("--currency", default="PLN", help="reporting currency of the ledger")
+    args = parser.parse_args(argv)
+
+    limits_manager = LimitsManager(args.categories)
+    data_manager = create_data_manager(limits_manager, args.data, currency=args.currency)
+    run(args, data_manager, limits_manager)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Opt-in timing of the managers, for finding out where the time goes when the app is slow.
+
+Set the BUDGET_MANAGER_METRICS environment variable to a file name (or pass --metrics to the command line
+interface) and the public methods of the managers, the storage backends and the App button handlers
+are wrapped to record their call count, time and number of rows into the metrics registry.
+The registry is written to the file at exit, as Prometheus text if the name ends with .prom and as JSON otherwise.
+Nothing is wrapped when instrumentation is disabled, so it then costs nothing.
+"""
+from pathlib import Path
+import atexit
+import functools
+import importlib
+import inspect
+import json
+import os
+import threading
+import time
+
+ENV_VAR = "BUDGET_MANAGER_METRICS"
+
+CLASSES = {
+    "budget_manager.data_manager": ["DataManager"],
+    "budget_manager.sqlite_manager": ["SqliteDataManager"],
+    "budget_manager.limits_manager": ["LimitsManager"],
+    "budget_manager.alerts": ["LimitAlerts"],
+    "budget_manager.categorizer": ["Categorizer"],
+    "budget_manager.forecast": ["Forecaster"],
+    "budget_manager.stats_manager": ["StatsManager"],
+    "budget_manager.aggregates": ["AggregateStore"],
+    "budget_manager.timeseries": ["TimeSeriesIndex"],
+    "budget_manager.storage": ["CsvStorage", "ColumnarStorage", "SqliteStorage"],
+}
+UI_CLASSES = {
+    "budget_manager.ui_main": ["App"],
+}
+# Module level functions: the module that defines them first, then the modules that import them by name.
+FUNCTIONS = {
+    "draw_chart": ["budget_manager.stats_manager"],
+    "draw_chart_image": ["budget_manager.stats_manager", "budget_manager.chart_renderer"],
+}
+
+
+def count_rows(args, result):
+    """
+    Returns the number of rows of the first DataFrame, array or list among the result and the arguments.
+    """
+    for value in (result,) + args:
+        shape = getattr(value, "shape", None)
+        if shape:
+            return shape[0]
+        if isinstance(value, list):
+            return len(value)
+    return 0
+
+
+class MetricsRegistry:
+    """
+    In-process registry of call counts, times and row counts, safe to use from the chart worker threads.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds, rows=0):
+        """
+        Adds one call of name that took the given time and handled the given number of rows.
+        """
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0}
+            metric["calls"] += 1
+            metric["seconds"] += seconds
+            metric["max_seconds"] = max(metric["max_seconds"], seconds)
+            metric["rows"] += rows
+
+    def reset(self):
+        """
+        Removes all recorded metrics.
+        """
+        with self.lock:
+            self.metrics = {}
+
+    def snapshot(self):
+        """
+        Returns a copy of the metrics, sorted by total time (slowest first).
+        """
+        with self.lock:
+            items = [(name, dict(metric)) for name, metric in self.metrics.items()]
+        return dict(sorted(items, key=lambda item: item[1]["seconds"], reverse=True))
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        series = [
+            ("calls_total", "calls", "counter", "Number of calls."),
+            ("seconds_total", "seconds", "counter", "Total time spent in the calls."),
+            ("seconds_max", "max_seconds", "gauge", "Longest single call."),
+            ("rows_total", "rows", "counter", "Number of rows handled by the calls."),
+        ]
+        metrics = self.snapshot()
+        lines = []
+        for suffix, key, kind, help_text in series:
+            lines.append(f"# HELP budget_manager_{suffix} {help_text}")
+            lines.append(f"# TYPE budget_manager_{suffix} {kind}")
+            for name, metric in metrics.items():
+                lines.append(f'budget_manager_{suffix}{{function="{name}"}} {metric[key]}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """
+        Writes the metrics to a file, as Prometheus text for .prom files and as JSON otherwise.
+        """
+        path = Path(path)
+        text = self.to_prometheus() if path.suffix == ".prom" else self.to_json()
+        path.write_text(text, encoding="utf-8")
+
+
+REGISTRY = MetricsRegistry()
+_originals = []
+
+
+class section:
+    """
+    Context manager that records the time of a block of code under a name, if instrumentation is enabled.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if REGISTRY.enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.start is not None:
+            REGISTRY.record(self.name, time.perf_counter() - self.start)
+
+
+def timed(name, function):
+    """
+    Returns a wrapper of function that records its calls in the registry under name.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException:
+            REGISTRY.record(name, time.perf_counter() - start)
+            raise
+        REGISTRY.record(name, time.perf_counter() - start, count_rows(args[1:] if args else args, result))
+        return result
+    wrapper.__wrapped_by_metrics__ = True
+    return wrapper
+
+
+def instrument_class(cls):
+    """
+    Wraps the public methods defined in a class (inherited ones are wrapped in their own class).
+    """
+    for name, value in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(value) or hasattr(value, "__wrapped_by_metrics__"):
+            continue
+        _originals.append((cls, name, value))
+        setattr(cls, name, timed(f"{cls.__name__}.{name}", value))
+
+
+def enable(include_ui=False):
+    """
+    Turns instrumentation on. The instrumented modules are imported and their classes wrapped.
+    include_ui: also wrap the App button handlers (imports Tkinter)
+    """
+    if REGISTRY.enabled:
+        return
+    REGISTRY.enabled = True
+    modules = dict(CLASSES, **UI_CLASSES) if include_ui else CLASSES
+    for module_name, class_names in modules.items():
+        module = importlib.import_module(module_name)
+        for class_name in class_names:
+            instrument_class(getattr(module, class_name))
+
+    for function_name, module_names in FUNCTIONS.items():
+        modules = [importlib.import_module(module_name) for module_name in module_names]
+        original = getattr(modules[0], function_name)
+        wrapper = timed(function_name, original)
+        for module in modules:
+            if getattr(module, function_name) is original:
+                _originals.append((module, function_name, original))
+                setattr(module, function_name, wrapper)
+
+
+def disable():
+    """
+    Turns instrumentation off and restores the original methods. Recorded metrics are kept.
+    """
+    while _originals:
+        owner, name, original = _originals.pop()
+        setattr(owner, name, original)
+    REGISTRY.enabled = False
+
+
+def enable_from_env(path=None, include_ui=False):
+    """
+    Enables instrumentation if a metrics file is given or set in the BUDGET_MANAGER_METRICS environment variable,
+    and writes the metrics to that file at exit. Returns the metrics file or None.
+    """
+    path = path or os.environ.get(ENV_VAR)
+    if not path:
+        return None
+    enable(include_ui)
+    atexit.register(REGISTRY.dump, path)
+    return path
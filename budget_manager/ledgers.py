@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import contextlib
+import io
+from budget_manager.currency import DEFAULT_CURRENCY
+from budget_manager.storage import STORAGE_BACKENDS
+
+CATEGORIES_FILE = "categories.csv"
+DATA_FILE_NAMES = ("budget_data",)
+
+
+def open_ledger(data_path, categories_path, currency=DEFAULT_CURRENCY):
+    """
+    Returns (data_manager, limits_manager) for a ledger, with its totals in a reporting currency.
+    Load messages are not printed.
+    """
+    from budget_manager.data_manager import create_data_manager
+    from budget_manager.limits_manager import LimitsManager
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        limits_manager = LimitsManager(categories_path)
+        data_manager = create_data_manager(limits_manager, data_path, currency=currency)
+    return data_manager, limits_manager
+
+
+def ledger_totals(data_manager):
+    """
+    Returns a dict with the total income, expenses, balance and expenses by category of a ledger,
+    and the reporting currency they are in.
+    """
+    return {
+        "currency": data_manager.currency,
+        "total_income": float(data_manager.get_total_incomes()),
+        "total_expenses": float(data_manager.get_total_expenses()),
+        "balance": float(data_manager.get_balance()),
+        "expenses_by_category": {category: float(total)
+                                 for category, total in data_manager.get_expenses_by_category().items()},
+    }
+
+
+def load_ledger_totals(data_path, categories_path, currency=DEFAULT_CURRENCY):
+    """
+    Opens a ledger and returns its totals. Runs in the worker processes of LedgerRegistry.get_totals.
+    """
+    data_manager, _ = open_ledger(data_path, categories_path, currency)
+    try:
+        return ledger_totals(data_manager)
+    finally:
+        data_manager.close()
+
+
+class LedgerRegistry:
+    """
+    Many ledgers (for example one per household) open in one process.
+    A ledger is loaded on first access, and the least recently used ones are closed again when
+    the records in memory take more than memory_budget_mb. Totals across ledgers are computed
+    in a process pool, so ledgers that are not loaded do not have to be loaded here.
+    All ledgers report their totals in the same currency.
+    """
+    def __init__(self, memory_budget_mb=1024, max_workers=None, currency=DEFAULT_CURRENCY):
+        self.memory_budget = memory_budget_mb * 2**20
+        self.max_workers = max_workers
+        self.currency = currency
+        self.ledgers = {}
+        self.loaded = OrderedDict()
+
+    def add(self, name, data_path, categories_path):
+        """
+        Registers a ledger under a name, without loading it.
+        """
+        if name in self.ledgers:
+            raise ValueError(f"Ledger '{name}' is already registered!")
+        self.ledgers[name] = (Path(data_path), Path(categories_path))
+
+    def add_directory(self, directory):
+        """
+        Registers every subdirectory with a categories file and a data file (budget_data.csv, .parquet, .sqlite, ...)
+        as a ledger named after the subdirectory. Returns the names of the registered ledgers.
+        """
+        names = []
+        for folder in sorted(Path(directory).iterdir()):
+            categories_path = folder / CATEGORIES_FILE
+            if not folder.is_dir() or not categories_path.exists():
+                continue
+            data_paths = [folder / f"{name}{suffix}" for name in DATA_FILE_NAMES
+                          for backend in STORAGE_BACKENDS for suffix in backend.suffixes]
+            data_paths = [path for path in data_paths if path.exists()]
+            if data_paths:
+                self.add(folder.name, data_paths[0], categories_path)
+                names.append(folder.name)
+        return names
+
+    def names(self):
+        return list(self.ledgers)
+
+    def get(self, name):
+        """
+        Returns (data_manager, limits_manager) of a ledger, loading it if needed.
+        """
+        if name not in self.ledgers:
+            raise ValueError(f"Ledger '{name}' does not exist!")
+        if name in self.loaded:
+            self.loaded.move_to_end(name)
+            return self.loaded[name][:2]
+
+        data_manager, limits_manager = open_ledger(*self.ledgers[name], self.currency)
+        self.loaded[name] = (data_manager, limits_manager, data_manager.memory_usage(), data_manager.version)
+        self.evict()
+        return data_manager, limits_manager
+
+    def memory_usage(self):
+        """
+        Returns the estimated memory taken by the loaded ledgers in bytes.
+        Ledgers that changed since the last estimate are estimated again.
+        """
+        total = 0
+        for name, (data_manager, limits_manager, usage, version) in self.loaded.items():
+            if data_manager.version != version:
+                usage = data_manager.memory_usage()
+                self.loaded[name] = (data_manager, limits_manager, usage, data_manager.version)
+            total += usage
+        return total
+
+    def evict(self):
+        """
+        Closes the least recently used ledgers until the loaded ones fit into the memory budget.
+        The most recently used ledger is always kept, even if it does not fit by itself.
+        """
+        while len(self.loaded) > 1 and self.memory_usage() > self.memory_budget:
+            self.unload(next(iter(self.loaded)))
+
+    def unload(self, name):
+        """
+        Closes a loaded ledger. Its records are already in its data file.
+        """
+        data_manager = self.loaded.pop(name)[0]
+        data_manager.close()
+
+    def close(self):
+        """
+        Closes all loaded ledgers.
+        """
+        for name in list(self.loaded):
+            self.unload(name)
+
+    def get_totals(self, names=None):
+        """
+        Returns a dict with the totals of each ledger, see ledger_totals.
+        Loaded ledgers are summed here, the others are opened in parallel in a process pool.
+        """
+        names = self.names() if names is None else list(names)
+        for name in names:
+            if name not in self.ledgers:
+                raise ValueError(f"Ledger '{name}' does not exist!")
+
+        totals = {name: ledger_totals(self.loaded[name][0]) for name in names if name in self.loaded}
+        pending = [name for name in names if name not in totals]
+        if len(pending) == 1 or self.max_workers == 1:
+            for name in pending:
+                totals[name] = load_ledger_totals(*self.ledgers[name], self.currency)
+        elif pending:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {name: executor.submit(load_ledger_totals, *self.ledgers[name], self.currency)
+                           for name in pending}
+                for name, future in futures.items():
+                    totals[name] = future.result()
+        return {name: totals[name] for name in names}
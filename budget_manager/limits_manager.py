@@ -1,21 +1,40 @@
 from pathlib import Path
+import calendar
 import csv
+import datetime
+import os
+import re
+from budget_manager.locking import FileLock, atomic_write, file_state
+
+CATEGORY_NAME = re.compile(r"^[A-Za-z]+$")
 
 class LimitsManager:
     def __init__(self, limits_file="categories.csv"):
         self.limits_file = Path(limits_file)
+        self.lock = FileLock(self.limits_file)
+        self.loaded_state = None
+        self.changes = {}
+        self.version = 0
+        self.category_names = []
+        self.category_codes = {}
         self.categories = self.load_limits()
 
         if not self.categories:
             self.create_default_categories()
+        for category in self.categories:
+            self.category_code(category)
 
     def load_limits(self):
         """
         Load categories and limits from a CSV file or creates a default list.
+        The state of the file read is kept, so a change by another process can be noticed.
         """
         categories = {}
-        if self.limits_file.exists() and self.limits_file.stat().st_size > 0:
+        self.loaded_state = None
+        if self.limits_file.exists():
             with open(self.limits_file, mode="r", newline="", encoding="utf-8") as file:
+                stat = os.fstat(file.fileno())
+                self.loaded_state = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
                 csv_reader = csv.reader(file)
                 next(csv_reader, None)
                 for row in csv_reader:
@@ -27,18 +46,53 @@ class LimitsManager:
     def save_limits(self):
         """
         Save categories and limits to a CSV file.
-        """
-        with open(self.limits_file, mode="w", newline="", encoding="utf-8") as file:
-            csv_writer = csv.writer(file)
-            csv_writer.writerow(["Category", "Limit"])
-            for category, limit in self.categories.items():
-                csv_writer.writerow([category, limit])
+        If another process changed the file since it was read, it is read again and the changes made here
+        (see self.changes) are applied on top of it, so neither side loses its categories.
+        The file is replaced atomically, so readers never see it half written.
+        """
+        with self.lock:
+            if file_state(self.limits_file) != self.loaded_state:
+                categories = self.load_limits() or self.categories
+                for category, limit in self.changes.items():
+                    if limit is None:
+                        categories.pop(category, None)
+                    else:
+                        categories[category] = limit
+                self.categories = categories
+                for category in categories:
+                    self.category_code(category)
+            atomic_write(self.limits_file, self.write_limits, newline="", encoding="utf-8")
+            self.loaded_state = file_state(self.limits_file)
+            self.changes = {}
+        self.version += 1
+
+    def write_limits(self, file):
+        csv_writer = csv.writer(file)
+        csv_writer.writerow(["Category", "Limit"])
+        for category, limit in self.categories.items():
+            csv_writer.writerow([category, limit])
+
+    def refresh(self):
+        """
+        Reload the categories if another process changed the file. Returns True if they were reloaded.
+        """
+        if file_state(self.limits_file) == self.loaded_state:
+            return False
+        with self.lock:
+            categories = self.load_limits()
+        if not categories:
+            return False
+        self.categories = categories
+        for category in categories:
+            self.category_code(category)
+        self.version += 1
+        return True
 
     def set_limit(self, category, amount):
         """
         Sets or changes limit for a category from parameter.
         """
-        self.categories[category] = float(amount)
+        self.categories[category] = self.changes[category] = float(amount)
         self.save_limits()
 
     def get_limit(self, category):
@@ -56,13 +110,50 @@ class LimitsManager:
             return True
         return current_expense_sum > limit
 
+    def category_code(self, category):
+        """
+        Returns the small integer code of a category name, used by the record store instead of the name.
+        New names get the next free code. Codes only live in memory and never change while the program runs.
+        """
+        code = self.category_codes.get(category)
+        if code is None:
+            code = self.category_codes[category] = len(self.category_names)
+            self.category_names.append(category)
+        return code
+
+    def get_monthly_status(self, data_manager, month=None):
+        """
+        Returns a dict with the expenses, the limit and whether the limit is exceeded for each category
+        in a month ('YYYY-MM', the current month by default).
+        The expenses come from a date range query of the data manager, not from a scan of all records.
+        """
+        if month is None:
+            month = datetime.date.today().strftime("%Y-%m")
+        year, month_number = (int(part) for part in month.split("-"))
+        last_day = calendar.monthrange(year, month_number)[1]
+        start_date = f"{year:04d}-{month_number:02d}-01"
+        end_date = f"{year:04d}-{month_number:02d}-{last_day:02d}"
+
+        status = {}
+        for category in self.get_all_categories():
+            spent = data_manager.get_range_total("expense", start_date, end_date, category)
+            status[category] = {
+                "spent": spent,
+                "limit": self.get_limit(category),
+                "exceeded": self.is_category_limit_reached(category, spent),
+            }
+        return status
+
     def add_category(self, category, limit=None):
         """
         Adds a new category with an optional limit, if not already exists.
+        Category names may only contain letters (A-Za-z).
         """
-        if category in self.categories:
+        if not isinstance(category, str) or not CATEGORY_NAME.match(category):
+            raise ValueError("Category name must contain only letters (A-Za-z)!")
+        if category in self.categories or (self.refresh() and category in self.categories):
             raise ValueError(f"Category '{category}' already exists!")
-        self.categories[category] = float(limit) if limit is not None else 0.0
+        self.categories[category] = self.changes[category] = float(limit) if limit is not None else 0.0
         self.save_limits()
 
     def remove_category(self, category):
@@ -71,10 +162,17 @@ class LimitsManager:
         """
         if category in self.categories:
             del self.categories[category]
+            self.changes[category] = None
             self.save_limits()
         else:
             raise ValueError(f"Category '{category}' does not exist!")
 
+    def has_category(self, category):
+        """
+        Returns True if the category exists, also if another process added it meanwhile.
+        """
+        return category in self.categories or (self.refresh() and category in self.categories)
+
     def get_all_categories(self):
         """
         Returns a list of all categories.
@@ -0,0 +1,105 @@
+"""
+Helpers for sharing the ledger files between processes (two app windows, the app and a script, ...).
+
+Writers take an exclusive lock on a '<file>.lock' file next to the file they change, and files that are
+rewritten as a whole are written to a temporary file that then replaces the old one, so readers
+never see a half written file.
+"""
+from pathlib import Path
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Exclusive lock between processes, held while in a with block.
+    The lock is re-entrant within one FileLock object, so nested with blocks do not deadlock,
+    and threads of one process sharing the object take turns.
+    """
+    def __init__(self, path, timeout=30.0):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.timeout = timeout
+        self.file = None
+        self.depth = 0
+        self.thread_lock = threading.RLock()
+
+    def acquire(self):
+        self.thread_lock.acquire()
+        if self.depth:
+            self.depth += 1
+            return
+        file = open(self.lock_path, mode="a+b")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    file.seek(0)
+                    msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    file.close()
+                    self.thread_lock.release()
+                    raise TimeoutError(f"Could not lock '{self.path}' within {self.timeout} seconds!")
+                time.sleep(0.005)
+        self.file = file
+        self.depth = 1
+
+    def release(self):
+        self.depth -= 1
+        if not self.depth:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            self.file.close()
+            self.file = None
+        self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.release()
+
+
+def atomic_write(path, write, mode="w", **open_kwargs):
+    """
+    Writes a file by calling write(file) on a temporary file next to it, flushing it to disk
+    and renaming it over the old file. Readers see either the old or the new file, never a mix.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, mode=mode, **open_kwargs) as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def file_state(path):
+    """
+    Returns (inode, size, modification time) of a file, or None if it does not exist.
+    A file replaced by atomic_write gets a new inode, a file appended to keeps it and grows.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
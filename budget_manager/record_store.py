@@ -0,0 +1,251 @@
+import sys
+import numpy as np
+import pandas as pd
+from budget_manager.currency import DEFAULT_CURRENCY
+from budget_manager.timeseries import to_day
+
+INCOME = 1
+MISSING_DAY = np.iinfo("int32").min
+TYPES = ["expense", "income"]
+
+
+def to_days(dates):
+    """
+    Returns an int32 array with dates as days since 1970-01-01, MISSING_DAY for missing dates.
+    """
+    values = pd.to_datetime(pd.Series(dates), format="ISO8601", errors="coerce").to_numpy(dtype="datetime64[D]")
+    days = values.astype("int64")
+    days[np.isnat(values)] = MISSING_DAY
+    return days.astype("int32")
+
+
+def to_grosze(amounts):
+    """
+    Returns an int64 array with amounts in grosze (1/100 zł), 0 for missing amounts.
+    """
+    try:
+        values = np.asarray(amounts, dtype="float64")
+    except (TypeError, ValueError):
+        values = pd.to_numeric(pd.Series(amounts), errors="coerce").to_numpy(dtype="float64")
+    return np.nan_to_num(np.round(values * 100)).astype("int64")
+
+
+class StringPool:
+    """
+    Each distinct string stored once, records refer to it by an int32 code.
+    """
+    def __init__(self):
+        self.codes = {}
+        self.strings = np.empty(16, dtype=object)
+        self.size = 0
+
+    def intern(self, value):
+        """
+        Returns the code of a string, adding it to the pool if it is new.
+        """
+        code = self.codes.get(value)
+        if code is None:
+            if self.size == len(self.strings):
+                self.strings = np.resize(self.strings, max(16, 2 * self.size))
+            code = self.codes[value] = self.size
+            self.strings[code] = value
+            self.size += 1
+        return code
+
+    def intern_many(self, values):
+        """
+        Returns an int32 array with the codes of many strings. Only the distinct strings are looked up.
+        """
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna(""), use_na_sentinel=False)
+        unique_codes = np.array([self.intern(str(value)) for value in uniques], dtype="int32")
+        return unique_codes[codes] if len(codes) else np.empty(0, dtype="int32")
+
+    def lookup(self, codes):
+        """
+        Returns an object array with the strings for an array of codes. The strings are shared, not copied.
+        """
+        return self.strings[:self.size][codes]
+
+    def nbytes(self):
+        """
+        Returns an estimate of the memory taken by the pool in bytes.
+        """
+        sample = self.strings[:self.size:max(1, self.size // 1000)]
+        average = sum(sys.getsizeof(value) for value in sample) / len(sample) if len(sample) else 0
+        return int(self.strings.nbytes + self.size * average)
+
+
+class RecordStore:
+    """
+    All records kept as parallel NumPy arrays with a few bytes per record:
+    a flag byte for the type, an int16 category code interned by the LimitsManager, the amount as
+    int64 grosze (exact sums), the date as int32 days and an int32 code into a pool of descriptions.
+    Amounts are kept in the reporting currency of the ledger, which all totals use, and in the currency
+    of the record (a uint8 code) as entered.
+    The arrays grow by doubling, so adding a record is O(1) amortized.
+    """
+    ARRAYS = {
+        "flags": "uint8",
+        "categories": "int16",
+        "amounts": "int64",
+        "days": "int32",
+        "descriptions": "int32",
+        "currencies": "uint8",
+        "original_amounts": "int64",
+    }
+
+    def __init__(self, limits_manager, capacity=16):
+        self.limits_manager = limits_manager
+        self.pool = StringPool()
+        self.currency_names = [DEFAULT_CURRENCY]
+        self.currency_codes = {DEFAULT_CURRENCY: 0}
+        self.size = 0
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.ARRAYS.items()}
+
+    def __len__(self):
+        return self.size
+
+    def view(self, name):
+        """
+        Returns a read-only view (no copy) of the filled part of an array:
+        'flags', 'categories', 'amounts', 'days' or 'descriptions'.
+        """
+        view = self.columns[name][:self.size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def flags(self):
+        return self.view("flags")
+
+    @property
+    def categories(self):
+        return self.view("categories")
+
+    @property
+    def amounts(self):
+        return self.view("amounts")
+
+    @property
+    def days(self):
+        return self.view("days")
+
+    @property
+    def descriptions(self):
+        return self.view("descriptions")
+
+    def is_income(self):
+        """
+        Returns a boolean array marking the incomes.
+        """
+        return (self.flags & INCOME).astype(bool)
+
+    def signed_amounts(self):
+        """
+        Returns an int64 array with the amounts in grosze, negative for expenses.
+        """
+        amounts = self.amounts
+        return np.where(self.is_income(), amounts, -amounts)
+
+    def category_code(self, category):
+        """
+        Returns the code of a category, or None if no record or limit ever used it.
+        """
+        return self.limits_manager.category_codes.get(category)
+
+    def currency_code(self, currency):
+        """
+        Returns the code of a currency, adding it if it is new.
+        """
+        code = self.currency_codes.get(currency)
+        if code is None:
+            code = self.currency_codes[currency] = len(self.currency_names)
+            self.currency_names.append(currency)
+        return code
+
+    def reserve(self, count):
+        """
+        Makes room for count more records.
+        """
+        needed = self.size + count
+        capacity = len(self.columns["flags"])
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+        for name, array in self.columns.items():
+            self.columns[name] = np.resize(array, capacity)
+
+    def append(self, record_type, category, amount, date, description="", currency=DEFAULT_CURRENCY, converted=None):
+        """
+        Adds a single record. Types other than 'income' are stored as expenses.
+        converted: the amount in the reporting currency, if the record is in another currency
+        """
+        self.reserve(1)
+        day = to_day(date)
+        row = self.size
+        self.columns["flags"][row] = INCOME if record_type == "income" else 0
+        self.columns["categories"][row] = self.limits_manager.category_code(category)
+        self.columns["original_amounts"][row] = to_grosze([amount])[0]
+        self.columns["amounts"][row] = to_grosze([amount if converted is None else converted])[0]
+        self.columns["days"][row] = MISSING_DAY if day is None else day
+        self.columns["descriptions"][row] = self.pool.intern("" if description is None else str(description))
+        self.columns["currencies"][row] = self.currency_code(currency)
+        self.size += 1
+
+    def extend(self, df, converted=None):
+        """
+        Adds all records of a DataFrame in the in-memory schema, converting whole columns at once.
+        converted: array with the amounts in the reporting currency, if some records are in another currency
+        """
+        count = len(df)
+        if not count:
+            return
+        category_codes, categories = pd.factorize(df["Category"].astype(object).fillna("").astype(str))
+        category_codes = np.array([self.limits_manager.category_code(name) for name in categories],
+                                  dtype="int16")[category_codes]
+
+        self.reserve(count)
+        rows = slice(self.size, self.size + count)
+        self.columns["flags"][rows] = np.where(df["Type"].astype(object).to_numpy() == "income", INCOME, 0)
+        self.columns["categories"][rows] = category_codes
+        original = to_grosze(df["Amount"])
+        self.columns["original_amounts"][rows] = original
+        self.columns["amounts"][rows] = original if converted is None else to_grosze(converted)
+        self.columns["days"][rows] = to_days(df["Date"])
+        self.columns["descriptions"][rows] = self.pool.intern_many(df["Description"].to_numpy())
+        currencies = df["Currency"]
+        codes = np.array([self.currency_code(name) for name in currencies.cat.categories], dtype="uint8")
+        self.columns["currencies"][rows] = codes[currencies.cat.codes.to_numpy()]
+        self.size += count
+
+    def clear(self):
+        """
+        Removes all records. The description pool is kept.
+        """
+        self.size = 0
+
+    def to_frame(self, positions=None, converted=False):
+        """
+        Returns a DataFrame in the in-memory schema with all records, or with the records at the given positions.
+        converted: give the amounts in the reporting currency instead of the currency of each record
+        """
+        if positions is None:
+            positions = slice(None)
+        names = self.limits_manager.category_names
+        days = self.days[positions].astype("int64")
+        dates = days.astype("datetime64[D]")
+        dates[days == MISSING_DAY] = np.datetime64("NaT")
+        return pd.DataFrame({
+            "Type": pd.Categorical.from_codes(self.flags[positions] & INCOME, TYPES),
+            "Category": pd.Categorical.from_codes(self.categories[positions], names),
+            "Amount": self.view("amounts" if converted else "original_amounts")[positions] / 100,
+            "Date": dates.astype("datetime64[ns]"),
+            "Description": self.pool.lookup(self.descriptions[positions]),
+            "Currency": pd.Categorical.from_codes(self.view("currencies")[positions], self.currency_names),
+        })
+
+    def nbytes(self):
+        """
+        Returns an estimate of the memory taken by the records in bytes.
+        """
+        return sum(array.nbytes for array in self.columns.values()) + self.pool.nbytes()
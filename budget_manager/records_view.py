@@ -0,0 +1,173 @@
+import datetime
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+class RecordsTable:
+    """
+    Window with a virtualized table of records.
+    Only the rows that fit in the window are put into the Treeview. They are fetched from the
+    data manager in chunks while scrolling, and sorting and filtering are done by the data manager,
+    so opening the window takes the same time for any number of records.
+    """
+    COLUMNS = ["Type", "Category", "Amount", "Date", "Description", "Currency"]
+    CHUNK_SIZE = 500
+    ROW_HEIGHT = 20
+    HEADER_HEIGHT = 25
+
+    def __init__(self, data_manager, categories, master=None):
+        self.data_manager = data_manager
+        self.filters = {}
+        self.sort_by = None
+        self.ascending = True
+        self.offset = 0
+        self.total = 0
+        self.visible_rows = 18
+        self.chunk_start = 0
+        self.chunk = None
+
+        self.window = tk.Toplevel(master)
+        self.window.title("All Records - Incomes & Expenses")
+        self.window.geometry("650x460")
+
+        filter_frame = tk.Frame(self.window, padx=5, pady=5)
+        filter_frame.pack(side=tk.TOP, fill=tk.X)
+
+        tk.Label(filter_frame, text="Type:").grid(row=0, column=0)
+        self.type_var = tk.StringVar(value="")
+        ttk.Combobox(filter_frame, textvariable=self.type_var, values=["", "income", "expense"],
+                     width=8, state="readonly").grid(row=0, column=1, padx=3)
+
+        tk.Label(filter_frame, text="Category:").grid(row=0, column=2)
+        self.category_var = tk.StringVar(value="")
+        ttk.Combobox(filter_frame, textvariable=self.category_var, values=[""] + list(categories),
+                     width=12, state="readonly").grid(row=0, column=3, padx=3)
+
+        tk.Label(filter_frame, text="From:").grid(row=0, column=4)
+        self.start_date_var = tk.StringVar()
+        tk.Entry(filter_frame, textvariable=self.start_date_var, width=10).grid(row=0, column=5, padx=3)
+
+        tk.Label(filter_frame, text="To:").grid(row=0, column=6)
+        self.end_date_var = tk.StringVar()
+        tk.Entry(filter_frame, textvariable=self.end_date_var, width=10).grid(row=0, column=7, padx=3)
+
+        tk.Button(filter_frame, text="Filter", command=self.apply_filters).grid(row=0, column=8, padx=3)
+
+        table_frame = tk.Frame(self.window)
+        table_frame.pack(fill="both", expand=True)
+
+        self.tree = ttk.Treeview(table_frame, columns=self.COLUMNS, show="headings", height=self.visible_rows)
+        for col in self.COLUMNS:
+            self.tree.heading(col, text=col, command=lambda column=col: self.sort(column))
+            self.tree.column(col, width=120, anchor="center")
+
+        self.scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill="both", expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.status_label = tk.Label(self.window, anchor="w", padx=5)
+        self.status_label.pack(fill=tk.X)
+
+        self.tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_to(self.offset + 3))
+        self.tree.bind("<Configure>", self.on_resize)
+
+        self.reload()
+
+    def reload(self):
+        """Counts the records for the current filters and shows the first rows."""
+        self.total = self.data_manager.count_records(**self.filters)
+        self.chunk = None
+        self.offset = 0
+        self.render()
+
+    def fetch_rows(self, offset, count):
+        """Returns the rows to display, fetching a new chunk from the data manager when needed."""
+        end = offset + count
+        if self.chunk is None or offset < self.chunk_start or end > self.chunk_start + self.CHUNK_SIZE:
+            self.chunk_start = max(0, offset - self.CHUNK_SIZE // 4)
+            page = self.data_manager.get_records_page(self.chunk_start, self.CHUNK_SIZE, self.sort_by,
+                                                      self.ascending, **self.filters)
+            self.chunk = list(zip(
+                page["Type"].astype(str),
+                page["Category"].astype(str),
+                page["Amount"],
+                page["Date"].dt.strftime("%Y-%m-%d").fillna(""),
+                page["Description"],
+                page["Currency"].astype(str)
+            ))
+        return self.chunk[offset - self.chunk_start:end - self.chunk_start]
+
+    def render(self):
+        """Replaces the rows in the Treeview with the rows at the current offset."""
+        rows = self.fetch_rows(self.offset, self.visible_rows)
+        self.tree.delete(*self.tree.get_children())
+        for values in rows:
+            self.tree.insert("", "end", values=values)
+
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, min(1.0, (self.offset + self.visible_rows) / self.total))
+            self.status_label.config(text=f"Records {self.offset + 1}-{self.offset + len(rows)} of {self.total}")
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            self.status_label.config(text="No records found!")
+
+    def scroll_to(self, offset):
+        """Moves the visible window of rows to start at the given record."""
+        offset = max(0, min(offset, self.total - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+        return "break"
+
+    def on_scrollbar(self, action, value, unit=None):
+        """Handles dragging and clicking the scrollbar."""
+        if action == "moveto":
+            self.scroll_to(int(float(value) * self.total))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.offset + int(value) * step)
+
+    def on_mouse_wheel(self, event):
+        """Scrolls three rows per mouse wheel step."""
+        return self.scroll_to(self.offset + (-3 if event.delta > 0 else 3))
+
+    def on_resize(self, event):
+        """Adjusts the number of materialized rows to the height of the table."""
+        visible_rows = max(1, (event.height - self.HEADER_HEIGHT) // self.ROW_HEIGHT)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.offset = max(0, min(self.offset, self.total - self.visible_rows))
+            self.render()
+
+    def sort(self, column):
+        """Sorts by a column, clicking the same column again reverses the order."""
+        if self.sort_by == column:
+            self.ascending = not self.ascending
+        else:
+            self.sort_by = column
+            self.ascending = True
+        for col in self.COLUMNS:
+            arrow = (" ▲" if self.ascending else " ▼") if col == self.sort_by else ""
+            self.tree.heading(col, text=col + arrow)
+        self.reload()
+
+    def apply_filters(self):
+        """Reads the filter fields and shows the matching records."""
+        filters = {}
+        if self.type_var.get():
+            filters["record_type"] = self.type_var.get()
+        if self.category_var.get():
+            filters["category"] = self.category_var.get()
+        for key, var in (("start_date", self.start_date_var), ("end_date", self.end_date_var)):
+            value = var.get().strip()
+            if not value:
+                continue
+            try:
+                datetime.date.fromisoformat(value)
+            except ValueError:
+                messagebox.showerror("Error", f"Date '{value}' must be in the YYYY-MM-DD format!")
+                return
+            filters[key] = value
+        self.filters = filters
+        self.reload()
@@ -0,0 +1,558 @@
+"""
+Local HTTP/JSON API over a ledger, so phones and other machines of the household can add records:
+
+    python -m budget_manager serve --port 8080
+
+    GET    /summary                        total income, expenses and balance
+    GET    /limits?month=2025-01           spending against the limit of each category
+    GET    /categories                     categories and their limits
+    POST   /categories                     {"category": "Pets", "limit": 300}
+    PUT    /categories/<name>              {"limit": 400}
+    DELETE /categories/<name>
+    POST   /records                        {"type": "expense", "category": "Food", "amount": 12.5,
+                                            "date": "2025-01-19", "description": "Lunch", "currency": "PLN"}
+    POST   /records/bulk                   {"records": [{...}, ...]}, all or nothing
+    GET    /charts/<pie|limits|projected|balance>.png?width=9&height=6
+
+The API can change the ledger and its categories, so by default it only listens on 127.0.0.1. With a token
+(--token or the BUDGET_API_TOKEN environment variable) every request must send "Authorization: Bearer <token>",
+and only then it may listen on other addresses (--host 0.0.0.0). The token travels in clear text over HTTP,
+so do that on a trusted home network only.
+
+Requests are handled by one asyncio event loop with the standard library only (HTTP/1.1 with keep-alive).
+Reads come straight from the running totals and their JSON is cached until a record or a limit changes,
+writes are put on a queue served by a single writer task. The writer takes all records waiting on the queue and
+commits them with one add_records call (one locked append to the data file), so many clients adding records at
+once cost one write per batch instead of one per record. The commits run in one writer thread, so waiting for
+the file lock of another process does not block the loop: meanwhile reads get their last cached JSON, and only
+reads with nothing cached wait for the commit. Charts are drawn in a worker thread.
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import hmac
+import ipaddress
+import json
+import os
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+from budget_manager.currency import normalize_currency
+from budget_manager.stats_manager import CHARTS, DEFAULT_FIGSIZE, StatsManager, draw_chart
+
+RECORD_TYPES = ("income", "expense")
+MAX_BODY_BYTES = 16 * 2**20
+MAX_BATCH_RECORDS = 10000
+SYNC_INTERVAL = 2.0
+RESTART_DELAY = 1.0
+TOKEN_ENV_VAR = "BUDGET_API_TOKEN"
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_record(data):
+    """
+    Returns a record dict for DataManager.add_records from the JSON of a record.
+    Raises ValueError if the record is not valid (the category is checked by the writer).
+    """
+    if not isinstance(data, dict):
+        raise ValueError("A record must be a JSON object!")
+    record_type = data.get("type")
+    if record_type not in RECORD_TYPES:
+        raise ValueError(f"Record type must be one of {RECORD_TYPES}, got {record_type!r}!")
+    category = data.get("category")
+    if not isinstance(category, str) or not category:
+        raise ValueError("Record category is missing!")
+    amount = data.get("amount")
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)) or not amount > 0:
+        raise ValueError(f"Record amount must be a positive number, got {amount!r}!")
+    date = data.get("date") or datetime.date.today().isoformat()
+    try:
+        # Only YYYY-MM-DD, other forms would be stored as they are and read back as missing dates.
+        valid = datetime.date.fromisoformat(date).isoformat() == date
+    except (TypeError, ValueError):
+        valid = False
+    if not valid:
+        raise ValueError(f"Invalid record date {date!r}, expected for example: 2025-01-19")
+    description = data.get("description") or ""
+    if not isinstance(description, str):
+        raise ValueError("Record description must be a string!")
+    return {
+        "Type": record_type,
+        "Category": category,
+        "Amount": float(amount),
+        "Date": date,
+        "Description": description,
+        "Currency": normalize_currency(data.get("currency")),
+    }
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_limit(data):
+    limit = data.get("limit", 0.0) if isinstance(data, dict) else None
+    if isinstance(limit, bool) or not isinstance(limit, (int, float)) or limit < 0:
+        raise ValueError(f"Limit must be a number of at least 0, got {limit!r}!")
+    return float(limit)
+
+
+class BudgetServer:
+    """
+    HTTP/JSON API over a data manager and a limits manager, see the module docstring.
+    """
+    def __init__(self, data_manager, limits_manager, max_batch=MAX_BATCH_RECORDS, sync_interval=SYNC_INTERVAL,
+                 token=None):
+        """
+        max_batch: largest number of records committed by the writer at once
+        sync_interval: seconds between checks for records and categories added by other processes
+        token: if given, requests must send it in an "Authorization: Bearer <token>" header
+        """
+        self.data_manager = data_manager
+        self.token = token
+        self.limits_manager = limits_manager
+        self.stats_manager = StatsManager(data_manager, limits_manager)
+        self.max_batch = max_batch
+        self.sync_interval = sync_interval
+        self.queue = None
+        self.tasks = []
+        self.chart_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-server")
+        self.write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="budget-writer")
+        self.idle = None
+        self.responses = {}
+        self.stats = {"requests": 0, "commits": 0, "committed_records": 0}
+        self.routes = [
+            ("GET", ("summary",), self.get_summary),
+            ("GET", ("limits",), self.get_limits),
+            ("GET", ("categories",), self.get_categories),
+            ("POST", ("categories",), self.add_category),
+            ("PUT", ("categories", None), self.set_limit),
+            ("DELETE", ("categories", None), self.remove_category),
+            ("POST", ("records",), self.add_record),
+            ("POST", ("records", "bulk"), self.add_records),
+            ("GET", ("charts", None), self.get_chart),
+            ("GET", ("stats",), self.get_stats),
+        ]
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """
+        Starts listening and the writer task, returns the asyncio server.
+        Raises ValueError for an address other than this machine without a token.
+        """
+        if not is_loopback(host) and not self.token:
+            raise ValueError(f"The API has no authentication without a token, it may only listen on 127.0.0.1. "
+                             f"Set --token or {TOKEN_ENV_VAR} to listen on '{host}'.")
+        self.data_manager.wait_until_loaded()
+        self.queue = asyncio.Queue()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.tasks = [asyncio.create_task(self.supervise("writer", self.writer)),
+                      asyncio.create_task(self.supervise("sync", self.sync_loop))]
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        server = await self.start(host, port)
+        addresses = ", ".join(f"http://{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+        print(f"Serving the budget API on {addresses}")
+        if not is_loopback(host):
+            print("Warning: the API is reachable from other machines and its token is sent in clear text, "
+                  "use it on a trusted network only.", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        for task in self.tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self.tasks = []
+        self.chart_executor.shutdown(wait=False)
+        self.write_executor.shutdown(wait=True)
+
+    # Writes
+
+    async def write(self, kind, payload):
+        """
+        Puts a write on the queue of the writer task and waits until it is committed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((kind, payload, future))
+        return await future
+
+    async def writer(self):
+        """
+        The only task changing the managers. Consecutive record writes waiting on the queue are committed
+        together (group commit), other writes run one by one in the order they came. The writes run in the
+        single writer thread, so a file lock held by another process does not stop the reads.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            writes = [await self.queue.get()]
+            while not self.queue.empty() and len(writes) < self.max_batch:
+                writes.append(self.queue.get_nowait())
+            self.idle.clear()
+            try:
+                outcomes = await loop.run_in_executor(self.write_executor, self.run_writes, writes)
+            except Exception as e:
+                outcomes = [(future, None, e) for _, _, future in writes]
+            finally:
+                self.idle.set()
+            for future, result, error in outcomes:
+                # The request of a future may have been cancelled (client gone) in the meantime.
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def run_writes(self, writes):
+        """
+        Runs a batch of writes in the writer thread and returns (future, result, exception) of each write.
+        The futures themselves are only completed on the loop thread.
+        """
+        outcomes = []
+        batch = []
+        for kind, payload, future in writes:
+            if kind == "records":
+                batch.append((payload, future))
+                continue
+            outcomes += self.commit_records(batch)
+            batch = []
+            try:
+                outcomes.append((future, payload(), None))
+            except Exception as e:
+                outcomes.append((future, None, e))
+        outcomes += self.commit_records(batch)
+        return outcomes
+
+    def commit_records(self, batch):
+        """
+        Adds the records of a batch of writes with one add_records call and returns (future, result, exception)
+        of each write. Every write is checked on its own first, so a record with an unknown category only fails
+        its own request.
+        """
+        outcomes = []
+        valid = []
+        for records, future in batch:
+            unknown = [record["Category"] for record in records
+                       if not self.limits_manager.has_category(record["Category"])]
+            currencies = [record["Currency"] for record in records
+                          if not self.data_manager.fx_rates.has_currency(record["Currency"])]
+            if unknown:
+                error = ValueError(f"Category '{unknown[0]}' does not exist! You have to add it first!")
+                outcomes.append((future, None, error))
+            elif currencies:
+                error = ValueError(f"There are no exchange rates for '{currencies[0]}'!")
+                outcomes.append((future, None, error))
+            else:
+                valid.append((records, future))
+        if not valid:
+            return outcomes
+        rows = [record for records, _ in valid for record in records]
+        try:
+            self.data_manager.add_records(rows)
+        except Exception as e:
+            return outcomes + [(future, None, e) for _, future in valid]
+        self.stats["commits"] += 1
+        self.stats["committed_records"] += len(rows)
+        return outcomes + [(future, len(records), None) for records, future in valid]
+
+    async def sync_loop(self):
+        """
+        Picks up records and categories added by other processes (the window, an import, ...) between writes.
+        """
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.write("sync", self.sync)
+
+    def sync(self):
+        self.data_manager.sync()
+        self.limits_manager.refresh()
+
+    async def supervise(self, name, task):
+        """
+        Runs a background task (a coroutine function) forever: if it fails, the error is printed
+        and the task is started again, so the writes do not hang behind a dead writer.
+        """
+        while True:
+            try:
+                await task()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                print(f"The {name} task of the budget API failed, restarting it:", file=sys.stderr)
+                traceback.print_exc()
+                await asyncio.sleep(RESTART_DELAY)
+
+    # Reads
+
+    async def cached_json(self, key, compute):
+        """
+        Returns the JSON of a read, computed again only after a record or a limit has changed.
+        While a write runs in the writer thread the managers are not read: the last JSON of the read is
+        returned if there is one, otherwise the read waits for the write to finish.
+        """
+        cached = self.responses.get(key)
+        if cached is not None and (not self.idle.is_set()
+                                   or cached[0] == (self.data_manager.version, self.limits_manager.version)):
+            return cached[1]
+        await self.idle.wait()
+        version = (self.data_manager.version, self.limits_manager.version)
+        body = json.dumps(compute()).encode()
+        self.responses[key] = (version, body)
+        return body
+
+    # Handlers: (path parameter, query, parsed JSON body) -> (status, JSON bytes or an object, content type)
+
+    async def get_summary(self, name, query, body):
+        from budget_manager.cli import get_summary
+
+        summary = await self.cached_json("summary", lambda: dict(get_summary(self.data_manager),
+                                                                 currency=self.data_manager.currency))
+        return HTTPStatus.OK, summary
+
+    async def get_limits(self, name, query, body):
+        from budget_manager.cli import get_limits_status
+
+        month = query.get("month")
+        if month is not None:
+            try:
+                datetime.datetime.strptime(month, "%Y-%m")
+            except ValueError:
+                raise ValueError(f"Invalid month '{month}', expected for example: 2025-01")
+        status = await self.cached_json(("limits", month),
+                                        lambda: get_limits_status(self.data_manager, self.limits_manager, month))
+        return HTTPStatus.OK, status
+
+    async def get_categories(self, name, query, body):
+        categories = await self.cached_json("categories", lambda: [
+            {"category": category, "limit": self.limits_manager.get_limit(category)}
+            for category in self.limits_manager.get_all_categories()
+        ])
+        return HTTPStatus.OK, categories
+
+    async def add_category(self, name, query, body):
+        category = body.get("category") if isinstance(body, dict) else None
+        if not isinstance(category, str) or not category.strip():
+            raise ValueError("Category name is missing!")
+        category = category.strip()
+        limit = parse_limit(body)
+        await self.write("category", lambda: self.limits_manager.add_category(category, limit))
+        return HTTPStatus.CREATED, {"category": category, "limit": limit}
+
+    async def set_limit(self, name, query, body):
+        limit = parse_limit(body)
+
+        def set_limit():
+            if not self.limits_manager.has_category(name):
+                raise HttpError(HTTPStatus.NOT_FOUND, f"Category '{name}' does not exist!")
+            self.limits_manager.set_limit(name, limit)
+
+        await self.write("category", set_limit)
+        return HTTPStatus.OK, {"category": name, "limit": limit}
+
+    async def remove_category(self, name, query, body):
+        def remove_category():
+            if not self.limits_manager.has_category(name):
+                raise HttpError(HTTPStatus.NOT_FOUND, f"Category '{name}' does not exist!")
+            self.limits_manager.remove_category(name)
+
+        await self.write("category", remove_category)
+        return HTTPStatus.OK, {"category": name}
+
+    async def add_record(self, name, query, body):
+        added = await self.write("records", [parse_record(body)])
+        return HTTPStatus.CREATED, {"added": added}
+
+    async def add_records(self, name, query, body):
+        records = body.get("records") if isinstance(body, dict) else body
+        if not isinstance(records, list) or not records:
+            raise ValueError("Expected a non-empty list of records in 'records'!")
+        rows = []
+        for position, record in enumerate(records):
+            try:
+                rows.append(parse_record(record))
+            except ValueError as e:
+                raise ValueError(f"Record {position}: {e}")
+        added = await self.write("records", rows)
+        return HTTPStatus.CREATED, {"added": added}
+
+    async def get_chart(self, name, query, body):
+        chart, _, extension = name.rpartition(".")
+        if extension != "png" or chart not in CHARTS:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"Unknown chart '{name}', expected one of: "
+                                                  + ", ".join(f"{chart}.png" for chart in CHARTS))
+        try:
+            figsize = (float(query.get("width", DEFAULT_FIGSIZE[0])), float(query.get("height", DEFAULT_FIGSIZE[1])))
+        except ValueError:
+            raise ValueError("Chart width and height must be numbers (inches)!")
+        if not (0 < figsize[0] <= 40 and 0 < figsize[1] <= 40):
+            raise ValueError("Chart width and height must be between 0 and 40 inches!")
+
+        # Like ChartRenderer: the data is collected here, drawing runs in the worker thread.
+        key = self.stats_manager.chart_key(chart, figsize)
+        found, png = self.stats_manager.get_cached_chart(key)
+        if not found:
+            await self.idle.wait()
+            key = self.stats_manager.chart_key(chart, figsize)
+            data = self.stats_manager.chart_data(chart)
+            png = None
+            if data is not None:
+                png = await asyncio.get_running_loop().run_in_executor(
+                    self.chart_executor, draw_chart, chart, data, figsize, "png", self.data_manager.currency)
+            self.stats_manager.store_chart(key, png)
+        if png is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"There is no data to show on the '{chart}' chart.")
+        return HTTPStatus.OK, png, "image/png"
+
+    async def get_stats(self, name, query, body):
+        return HTTPStatus.OK, dict(self.stats, queued=self.queue.qsize())
+
+    # HTTP
+
+    def route(self, method, path):
+        """
+        Returns (handler, path parameter) for a request, raises HttpError for an unknown path or method.
+        """
+        parts = tuple(unquote(part) for part in path.strip("/").split("/"))
+        allowed = []
+        for route_method, pattern, handler in self.routes:
+            if len(pattern) == len(parts) and all(p is None or p == part for p, part in zip(pattern, parts)):
+                if route_method == method:
+                    name = parts[-1] if pattern[-1] is None else None
+                    return handler, name
+                allowed.append(route_method)
+        if allowed:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"Method {method} is not allowed, use: {', '.join(allowed)}")
+        raise HttpError(HTTPStatus.NOT_FOUND, f"Unknown path '{path}'")
+
+    def check_token(self, headers):
+        if self.token is None:
+            return
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), self.token.encode()):
+            raise HttpError(HTTPStatus.UNAUTHORIZED, "Missing or wrong token, send: Authorization: Bearer <token>")
+
+    async def handle_request(self, method, target, body, headers=None):
+        """
+        Returns (status, body bytes, content type) of a request.
+        """
+        self.stats["requests"] += 1
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            self.check_token(headers or {})
+            handler, name = self.route(method, url.path)
+            try:
+                data = json.loads(body) if body else None
+            except ValueError:
+                raise ValueError("The request body is not valid JSON!")
+            status, result, *content_type = await handler(name, query, data)
+        except HttpError as e:
+            return e.status, json.dumps({"error": str(e)}).encode(), "application/json"
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, json.dumps({"error": str(e)}).encode(), "application/json"
+        if content_type:
+            return status, result, content_type[0]
+        if not isinstance(result, bytes):
+            result = json.dumps(result).encode()
+        return status, result, "application/json"
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves the requests of one connection, several of them if the client keeps it alive.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.send(writer, HTTPStatus.BAD_REQUEST, b'{"error": "Malformed request line"}',
+                                    "application/json", keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0) or 0)
+                if length > MAX_BODY_BYTES:
+                    await self.send(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, b'{"error": "Request body too large"}',
+                                    "application/json", keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                status, payload, content_type = await self.handle_request(method.upper(), target, body, headers)
+                await self.send(writer, status, payload, content_type, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def send(self, writer, status, payload, content_type, keep_alive):
+        status = HTTPStatus(status)
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+
+def run(args, data_manager, limits_manager):
+    token = args.token or os.environ.get(TOKEN_ENV_VAR) or None
+    server = BudgetServer(data_manager, limits_manager, max_batch=args.max_batch, token=token)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+
+def main(argv=None):
+    from budget_manager.cli import add_serve_arguments, open_managers
+
+    parser = argparse.ArgumentParser(description="Serve a ledger over a local HTTP/JSON API.")
+    add_serve_arguments(parser)
+    parser.add_argument("--data", default="budget_data.csv", help="data file of the ledger")
+    parser.add_argument("--categories", default="categories.csv", help="categories file of the ledger")
+    parser.add_argument("--currency", default="PLN", help="reporting currency of the ledger")
+    args = parser.parse_args(argv)
+    data_manager, limits_manager = open_managers(args)
+    return run(args, data_manager, limits_manager)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Snapshots of the parsed records of a CSV ledger, so that reopening it does not parse the whole file again.
+
+The snapshot holds the record store, the running totals and the date index together with the size,
+modification time and a hash of the data file at the time it was taken. A file with the same size and
+modification time is taken as it is. A file that grew (records are appended at the end) or was touched is
+accepted if its bytes covered by the snapshot still have the same hash, then only the new bytes have to be parsed.
+Any other change, like a manual edit, makes the snapshot invalid and the ledger is rebuilt.
+Hashing reads the file sequentially, which is still much faster than parsing it.
+"""
+from pathlib import Path
+import hashlib
+import pickle
+import numpy as np
+from budget_manager.locking import atomic_write
+from budget_manager.record_store import RecordStore
+
+SNAPSHOT_FORMAT = 5
+HASH_BLOCK_SIZE = 2**20
+
+
+def snapshot_path(data_path):
+    data_path = Path(data_path)
+    return data_path.with_name(data_path.name + ".snapshot")
+
+
+def fingerprint(path, size):
+    """
+    Returns a hash of the first size bytes of a file, read sequentially, so any edit of them changes it.
+    """
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    remaining = size
+    with open(path, mode="rb") as file:
+        while remaining > 0:
+            block = file.read(min(HASH_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def save_snapshot(data_manager, stat):
+    """
+    Writes a snapshot of a data manager for the data file state given by stat (os.stat of the file
+    taken when its records were read). The file is replaced atomically.
+    """
+    records = data_manager.records
+    state = {
+        "format": SNAPSHOT_FORMAT,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "fingerprint": fingerprint(data_manager.csv_file_path, stat.st_size),
+        "category_names": list(data_manager.limits_manager.category_names),
+        "currency_names": list(records.currency_names),
+        "currency": data_manager.currency,
+        "fx_state": data_manager.fx_rates.state,
+        "unconverted": sorted(data_manager.unconverted),
+        "columns": {name: records.view(name).copy() for name in RecordStore.ARRAYS},
+        "strings": records.pool.strings[:records.pool.size].tolist(),
+        "aggregates": data_manager.aggregates,
+        "timeseries": data_manager.timeseries,
+    }
+    atomic_write(snapshot_path(data_manager.csv_file_path),
+                 lambda file: pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL), mode="wb")
+
+
+def load_snapshot(data_manager, stat):
+    """
+    Returns (records, aggregates, timeseries, size, unconverted) from the snapshot of the data file, where size is
+    the number of bytes of the file it covers and unconverted the currencies without exchange rates,
+    or None if there is no snapshot or it does not match the file.
+    stat: os.stat of the data file now
+    """
+    path = snapshot_path(data_manager.csv_file_path)
+    try:
+        with open(path, mode="rb") as file:
+            state = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(state, dict) or state.get("format") != SNAPSHOT_FORMAT:
+        return None
+
+    size = state["size"]
+    if stat.st_size < size:
+        return None
+    unchanged = stat.st_size == size and stat.st_mtime_ns == state["mtime_ns"]
+    if not unchanged and fingerprint(data_manager.csv_file_path, size) != state["fingerprint"]:
+        return None
+    # Amounts in the reporting currency are only valid for the same currency and exchange rates.
+    if (state["currency"], state["fx_state"]) != (data_manager.currency, data_manager.fx_rates.state):
+        return None
+
+    limits_manager = data_manager.limits_manager
+    records = RecordStore(limits_manager, capacity=0)
+    columns = state["columns"]
+    codes = np.array([limits_manager.category_code(name) for name in state["category_names"]], dtype="int16")
+    columns["categories"] = codes[columns["categories"]] if len(codes) else columns["categories"]
+    records.columns = columns
+    records.size = len(columns["flags"])
+    records.currency_names = state["currency_names"]
+    records.currency_codes = {name: code for code, name in enumerate(records.currency_names)}
+    strings = state["strings"]
+    records.pool.codes = {string: code for code, string in enumerate(strings)}
+    records.pool.strings = np.array(strings, dtype=object)
+    records.pool.size = len(strings)
+    return records, state["aggregates"], state["timeseries"], size, state["unconverted"]
@@ -0,0 +1,398 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from budget_manager.currency import DEFAULT_CURRENCY, FX_RATES_FILE, FxRates, normalize_currency
+from budget_manager.record_store import MISSING_DAY, to_days
+from budget_manager.timeseries import to_day
+from budget_manager.storage import COLUMNS, SqliteStorage, apply_schema
+
+class SqliteDataManager:
+    """
+    DataManager with the records kept in an SQLite database instead of memory.
+    Totals and filters run as indexed SQL queries, so memory use does not grow with the ledger.
+    """
+    def __init__(self, limits_manager, db_file_path="budget_data.sqlite", currency=DEFAULT_CURRENCY, fx_rates=None):
+        """
+        currency: reporting currency, all totals are in it
+        fx_rates: FxRates with the exchange rates, by default read from fx_rates.csv next to the database
+        """
+        self.db_file_path = Path(db_file_path)
+        self.limits_manager = limits_manager
+        self.currency = normalize_currency(currency)
+        self.fx_rates = fx_rates if fx_rates is not None else FxRates(self.db_file_path.with_name(FX_RATES_FILE))
+        self.storage = SqliteStorage(self.db_file_path)
+        self.connection = self.storage.connect()
+        # Factors converting the amounts of each (currency, date) pair to the reporting currency.
+        self.connection.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS fx"
+            " (FxCurrency TEXT, FxDate TEXT, Rate REAL, PRIMARY KEY (FxCurrency, FxDate))"
+        )
+        self.fx_key = None
+        self.converting = False
+        self.writes = 0
+        self.data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        self.other_writes = 0
+        self.synced_other_writes = 0
+        # Currencies of records without exchange rates, their amounts count as 0 in the totals.
+        self.unconverted = set()
+        self.listeners = []
+
+    @property
+    def df(self):
+        """
+        A DataFrame with all records, read from the database on every access.
+        """
+        return self.storage.load()
+
+    def add_record(self, record_type, category, amount, date, description="", currency=DEFAULT_CURRENCY):
+        """
+        Adding new row to the database.
+        Parameters:
+
+        record_type: 'income' or 'expense'
+        category: for example: 'Food', 'Transit', 'Entertainment'
+        amount: expense amount (float type)
+        date: for example: '2025-01-01'
+        description: additional information (optional)
+        currency: currency of the amount, for example: 'EUR' (PLN by default)
+        """
+        self.add_records([{
+            "Type": record_type,
+            "Category": category,
+            "Amount": amount,
+            "Date": date,
+            "Description": description,
+            "Currency": currency
+        }])
+
+    def add_records(self, rows):
+        """
+        Adding many rows at once, in a single transaction.
+        rows: list of dicts with the keys 'Type', 'Category', 'Amount', 'Date' and optional 'Description'
+              and 'Currency', or a DataFrame with these columns
+        """
+        if isinstance(rows, pd.DataFrame):
+            new_rows = apply_schema(rows)
+            unknown = ~new_rows["Category"].isin(self.limits_manager.get_all_categories())
+            if unknown.any():
+                category = new_rows.loc[unknown, "Category"].iloc[0]
+                raise ValueError(f"Category '{category}' does not exist! You have to add it first!")
+            converted = self.convert(new_rows)
+        else:
+            new_rows = []
+            for row in rows:
+                if not self.limits_manager.has_category(row["Category"]):
+                    raise ValueError(f"Category '{row['Category']}' does not exist! You have to add it first!")
+                new_row = {column: row.get(column, "") for column in COLUMNS}
+                new_row["Currency"] = normalize_currency(new_row["Currency"])
+                new_rows.append(new_row)
+            converted = self.convert(apply_schema(pd.DataFrame(new_rows, columns=COLUMNS))) if new_rows else None
+        if len(new_rows):
+            self.storage.append(new_rows)
+            self.writes += 1
+            if isinstance(new_rows, pd.DataFrame):
+                self.notify("add_frame", new_rows if converted is None else new_rows.assign(Amount=converted))
+            else:
+                for position, row in enumerate(new_rows):
+                    amount = row["Amount"] if converted is None else float(converted[position])
+                    self.notify("add", row["Type"], row["Category"], amount, row["Date"])
+
+    def convert(self, df):
+        """
+        Returns a float array with the amounts of a DataFrame of records converted to the reporting currency,
+        or None if they all are in it already. Raises ValueError for a currency without exchange rates.
+        """
+        currencies = df["Currency"]
+        if currencies.cat.categories.tolist() == [self.currency] or df.empty:
+            return None
+        return self.fx_rates.convert(df["Amount"].to_numpy(dtype="float64"), currencies.array,
+                                     to_days(df["Date"]), self.currency)
+
+    def convert_one(self, amount, currency, date):
+        """
+        Returns a single amount converted to the reporting currency.
+        """
+        if currency == self.currency:
+            return amount
+        day = to_day(date)
+        return self.fx_rates.convert_one(amount, currency, MISSING_DAY if day is None else day, self.currency)
+
+    def report_unconverted(self, currencies):
+        """
+        Remembers currencies of records without exchange rates and prints the ones not reported before.
+        """
+        new = set(currencies).difference(self.unconverted)
+        if new:
+            self.unconverted.update(new)
+            print(f"Records in {', '.join(sorted(new))} have no exchange rate and count as 0 in the totals. "
+                  f"Add the rates to '{self.fx_rates.path or FX_RATES_FILE}'.")
+
+    def update_rates(self):
+        """
+        Fills the temporary fx table with the conversion factor of every (currency, date) pair
+        of the records not in the reporting currency and not in the table yet, looked up in one batch.
+        Runs again only after the database changed (in this or another process).
+        """
+        key = self.version
+        if key == self.fx_key:
+            return
+        pairs = pd.read_sql_query(
+            "SELECT DISTINCT Currency, Date FROM records LEFT JOIN temp.fx ON FxCurrency = Currency AND FxDate = Date"
+            " WHERE (Currency < ? OR Currency > ?) AND Rate IS NULL",
+            self.connection, params=[self.currency, self.currency]
+        )
+        if len(pairs):
+            skipped = set()
+            rates = self.fx_rates.convert(np.ones(len(pairs)), pairs["Currency"].to_numpy(dtype=object),
+                                          to_days(pairs["Date"]), self.currency, skipped)
+            if skipped:
+                self.report_unconverted(skipped)
+            with self.connection:
+                self.connection.executemany("INSERT INTO temp.fx VALUES (?, ?, ?)",
+                                            zip(pairs["Currency"], pairs["Date"], rates.tolist()))
+            self.converting = True
+        self.fx_key = key
+
+    def amounts(self):
+        """
+        Returns a tuple (amount, source): the SQL expression of the amount of a record in the reporting currency
+        and the table to select it from. Records all in the reporting currency are summed as they are.
+        """
+        self.update_rates()
+        if not self.converting:
+            return "Amount", "records"
+        return "Amount * IFNULL(Rate, 1)", "records LEFT JOIN temp.fx ON FxCurrency = Currency AND FxDate = Date"
+
+    def add_listener(self, listener):
+        """
+        Registers an object told about every added record, see DataManager.add_listener.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def notify(self, method, *args):
+        for listener in self.listeners:
+            getattr(listener, method)(*args)
+
+    def query_scalar(self, sql, params=()):
+        """
+        Runs a query returning a single number, NULL is returned as 0.0.
+        """
+        value = self.connection.execute(sql, params).fetchone()[0]
+        return float(value) if value is not None else 0.0
+
+    def get_total_expenses(self):
+        """
+        Return the sum of all expenses.
+        """
+        amount, source = self.amounts()
+        return self.query_scalar(f"SELECT SUM({amount}) FROM {source} WHERE Type = 'expense'")
+
+    def get_total_incomes(self):
+        """
+        Return the sum of all incomes.
+        """
+        amount, source = self.amounts()
+        return self.query_scalar(f"SELECT SUM({amount}) FROM {source} WHERE Type = 'income'")
+
+    def get_balance(self):
+        """
+        Return the difference between total income and total expenses.
+        """
+        amount, source = self.amounts()
+        return self.query_scalar(
+            f"SELECT SUM(CASE WHEN Type = 'income' THEN {amount} WHEN Type = 'expense' THEN -{amount} END)"
+            f" FROM {source}"
+        )
+
+    def get_category_expenses(self, category, month=None):
+        """
+        Return the sum of expenses for a category.
+        month: optional month in 'YYYY-MM' form, for example: '2025-01'
+        """
+        amount, source = self.amounts()
+        if month is None:
+            return self.query_scalar(
+                f"SELECT SUM({amount}) FROM {source} WHERE Type = 'expense' AND Category = ?", (category,)
+            )
+        return self.query_scalar(
+            f"SELECT SUM({amount}) FROM {source} WHERE Type = 'expense' AND Category = ? AND Date >= ? AND Date < ?",
+            (category, f"{month}-01", f"{month}-32")
+        )
+
+    def get_range_total(self, record_type, start_date=None, end_date=None, category=None):
+        """
+        Return the sum of the records of a type between two dates (both inclusive, None means open ended).
+        """
+        where, params = self.build_filters(start_date, end_date, record_type, category)
+        amount, source = self.amounts()
+        return self.query_scalar(f"SELECT SUM({amount}) FROM {source}{where}", params)
+
+    def get_rollup(self, period="M", record_type="expense", category=None):
+        """
+        Return a dict with the sum of the records of a type for each day ('D'), week ('W', labelled
+        by its Monday) or month ('M'), optionally for one category only.
+        """
+        labels = {
+            "D": "Date",
+            "W": "date(Date, 'weekday 0', '-6 days')",
+            "M": "substr(Date, 1, 7)",
+        }
+        if period not in labels:
+            raise ValueError(f"Unknown period '{period}', expected one of {tuple(labels)}")
+        where, params = self.build_filters(record_type=record_type, category=category)
+        amount, source = self.amounts()
+        rows = self.connection.execute(
+            f"SELECT {labels[period]} AS Period, SUM({amount}) FROM {source}{where} GROUP BY Period ORDER BY Period",
+            params
+        )
+        return {label: total for label, total in rows}
+
+    def get_expenses_by_category(self):
+        """
+        Return a dict with the sum of expenses for each category that has any expenses, sorted by category.
+        """
+        amount, source = self.amounts()
+        rows = self.connection.execute(
+            f"SELECT Category, SUM({amount}) FROM {source} WHERE Type = 'expense' GROUP BY Category ORDER BY Category"
+        )
+        return {category: total for category, total in rows}
+
+    def get_balance_evolution(self):
+        """
+        Return a NumPy array with the balance after each consecutive record.
+        """
+        amount, source = self.amounts()
+        rows = self.connection.execute(
+            f"SELECT SUM(CASE WHEN Type = 'income' THEN {amount} ELSE -{amount} END) OVER (ORDER BY id) FROM {source}"
+        )
+        return np.fromiter((balance for balance, in rows), dtype="float64")
+
+    def get_monthly_balance(self):
+        """
+        Return a dict with the difference between incomes and expenses for each month ('YYYY-MM'), sorted by month.
+        """
+        amount, source = self.amounts()
+        rows = self.connection.execute(
+            "SELECT substr(Date, 1, 7) AS Month,"
+            f" SUM(CASE WHEN Type = 'income' THEN {amount} ELSE -{amount} END)"
+            f" FROM {source} GROUP BY Month ORDER BY Month"
+        )
+        return {month: total for month, total in rows}
+
+    def build_filters(self, start_date=None, end_date=None, record_type=None, category=None):
+        """
+        Returns a tuple (where_clause, params) selecting the records matching all given filters.
+        start_date, end_date: inclusive date range, for example: '2025-01-01'
+        """
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append("Date >= ?")
+            params.append(str(start_date))
+        if end_date is not None:
+            conditions.append("Date <= ?")
+            params.append(str(end_date))
+        if record_type is not None:
+            conditions.append("Type = ?")
+            params.append(record_type)
+        if category is not None:
+            conditions.append("Category = ?")
+            params.append(category)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+
+    def get_records(self, start_date=None, end_date=None, record_type=None, category=None):
+        """
+        Return a DataFrame with the records matching all given filters.
+        start_date, end_date: inclusive date range, for example: '2025-01-01'
+        """
+        where, params = self.build_filters(start_date, end_date, record_type, category)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM records{where} ORDER BY id"
+        return apply_schema(pd.read_sql_query(sql, self.connection, params=params))
+
+    def count_records(self, **filters):
+        """
+        Return the number of records matching the filters (see get_records).
+        """
+        where, params = self.build_filters(**filters)
+        return self.connection.execute(f"SELECT COUNT(*) FROM records{where}", params).fetchone()[0]
+
+    def get_records_page(self, offset, limit, sort_by=None, ascending=True, **filters):
+        """
+        Return a DataFrame with at most limit records starting at offset,
+        from the records matching the filters sorted by the sort_by column.
+        """
+        if sort_by is not None and sort_by not in COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort_by}'!")
+        where, params = self.build_filters(**filters)
+        order = f"{sort_by} {'ASC' if ascending else 'DESC'}, id" if sort_by else "id"
+        sql = f"SELECT {', '.join(COLUMNS)} FROM records{where} ORDER BY {order} LIMIT ? OFFSET ?"
+        return apply_schema(pd.read_sql_query(sql, self.connection, params=params + [limit, offset]))
+
+    def is_loaded(self):
+        """
+        Records are queried from the database when needed, so there is nothing to load.
+        """
+        return True
+
+    def wait_until_loaded(self):
+        pass
+
+    @property
+    def version(self):
+        """
+        A number that changes after every write to the database, by this process or by another one.
+        """
+        self.check_data_version()
+        return self.writes + self.other_writes
+
+    def check_data_version(self):
+        """
+        Returns True if another process wrote to the database since the last check (PRAGMA data_version
+        only changes for commits of other connections).
+        """
+        data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return False
+        self.data_version = data_version
+        self.other_writes += 1
+        return True
+
+    def sync(self):
+        """
+        Every query reads the database, which SQLite shares safely between processes. Returns True if another
+        process changed it since the last check, then the listeners are told to reset.
+        """
+        self.check_data_version()
+        if self.other_writes == self.synced_other_writes:
+            return False
+        self.synced_other_writes = self.other_writes
+        self.notify("reset")
+        return True
+
+    def memory_usage(self):
+        """
+        The records stay in the database, so they take no memory in the process.
+        """
+        return 0
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        self.storage.close()
+
+    def check_aggregates(self):
+        """
+        Totals are computed by the database on every query, so they can never drift.
+        """
+        return True
+
+    def save_to_csv(self):
+        """
+        Every record is committed to the database as soon as it is added, so there is nothing to save.
+        """
+        self.connection.commit()
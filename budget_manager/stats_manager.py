@@ -1,159 +1,452 @@
+from collections import OrderedDict
 from io import BytesIO
-from PIL import Image, ImageTk
-import matplotlib
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from tkinter import messagebox, Toplevel, ttk
-matplotlib.use('Agg')
+from pathlib import Path
+import datetime
+import threading
+from budget_manager.currency import DEFAULT_CURRENCY, currency_label
+from budget_manager.downsampling import min_max_downsample
+from budget_manager.instrumentation import section
+
+MAX_PLOT_POINTS = 2000
+MAX_TICKS = 20
+MAX_MARKERS = 200
+DEFAULT_FIGSIZE = (9, 6)
+CHARTS = ("pie", "limits", "projected", "balance")
+
+
+def draw_expenses_pie(ax, expenses_by_category):
+    """Draws the expenses for each category on an axes."""
+    ax.pie(list(expenses_by_category.values()), labels=list(expenses_by_category.keys()),
+           autopct="%1.1f%%", startangle=90)
+    ax.axis("equal")
+    ax.set_title("Expenses by Categories")
+
+
+def draw_expenses_to_limits(ax, expenses_by_category, limits, currency=DEFAULT_CURRENCY):
+    """
+    Draws the expenses compared to the limits for each category on an axes.
+    Returns the spent bars, the limit bars and the value labels, so their data can be updated later.
+    """
+    import matplotlib.patches as mpatches
+
+    category_names = list(expenses_by_category.keys())
+    spent_values = [expenses_by_category[cat] for cat in category_names]
+    limit_values = [limits.get(cat, 0) for cat in category_names]
+
+    bars_spent = ax.bar(category_names, spent_values, label="Over limit", color="red", alpha=0.9, width=0.7)
+    bars_limit = ax.bar(category_names, limit_values, label="Limit", color="orange", alpha=0.6, width=0.7)
+
+    ax.set_ylabel(f"Price in {currency}")
+    ax.set_title("Expenses vs Limits Comparison")
+
+    ax.set_facecolor("#f0f0f0")
+
+    legend_patches = [
+        mpatches.Patch(color="red", label="Over limit"),
+        mpatches.Patch(color="#fa6f05", label="Spent"),
+        mpatches.Patch(color="#f2d268", label="Limit"),
+    ]
+    ax.legend(handles=legend_patches, loc="upper left", bbox_to_anchor=(0.80, 1.15), borderaxespad=0.)
+
+    texts = []
+    for bar in bars_spent:
+        texts.append(ax.text(bar.get_x() + bar.get_width() / 2, 0, "", ha='center', va='bottom',
+                             fontsize=10, fontweight='bold'))
+    update_expenses_to_limits(ax, (bars_spent, bars_limit, texts), spent_values, limit_values, currency)
+    return bars_spent, bars_limit, texts
+
+
+def update_expenses_to_limits(ax, artists, spent_values, limit_values, currency=DEFAULT_CURRENCY):
+    """Sets the heights and value labels of the bars drawn by draw_expenses_to_limits."""
+    bars_spent, bars_limit, texts = artists
+    label = currency_label(currency)
+    for bar, limit_bar, text, spent, limit in zip(bars_spent, bars_limit, texts, spent_values, limit_values):
+        bar.set_height(spent)
+        limit_bar.set_height(limit)
+        text.set_y(spent + 2)
+        text.set_text(f"{spent:.2f}{label} / {limit:.2f}{label}")
+        text.set_color("black" if spent <= limit else "red")
+    ax.relim()
+    ax.autoscale_view()
+
+
+def draw_projected_to_limits(ax, spent, projected, limits, currency=DEFAULT_CURRENCY):
+    """
+    Draws the expenses of this month so far and projected for its end, compared to the limit
+    of each category, on an axes (see Forecaster.month_end_projection).
+    """
+    import matplotlib.patches as mpatches
+
+    category_names = list(projected.keys())
+    positions = list(range(len(category_names)))
+    label = currency_label(currency)
+
+    ax.bar(category_names, [projected[cat] for cat in category_names], color="#f2d268", width=0.7)
+    ax.bar(category_names, [spent[cat] for cat in category_names], color="#fa6f05", width=0.7)
+    ax.hlines([limits.get(cat, 0) for cat in category_names], [x - 0.4 for x in positions],
+              [x + 0.4 for x in positions], colors="black", linewidth=2)
+    for x, cat in zip(positions, category_names):
+        limit = limits.get(cat, 0)
+        ax.text(x, max(projected[cat], limit) + 2, f"{projected[cat]:.2f}{label} / {limit:.2f}{label}",
+                ha="center", va="bottom", fontsize=9, fontweight="bold",
+                color="black" if projected[cat] <= limit else "red")
+
+    ax.set_ylabel(f"Price in {currency}")
+    ax.set_title("Projected Month End Expenses vs Limits")
+    ax.set_facecolor("#f0f0f0")
+    legend_patches = [
+        mpatches.Patch(color="#fa6f05", label="Spent"),
+        mpatches.Patch(color="#f2d268", label="Projected"),
+        mpatches.Patch(color="black", label="Limit"),
+    ]
+    ax.legend(handles=legend_patches, loc="upper left", bbox_to_anchor=(0.80, 1.15), borderaxespad=0.)
+
+
+def draw_balance_evolution(ax, balance, currency=DEFAULT_CURRENCY):
+    """
+    Draws the balance evolution on an axes and returns its line.
+    Large ledgers are downsampled to at most MAX_PLOT_POINTS points and MAX_TICKS ticks,
+    so the time to draw the chart does not grow with the number of transactions.
+    """
+    from matplotlib.ticker import MaxNLocator
+
+    line, = ax.plot([], [], color="blue", linewidth=2)
+    ax.set_xlabel("Transaction #")
+    ax.set_ylabel(f"Balance ({currency})")
+    ax.set_title("Evolution of Balance by Transaction Index")
+    ax.grid(True)
+
+    ax.xaxis.set_major_locator(MaxNLocator(nbins=MAX_TICKS, integer=True, min_n_ticks=1))
+    update_balance_evolution(ax, line, balance)
+    return line
+
+
+def update_balance_evolution(ax, line, balance):
+    """Sets the data of the line drawn by draw_balance_evolution."""
+    indices, values = min_max_downsample(balance, MAX_PLOT_POINTS)
+    x_values = indices + 1
+    line.set_data(x_values, values)
+    line.set_marker("o" if len(x_values) <= MAX_MARKERS else "None")
+    ax.relim()
+    ax.autoscale_view()
+
+
+def plot_expenses_pie_chart(expenses_by_category, figsize=DEFAULT_FIGSIZE):
+    """Builds the figure with expenses for each category."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    draw_expenses_pie(fig.subplots(), expenses_by_category)
+    return fig
+
+
+def plot_expenses_to_limits(expenses_by_category, limits, figsize=DEFAULT_FIGSIZE, currency=DEFAULT_CURRENCY):
+    """Builds the figure comparing expenses to limits for each category."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    draw_expenses_to_limits(fig.subplots(), expenses_by_category, limits, currency)
+    return fig
+
+
+def plot_projected_to_limits(spent, projected, limits, figsize=DEFAULT_FIGSIZE, currency=DEFAULT_CURRENCY):
+    """Builds the figure comparing the projected month end expenses to limits, see draw_projected_to_limits."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    draw_projected_to_limits(fig.subplots(), spent, projected, limits, currency)
+    return fig
+
+
+def plot_balance_evolution(balance, figsize=DEFAULT_FIGSIZE, currency=DEFAULT_CURRENCY):
+    """Builds the balance evolution figure, see draw_balance_evolution."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    draw_balance_evolution(fig.subplots(), balance, currency)
+    return fig
+
+
+def draw_chart(chart, data, figsize=DEFAULT_FIGSIZE, fmt="png", currency=DEFAULT_CURRENCY):
+    """
+    Draws a chart from the data collected by StatsManager.chart_data and returns it as image bytes
+    in the given format ('png' or 'svg'), with the amounts labelled in the given currency.
+    It only uses the object-oriented Matplotlib API (no pyplot), so it can run in a worker thread or process.
+    """
+    if chart == "pie":
+        fig = plot_expenses_pie_chart(data, figsize)
+    elif chart == "limits":
+        fig = plot_expenses_to_limits(*data, figsize=figsize, currency=currency)
+    elif chart == "projected":
+        fig = plot_projected_to_limits(*data, figsize=figsize, currency=currency)
+    elif chart == "balance":
+        fig = plot_balance_evolution(data, figsize, currency)
+    else:
+        raise ValueError(f"Unknown chart '{chart}'!")
+    buf = BytesIO()
+    with section(f"draw_chart.savefig_{fmt}"):
+        fig.savefig(buf, format=fmt)
+    return buf.getvalue()
+
+
+class ChartImage:
+    """
+    A chart rendered to raw RGBA pixels, ready to be shown on screen without encoding it to PNG.
+    """
+    def __init__(self, width, height, rgba):
+        self.width = width
+        self.height = height
+        self.rgba = rgba
+
+    def to_pil(self):
+        from PIL import Image
+
+        return Image.frombuffer("RGBA", (self.width, self.height), self.rgba, "raw", "RGBA", 0, 1)
+
+
+class ChartFigures:
+    """
+    Figures of the charts kept between renders, one per chart, size and currency, each with its Agg canvas.
+    A render updates the data of the existing artists (the balance line, the bars of the limits chart
+    when the categories are the same) instead of building a new figure, the pie and projected charts reuse their axes.
+    The pixels are copied straight from the Agg buffer, there is no PNG encoding or decoding.
+    Not thread-safe, use one per thread (see draw_chart_image).
+    """
+    def __init__(self):
+        self.figures = {}
+
+    def get_figure(self, chart, figsize, currency):
+        """
+        Returns the state of the figure of a chart: a dict with the figure, its canvas, its axes
+        and the artists drawn on it (None until the chart is drawn).
+        """
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        key = (chart, tuple(figsize), currency)
+        if key not in self.figures:
+            fig = Figure(figsize=figsize)
+            self.figures[key] = {"figure": fig, "canvas": FigureCanvasAgg(fig), "ax": fig.subplots(),
+                                 "artists": None, "categories": None}
+        return self.figures[key]
+
+    def draw(self, chart, data, figsize=DEFAULT_FIGSIZE, currency=DEFAULT_CURRENCY):
+        """
+        Draws a chart from the data collected by StatsManager.chart_data and returns it as a ChartImage.
+        """
+        if chart not in CHARTS:
+            raise ValueError(f"Unknown chart '{chart}'!")
+        state = self.get_figure(chart, figsize, currency)
+        ax = state["ax"]
+        if chart == "pie":
+            ax.clear()
+            draw_expenses_pie(ax, data)
+        elif chart == "projected":
+            ax.clear()
+            draw_projected_to_limits(ax, *data, currency=currency)
+        elif chart == "limits":
+            expenses_by_category, limits = data
+            categories = list(expenses_by_category.keys())
+            if state["categories"] == categories:
+                update_expenses_to_limits(ax, state["artists"], [expenses_by_category[cat] for cat in categories],
+                                          [limits.get(cat, 0) for cat in categories], currency)
+            else:
+                ax.clear()
+                state["artists"] = draw_expenses_to_limits(ax, expenses_by_category, limits, currency)
+                state["categories"] = categories
+        elif state["artists"] is None:
+            state["artists"] = draw_balance_evolution(ax, data, currency)
+        else:
+            update_balance_evolution(ax, state["artists"], data)
+        canvas = state["canvas"]
+        with section("draw_chart.agg_draw"):
+            canvas.draw()
+        width, height = canvas.get_width_height()
+        return ChartImage(width, height, bytes(canvas.buffer_rgba()))
+
+
+chart_figures = threading.local()
+
+
+def draw_chart_image(chart, data, figsize=DEFAULT_FIGSIZE, currency=DEFAULT_CURRENCY):
+    """
+    Draws a chart as a ChartImage with the figures kept by the calling thread (see ChartFigures),
+    so it can run in the chart worker thread or process as well as on the Tk thread.
+    """
+    if not hasattr(chart_figures, "figures"):
+        chart_figures.figures = ChartFigures()
+    return chart_figures.figures.draw(chart, data, figsize, currency)
+
 
 class StatsManager:
+    CHART_CACHE_SIZE = 16
+
     def __init__(self, data_manager, limits_manager):
         self.data_manager = data_manager
         self.limits_manager = limits_manager
+        self.chart_cache = OrderedDict()
+        self.forecaster = None
 
-    def generate_expenses_pie_chart(self):
-        """Generates a pie chart showing expenses for each category."""
-        expenses = self.data_manager.df[self.data_manager.df["Type"] == "expense"]
-
-        if expenses.empty:
-            return None
+    def chart_key(self, chart, figsize=DEFAULT_FIGSIZE, kind="png"):
+        """
+        Returns the cache key of a chart for the current data and limits versions and today's date
+        (the projected chart starts from today, so it has to be drawn again on the next day).
+        kind: 'png' for PNG bytes, 'image' for a ChartImage shown on screen
+        """
+        return (chart, self.data_manager.version, self.limits_manager.version, tuple(figsize), kind,
+                datetime.date.today())
+
+    def get_cached_chart(self, key):
+        """Returns a tuple (found, png) with the cached chart for a key."""
+        if key in self.chart_cache:
+            self.chart_cache.move_to_end(key)
+            return True, self.chart_cache[key]
+        return False, None
+
+    def store_chart(self, key, png):
+        """Puts a rendered chart into the LRU cache."""
+        self.chart_cache[key] = png
+        if len(self.chart_cache) > self.CHART_CACHE_SIZE:
+            self.chart_cache.popitem(last=False)
+
+    def chart_data(self, chart):
+        """
+        Collects the data needed to draw a chart, or returns None if there is no data to show.
+        The result is a copy, so it can be handed to draw_chart in another thread.
+        """
+        if chart == "pie":
+            return self.data_manager.get_expenses_by_category() or None
+        if chart == "limits":
+            expenses_by_category = self.data_manager.get_expenses_by_category()
+            if not expenses_by_category:
+                return None
+            categories = self.limits_manager.get_all_categories()
+            limits = {cat: self.limits_manager.get_limit(cat) for cat in categories}
+            return expenses_by_category, limits
+        if chart == "projected":
+            if self.forecaster is None:
+                from budget_manager.forecast import Forecaster
+                self.forecaster = Forecaster(self.data_manager, self.limits_manager)
+            month_end = self.forecaster.month_end_projection()
+            if not any(row["projected"] for row in month_end.values()):
+                return None
+            spent = {cat: row["spent"] for cat, row in month_end.items()}
+            projected = {cat: row["projected"] for cat, row in month_end.items()}
+            limits = {cat: row["limit"] for cat, row in month_end.items()}
+            return spent, projected, limits
+        if chart == "balance":
+            balance = self.data_manager.get_balance_evolution()
+            return balance if len(balance) else None
+        raise ValueError(f"Unknown chart '{chart}'!")
+
+    def render_chart(self, chart, figsize=DEFAULT_FIGSIZE):
+        """
+        Returns the chart ('pie', 'limits', 'projected' or 'balance') as PNG bytes, or None if there is no data to show.
+        Rendered charts are kept in an LRU cache keyed by the data and limits versions,
+        so a chart is only drawn again after a record or a limit has changed.
+        """
+        key = self.chart_key(chart, figsize)
+        found, png = self.get_cached_chart(key)
+        if found:
+            return png
 
-        expenses_by_category = expenses.groupby("Category")["Amount"].sum()
-        fig, ax = plt.subplots(figsize=(9, 6))
-        ax.pie(expenses_by_category, labels=expenses_by_category.index, autopct="%1.1f%%", startangle=90)
-        ax.axis("equal")
-        ax.set_title("Expenses by Categories")
+        data = self.chart_data(chart)
+        png = draw_chart(chart, data, figsize, currency=self.data_manager.currency) if data is not None else None
+        self.store_chart(key, png)
+        return png
 
+    def render_image(self, chart, figsize=DEFAULT_FIGSIZE):
+        """
+        Returns the chart as a ChartImage for the screen, or None if there is no data to show.
+        Drawn on reused figures straight to RGBA pixels (see ChartFigures) and cached like render_chart.
+        """
+        key = self.chart_key(chart, figsize, "image")
+        found, image = self.get_cached_chart(key)
+        if found:
+            return image
 
-        buf = BytesIO()
-        plt.savefig(buf, format="png")
-        plt.close(fig)
-        buf.seek(0)
+        data = self.chart_data(chart)
+        image = draw_chart_image(chart, data, figsize, self.data_manager.currency) if data is not None else None
+        self.store_chart(key, image)
+        return image
 
-        img = Image.open(buf)
-        return ImageTk.PhotoImage(img)
+    def to_photo_image(self, image, photo=None):
+        """
+        Converts a ChartImage (or PNG bytes) to an image that can be shown in Tkinter.
+        photo: a PhotoImage shown before, its pixels are replaced in place if it has the same size
+        """
+        from PIL import Image, ImageTk
 
-    def compare_expenses_to_limits(self):
-        """Generates a bar chart comparing expenses to limits for each category."""
-        expenses = self.data_manager.df[self.data_manager.df["Type"] == "expense"]
-        if expenses.empty:
+        if image is None:
             return None
+        if isinstance(image, ChartImage):
+            img = image.to_pil()
+        else:
+            img = Image.open(BytesIO(image))
+        if photo is not None and (photo.width(), photo.height()) == img.size:
+            photo.paste(img)
+            return photo
+        return ImageTk.PhotoImage(img)
 
-        expenses_by_category = expenses.groupby("Category")["Amount"].sum()
-        categories = self.limits_manager.get_all_categories()
-        limits = {cat: self.limits_manager.get_limit(cat) for cat in categories}
-
-        category_names = list(expenses_by_category.index)
-        spent_values = [expenses_by_category[cat] for cat in category_names]
-        limit_values = [limits.get(cat, 0) for cat in category_names]
-
-        fig, ax = plt.subplots(figsize=(9, 6))
-
-        bars_spent = ax.bar(category_names, spent_values, label="Over limit", color="red", alpha=0.9, width=0.7)
-        ax.bar(category_names, limit_values, label="Limit", color="orange", alpha=0.6, width=0.7)
-
-        ax.set_ylabel("Price in PLN")
-        ax.set_title("Expenses vs Limits Comparison")
-
-        ax.set_facecolor("#f0f0f0")
-
-        legend_patches = [
-            mpatches.Patch(color="red", label="Over limit"),
-            mpatches.Patch(color="#fa6f05", label="Spent"),
-            mpatches.Patch(color="#f2d268", label="Limit"),
-        ]
-        ax.legend(handles=legend_patches, loc="upper left", bbox_to_anchor=(0.80, 1.15), borderaxespad=0.)
-
-        for bar, spent, limit in zip(bars_spent, spent_values, limit_values):
-            color = "black" if spent <= limit else "red"
-            ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 2,
-                    f"{spent:.2f}zł / {limit:.2f}zł", ha='center', va='bottom',
-                    fontsize=10, fontweight='bold', color=color)
+    def export_chart(self, chart, path, figsize=DEFAULT_FIGSIZE):
+        """
+        Saves a chart to an image file, the format is chosen by the extension (.png or .svg).
+        Returns False if there is no data to show.
+        """
+        path = Path(path)
+        fmt = path.suffix.lower().lstrip(".")
+        if fmt not in ("png", "svg"):
+            raise ValueError(f"Unsupported chart file type: '{path.suffix}'")
+        if fmt == "png":
+            image = self.render_chart(chart, figsize)
+        else:
+            data = self.chart_data(chart)
+            image = draw_chart(chart, data, figsize, fmt, self.data_manager.currency) if data is not None else None
+        if image is None:
+            return False
+        path.write_bytes(image)
+        return True
 
-        buf = BytesIO()
-        plt.savefig(buf, format="png")
-        plt.close(fig)
-        buf.seek(0)
+    def generate_expenses_pie_chart(self):
+        """Generates a pie chart showing expenses for each category."""
+        return self.to_photo_image(self.render_image("pie"))
 
-        img = Image.open(buf)
-        tk_image = ImageTk.PhotoImage(img)
-        return tk_image
+    def compare_expenses_to_limits(self, projected=False):
+        """
+        Generates a bar chart comparing expenses to limits for each category.
+        projected: compare the expenses projected for the end of this month instead (see Forecaster)
+        """
+        return self.to_photo_image(self.render_image("projected" if projected else "limits"))
 
     def generate_balance_evolution_chart(self):
         """
         Generates a line chart showing the balance evolution
         with each consecutive transaction (no dates on X-axis).
         """
-        if self.data_manager.df.empty:
-            return None
-
-        df = self.data_manager.df.copy()
-
-        df["SignedAmount"] = df.apply(
-            lambda row: row["Amount"] if row["Type"] == "income" else -row["Amount"],
-            axis=1
-        )
-
-        df["CumulativeBalance"] = df["SignedAmount"].cumsum()
-
-        x_values = df.index
-
-        fig, ax = plt.subplots(figsize=(9, 6))
-        ax.plot(x_values, df["CumulativeBalance"], marker="o", color="blue", linewidth=2)
-
-        ax.set_xlabel("Transaction #")
-        ax.set_ylabel("Balance (PLN)")
-        ax.set_title("Evolution of Balance by Transaction Index")
-        ax.grid(True)
-
-        ax.set_xticks(df.index)
-        ax.set_xticklabels(df.index + 1)
-
-        buf = BytesIO()
-        plt.savefig(buf, format="png")
-        plt.close(fig)
-        buf.seek(0)
-
-        img = Image.open(buf)
-        return ImageTk.PhotoImage(img)
+        return self.to_photo_image(self.render_image("balance"))
 
     def show_all_records(self):
         """
         Opens a new window (Toplevel) and displays
         all records (income & expenses) in a table form (Treeview).
+        Only the visible rows are loaded, see RecordsTable.
         """
-        if self.data_manager.df.empty:
+        from tkinter import messagebox
+        from budget_manager.records_view import RecordsTable
+
+        if self.data_manager.count_records() == 0:
             messagebox.showinfo("Info", "No records found!")
             return
 
-        table_window = Toplevel()
-        table_window.title("All Records - Incomes & Expenses")
-        table_window.geometry("650x400")
-
-        columns = ["Type", "Category", "Amount", "Date", "Description"]
-
-        tree = ttk.Treeview(table_window, columns=columns, show="headings")
-
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=120, anchor="center")
-
-        for idx, row in self.data_manager.df.iterrows():
-            tree.insert("", "end", values=(
-                row["Type"],
-                row["Category"],
-                row["Amount"],
-                row["Date"],
-                row["Description"]
-            ))
-
-        tree.pack(fill="both", expand=True)
+        RecordsTable(self.data_manager, self.limits_manager.get_all_categories())
 
     def show_all_categories(self):
         """
         Opens a new window (Toplevel) and displays
         all categories and their limits in a table (Treeview).
         """
+        from tkinter import messagebox, Toplevel, ttk
+
         categories_dict = self.limits_manager.categories
         if not categories_dict:
             messagebox.showinfo("Info", "No categories found!")
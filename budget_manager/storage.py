@@ -0,0 +1,576 @@
+from pathlib import Path
+import argparse
+import csv
+import io
+import os
+import numpy as np
+import pandas as pd
+from budget_manager.currency import DEFAULT_CURRENCY, normalize_currency
+from budget_manager.locking import FileLock, atomic_write, file_state
+
+COLUMNS = ["Type", "Category", "Amount", "Date", "Description", "Currency"]
+# Files written before amounts had a currency have only these columns, all their amounts are in PLN.
+LEGACY_COLUMNS = COLUMNS[:5]
+CATEGORICAL_COLUMNS = ["Type", "Category", "Currency"]
+CSV_DTYPES = {"Type": "category", "Category": "category", "Description": "object", "Currency": "category"}
+CHUNK_ROWS = 200000
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def apply_schema(df):
+    """
+    Convert a DataFrame with records to the in-memory schema:
+    categorical Type and Category, float Amount, datetime Date, string Description and categorical Currency
+    (DEFAULT_CURRENCY where it is missing).
+    """
+    df = df.reindex(columns=COLUMNS)
+    df["Currency"] = normalize_currencies(df["Currency"])
+    for column in CATEGORICAL_COLUMNS:
+        if not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    df["Amount"] = pd.to_numeric(df["Amount"], errors="coerce").astype("float64")
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = pd.to_datetime(df["Date"], format="ISO8601", errors="coerce")
+    df["Description"] = df["Description"].fillna("").astype("object")
+    return df
+
+
+def normalize_currencies(currencies):
+    """
+    Returns a Categorical with the currency codes of a Series in upper case, DEFAULT_CURRENCY where they are missing.
+    Only the distinct values are normalized.
+    """
+    if currencies.isna().all():
+        return pd.Categorical.from_codes(np.zeros(len(currencies), dtype="int8"), [DEFAULT_CURRENCY])
+    codes, names = pd.factorize(currencies, use_na_sentinel=False)
+    return pd.Categorical(np.array([normalize_currency(name) for name in names], dtype=object)[codes])
+
+
+def append_rows(df, rows):
+    """
+    Return a new DataFrame with the rows (a list of dicts) added at the end.
+    Categorical columns stay categorical, only new categories are added to them.
+    """
+    new_rows = apply_schema(pd.DataFrame(rows, columns=COLUMNS))
+    if df.empty:
+        return new_rows
+    df = df.copy(deep=False)
+    for column in CATEGORICAL_COLUMNS:
+        categories = df[column].cat.categories
+        missing = new_rows[column].cat.categories.difference(categories)
+        if len(missing):
+            df[column] = df[column].cat.add_categories(missing)
+        new_rows[column] = new_rows[column].cat.set_categories(df[column].cat.categories)
+    return pd.concat([df, new_rows], ignore_index=True)
+
+
+def format_row(row, columns=COLUMNS):
+    """
+    Return the values of a record as written to a CSV file.
+    """
+    values = []
+    for column in columns:
+        value = row.get(column)
+        if column == "Currency":
+            value = normalize_currency(value)
+        elif column == "Date":
+            if value is None or value is pd.NaT:
+                value = ""
+            elif hasattr(value, "strftime"):
+                value = value.strftime("%Y-%m-%d")
+        values.append(value)
+    return values
+
+
+def has_other_currency(rows):
+    """
+    Returns True if any of the rows (list of dicts or a DataFrame) has an amount in a currency other than PLN.
+    """
+    if isinstance(rows, pd.DataFrame):
+        if "Currency" not in rows.columns:
+            return False
+        return bool((np.asarray(normalize_currencies(rows["Currency"])) != DEFAULT_CURRENCY).any())
+    return any(normalize_currency(row.get("Currency")) != DEFAULT_CURRENCY for row in rows)
+
+
+def format_dates(dates, unit="D"):
+    """
+    Returns a Series with dates formatted as 'YYYY-MM-DD' (unit='D') or 'YYYY-MM' (unit='M').
+    Missing dates become empty strings. This is much faster than Series.dt.strftime.
+    """
+    values = dates.to_numpy(dtype=f"datetime64[{unit}]")
+    text = np.datetime_as_string(values, unit=unit).astype(object)
+    text[np.isnat(values)] = ""
+    return pd.Series(text, index=dates.index)
+
+
+def frame_for_writing(df, columns=COLUMNS):
+    """
+    Returns a copy of a DataFrame with records with the values as written to a file.
+    """
+    frame = df.reindex(columns=columns)
+    if "Currency" in columns:
+        frame["Currency"] = normalize_currencies(frame["Currency"])
+    if pd.api.types.is_datetime64_any_dtype(frame["Date"]):
+        frame["Date"] = format_dates(frame["Date"])
+    frame["Date"] = frame["Date"].fillna("")
+    frame["Description"] = frame["Description"].fillna("")
+    return frame
+
+
+def iter_values(rows, columns=COLUMNS):
+    """
+    Yields the values of each record as written to a file.
+    rows: list of dicts or a DataFrame with the record columns
+    """
+    if isinstance(rows, pd.DataFrame):
+        yield from frame_for_writing(rows, columns).itertuples(index=False, name=None)
+    else:
+        for row in rows:
+            yield format_row(row, columns)
+
+
+class LimitedReader(io.RawIOBase):
+    """
+    Binary file object that ends after the first size bytes of a file.
+    """
+    def __init__(self, file, size):
+        self.file = file
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.file.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+class CsvStorage:
+    """
+    Records in a CSV file. New records are appended at the end of the file, writers take
+    the file lock, and the whole file is only rewritten through an atomic rename.
+    """
+    suffixes = (".csv",)
+
+    def __init__(self, path, lock=None):
+        """
+        lock: FileLock to use instead of the one of the file (for journals written under another lock)
+        """
+        self.path = Path(path)
+        self.lock = lock if lock is not None else FileLock(self.path)
+        self.header = None
+
+    def close(self):
+        """
+        The file is only open while reading or writing, so there is nothing to close.
+        """
+
+    def file_columns(self):
+        """
+        Returns the columns in the header line of the file, LEGACY_COLUMNS for files written before records
+        had a currency. The header is read again only when the file is replaced.
+        """
+        state = file_state(self.path)
+        inode = state[0] if state is not None else None
+        if self.header is None or self.header[0] != inode:
+            columns = COLUMNS
+            if state is not None and state[1] > 0:
+                with open(self.path, mode="r", newline="", encoding="utf-8") as file:
+                    columns = next(csv.reader(file), None) or COLUMNS
+            self.header = (inode, columns)
+        return self.header[1]
+
+    def exists(self):
+        """
+        Returns True if the file exists and is not empty.
+        """
+        return self.path.exists() and self.path.stat().st_size > 0
+
+    def load(self):
+        """
+        Load all records from the CSV file.
+        """
+        self.recover_torn_tail()
+        df = pd.read_csv(self.path, dtype=CSV_DTYPES)
+        return apply_schema(df)
+
+    def iter_chunks(self, chunk_rows=CHUNK_ROWS, size=None):
+        """
+        Yields the records of the CSV file as DataFrames of at most chunk_rows records,
+        so the whole file never has to be parsed into one frame.
+        size: only read the first size bytes, records appended later by other processes are left out
+        """
+        self.recover_torn_tail()
+        with open(self.path, mode="rb") as file:
+            source = file if size is None else io.BufferedReader(LimitedReader(file, size), buffer_size=2**20)
+            for chunk in pd.read_csv(source, dtype=CSV_DTYPES, chunksize=chunk_rows):
+                yield apply_schema(chunk)
+
+    def read_from(self, offset, end=None):
+        """
+        Load the records stored between two byte offsets (at the start of a line, end None means the end of the file).
+        """
+        return self.parse_lines(self.read_bytes(offset, end))
+
+    def read_bytes(self, offset, end=None):
+        """
+        Returns the raw bytes of the file between two byte offsets (end None means the end of the file).
+        """
+        with open(self.path, mode="rb") as file:
+            file.seek(offset)
+            return file.read() if end is None else file.read(max(0, end - offset))
+
+    def parse_lines(self, data):
+        """
+        Parse bytes with lines of records (without the header line) into a DataFrame.
+        """
+        if not data.strip():
+            return apply_schema(pd.DataFrame(columns=COLUMNS))
+        df = pd.read_csv(io.BytesIO(data), header=None, names=self.file_columns(), dtype=CSV_DTYPES)
+        return apply_schema(df)
+
+    def save(self, df):
+        """
+        Write all records to a new CSV file that atomically replaces the old one.
+        """
+        frame = frame_for_writing(df)
+        with self.lock:
+            atomic_write(self.path, lambda file: frame.to_csv(file, index=False), newline="", encoding="utf-8")
+
+    def append(self, rows):
+        """
+        Append rows (list of dicts or a DataFrame) to the end of the CSV file and flush them to disk.
+        The cost depends only on the number of new rows, not on the size of the file.
+        A file without the Currency column is rewritten with it once the first amount in another currency comes.
+        """
+        with self.lock:
+            columns = self.file_columns()
+            if "Currency" not in columns and has_other_currency(rows):
+                self.save(self.load())
+                columns = self.file_columns()
+            with open(self.path, mode="a", newline="", encoding="utf-8") as file:
+                if isinstance(rows, pd.DataFrame):
+                    frame_for_writing(rows, columns).to_csv(file, header=False, index=False, lineterminator=os.linesep)
+                else:
+                    csv_writer = csv.writer(file, lineterminator=os.linesep)
+                    csv_writer.writerows(iter_values(rows, columns))
+                file.flush()
+                os.fsync(file.fileno())
+
+    def needs_compaction(self):
+        """
+        The CSV file is appended to in place, so it never needs compaction.
+        """
+        return False
+
+    def recover_torn_tail(self):
+        """
+        Repair the end of the CSV file after a crash in the middle of an append.
+        Appends always end with a newline, so an unterminated last line is a torn record and is cut off,
+        however many fields it has. A file without any newline only holds a torn header, which is written again.
+        """
+        with self.lock, open(self.path, mode="rb+") as file:
+            size = file.seek(0, os.SEEK_END)
+            end = size
+            cut = None
+            while end > 0:
+                start = max(0, end - TAIL_BLOCK_SIZE)
+                file.seek(start)
+                block = file.read(end - start)
+                if end == size and block.endswith(b"\n"):
+                    return
+                newline = block.rfind(b"\n")
+                if newline != -1:
+                    cut = start + newline + 1
+                    break
+                end = start
+            if size == 0:
+                return
+            print(f"Incomplete record found at the end of '{self.path}'. Removing it...")
+            if cut is None:
+                file.truncate(0)
+                file.seek(0)
+                file.write((",".join(COLUMNS) + "\n").encode("utf-8"))
+                self.header = None
+            else:
+                file.truncate(cut)
+            file.flush()
+            os.fsync(file.fileno())
+
+
+class ColumnarStorage:
+    """
+    Base class for the Arrow based backends.
+    The columnar file cannot be appended to, so new rows go to a CSV journal next to it,
+    which is merged into the columnar file once it holds compact_every rows.
+    """
+    suffixes = ()
+    GENERATION_KEY = b"budget_manager.generation"
+
+    def __init__(self, path, compact_every=10000):
+        self.path = Path(path)
+        self.compact_every = compact_every
+        self.generation = 0
+        self.journal_rows = 0
+        self.lock = FileLock(self.path)
+
+    def close(self):
+        """
+        The file is only open while reading or writing, so there is nothing to close.
+        """
+
+    def journal_path(self, generation=None):
+        """
+        Returns the path of the journal that belongs to the given generation of the columnar file.
+        """
+        generation = self.generation if generation is None else generation
+        return self.path.with_name(f"{self.path.name}.journal-{generation}.csv")
+
+    def exists(self):
+        """
+        Returns True if the columnar file exists.
+        """
+        return self.path.exists() and self.path.stat().st_size > 0
+
+    def load(self):
+        """
+        Load all records from the columnar file and replay the journal.
+        """
+        table = self.read_table()
+        metadata = table.schema.metadata or {}
+        self.generation = int(metadata.get(self.GENERATION_KEY, b"0"))
+        df = apply_schema(table.to_pandas())
+
+        for stale in self.path.parent.glob(f"{self.path.name}.journal-*.csv"):
+            if stale != self.journal_path():
+                stale.unlink()
+
+        journal = CsvStorage(self.journal_path(), lock=self.lock)
+        self.journal_rows = 0
+        if journal.exists():
+            rows = journal.load()
+            self.journal_rows = len(rows)
+            if self.journal_rows:
+                df = append_rows(df, rows.to_dict("records"))
+        return df
+
+    def iter_chunks(self, chunk_rows=CHUNK_ROWS):
+        """
+        Yields all records as a single DataFrame: columnar files load many times faster than CSV,
+        and the journal has to be replayed on top of the whole file.
+        """
+        yield self.load()
+
+    def save(self, df):
+        """
+        Write all records to a new generation of the columnar file and drop the old journal.
+        The file is replaced atomically, and the journal of the previous generation is ignored
+        on load even if removing it fails.
+        """
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(apply_schema(df), preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[self.GENERATION_KEY] = str(self.generation + 1).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        with self.lock:
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            self.write_table(table, tmp_path)
+            os.replace(tmp_path, self.path)
+
+            self.generation += 1
+            self.journal_rows = 0
+            for old_journal in self.path.parent.glob(f"{self.path.name}.journal-*.csv"):
+                old_journal.unlink()
+
+    def append(self, rows):
+        """
+        Append rows to the journal of the current generation.
+        """
+        journal = CsvStorage(self.journal_path(), lock=self.lock)
+        with self.lock:
+            if not journal.exists():
+                with open(journal.path, mode="w", newline="", encoding="utf-8") as file:
+                    csv.writer(file, lineterminator=os.linesep).writerow(COLUMNS)
+            journal.append(rows)
+        self.journal_rows += len(rows)
+
+    def needs_compaction(self):
+        """
+        Returns True if the journal has grown enough to be merged into the columnar file.
+        """
+        return self.journal_rows >= self.compact_every
+
+    def read_table(self):
+        raise NotImplementedError
+
+    def write_table(self, table, path):
+        raise NotImplementedError
+
+
+class ParquetStorage(ColumnarStorage):
+    suffixes = (".parquet",)
+
+    def read_table(self):
+        """
+        Read the Parquet file as an Arrow table.
+        """
+        import pyarrow.parquet as pq
+        return pq.read_table(self.path)
+
+    def write_table(self, table, path):
+        """
+        Write an Arrow table to a Parquet file.
+        """
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+
+
+class FeatherStorage(ColumnarStorage):
+    suffixes = (".feather", ".arrow")
+
+    def read_table(self):
+        """
+        Read the Arrow IPC (Feather) file as an Arrow table.
+        """
+        import pyarrow.feather as feather
+        return feather.read_table(self.path, memory_map=True)
+
+    def write_table(self, table, path):
+        """
+        Write an Arrow table to an Arrow IPC (Feather) file.
+        """
+        import pyarrow.feather as feather
+        feather.write_feather(table, path)
+
+
+class SqliteStorage:
+    suffixes = (".sqlite", ".db")
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS records (
+            id INTEGER PRIMARY KEY,
+            Type TEXT NOT NULL,
+            Category TEXT NOT NULL,
+            Amount REAL NOT NULL,
+            Date TEXT NOT NULL,
+            Description TEXT NOT NULL DEFAULT '',
+            Currency TEXT NOT NULL DEFAULT 'PLN'
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_records_type_category_date ON records (Type, Category, Date)",
+        "CREATE INDEX IF NOT EXISTS idx_records_date ON records (Date)",
+    ]
+    INSERT = "INSERT INTO records (Type, Category, Amount, Date, Description, Currency) VALUES (?, ?, ?, ?, ?, ?)"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.connection = None
+
+    def connect(self):
+        """
+        Returns the connection to the database, creating the schema on first use.
+        """
+        if self.connection is None:
+            import sqlite3
+            # The API server commits in its writer thread, never while another thread uses the connection.
+            self.connection = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            with self.connection:
+                for statement in self.SCHEMA:
+                    self.connection.execute(statement)
+                columns = [row[1] for row in self.connection.execute("PRAGMA table_info(records)")]
+                if "Currency" not in columns:
+                    # Databases created before records had a currency hold amounts in PLN only.
+                    self.connection.execute("ALTER TABLE records ADD COLUMN Currency TEXT NOT NULL DEFAULT 'PLN'")
+        return self.connection
+
+    def close(self):
+        """
+        Closes the connection to the database.
+        """
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def exists(self):
+        """
+        Returns True if the database holds at least one record.
+        """
+        if not self.path.exists():
+            return False
+        return self.connect().execute("SELECT EXISTS (SELECT 1 FROM records)").fetchone()[0] == 1
+
+    def load(self):
+        """
+        Load all records from the database.
+        """
+        df = pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM records ORDER BY id", self.connect())
+        return apply_schema(df)
+
+    def save(self, df):
+        """
+        Replace all records in the database in a single transaction.
+        """
+        connection = self.connect()
+        with connection:
+            connection.execute("DELETE FROM records")
+            connection.executemany(self.INSERT, iter_values(df))
+
+    def append(self, rows):
+        """
+        Insert rows in a single transaction.
+        """
+        connection = self.connect()
+        with connection:
+            connection.executemany(self.INSERT, iter_values(rows))
+
+    def needs_compaction(self):
+        """
+        Rows are inserted in place, so the database never needs compaction.
+        """
+        return False
+
+
+STORAGE_BACKENDS = [CsvStorage, ParquetStorage, FeatherStorage, SqliteStorage]
+
+
+def open_storage(path):
+    """
+    Returns the storage backend for a file, chosen by its extension.
+    """
+    path = Path(path)
+    for backend in STORAGE_BACKENDS:
+        if path.suffix.lower() in backend.suffixes:
+            return backend(path)
+    raise ValueError(f"Unsupported data file type: '{path.suffix}'")
+
+
+def migrate(source_path, target_path):
+    """
+    Copy all records from one data file to another, converting between storage formats.
+    Returns the number of copied records.
+    """
+    source = open_storage(source_path)
+    if not source.exists():
+        raise ValueError(f"File '{source_path}' not found or is empty!")
+    target = open_storage(target_path)
+    df = source.load()
+    target.save(df)
+    return len(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a budget data file between storage formats.")
+    parser.add_argument("source", help="data file to read, for example: budget_data.csv")
+    parser.add_argument("target", help="data file to write, for example: budget_data.parquet")
+    args = parser.parse_args(argv)
+    count = migrate(args.source, args.target)
+    print(f"Migrated {count} records from '{args.source}' to '{args.target}'")
+
+
+if __name__ == "__main__":
+    main()
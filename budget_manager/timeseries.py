@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+
+PERIODS = ("D", "W", "M")
+
+
+def to_day(date):
+    """
+    Returns a date ('2025-01-19', datetime or Timestamp) as the number of days since 1970-01-01,
+    or None if it is not a valid date.
+    """
+    try:
+        day = np.datetime64(date, "D")
+    except (TypeError, ValueError):
+        timestamp = pd.to_datetime(date, errors="coerce")
+        if pd.isna(timestamp):
+            return None
+        day = np.datetime64(timestamp, "D")
+    if np.isnat(day):
+        return None
+    return int(day.astype("int64"))
+
+
+class PrefixSeries:
+    """
+    Amounts sorted by day with their prefix sums, for one record type and category.
+    The sum over any date range takes two binary searches. Records are appended in O(1) amortized time,
+    an older date marks the series for a re-sort on the next read.
+    Days are kept as int32 and the prefix sums as exact int64 grosze; the amounts themselves
+    are not stored, they are the differences of the prefix sums.
+    """
+    def __init__(self):
+        self.days = np.empty(16, dtype="int32")
+        self.prefix = np.zeros(17, dtype="int64")
+        self.size = 0
+        self.sorted = True
+
+    def amounts(self):
+        """
+        Returns an int64 array with the amounts in grosze, in the order of the days.
+        """
+        return np.diff(self.prefix[:self.size + 1])
+
+    def append(self, day, amount):
+        """
+        Adds a single amount.
+        """
+        if self.size == len(self.days):
+            capacity = max(16, 2 * self.size)
+            self.days = np.resize(self.days, capacity)
+            self.prefix = np.resize(self.prefix, capacity + 1)
+        if self.size and day < self.days[self.size - 1]:
+            self.sorted = False
+        self.days[self.size] = day
+        self.prefix[self.size + 1] = self.prefix[self.size] + round(amount * 100)
+        self.size += 1
+
+    def extend(self, days, amounts):
+        """
+        Adds many amounts at once, appended in place like append. Days out of order only mark the series
+        for a re-sort when it is next read, so loading an unsorted ledger chunk by chunk sorts it once.
+        """
+        days = days.astype("int32")
+        amounts = np.round(amounts * 100).astype("int64")
+        in_order = not len(days) or (np.all(days[1:] >= days[:-1])
+                                     and (not self.size or days[0] >= self.days[self.size - 1]))
+        if not in_order:
+            self.sorted = False
+
+        end = self.size + len(days)
+        if end > len(self.days):
+            capacity = max(end, 2 * len(self.days))
+            self.days = np.resize(self.days, capacity)
+            self.prefix = np.resize(self.prefix, capacity + 1)
+        self.days[self.size:end] = days
+        self.prefix[self.size + 1:end + 1] = self.prefix[self.size] + np.cumsum(amounts)
+        self.size = end
+
+    def sort(self, days, amounts):
+        """
+        Replaces the series with the given days and grosze amounts, sorted by day.
+        """
+        order = np.argsort(days, kind="stable")
+        self.days = days[order]
+        self.prefix = np.concatenate(([0], np.cumsum(amounts[order])))
+        self.size = len(days)
+        self.sorted = True
+
+    def ensure_sorted(self):
+        """
+        Re-sorts the series and recomputes the prefix sums after out of order appends.
+        """
+        if not self.sorted:
+            self.sort(self.days[:self.size], self.amounts())
+
+    def sum_between(self, start_day=None, end_day=None):
+        """
+        Returns the sum of the amounts between two days (inclusive, None means open ended).
+        """
+        self.ensure_sorted()
+        days = self.days[:self.size]
+        low = 0 if start_day is None else int(np.searchsorted(days, start_day, side="left"))
+        high = self.size if end_day is None else int(np.searchsorted(days, end_day, side="right"))
+        if high <= low:
+            return 0.0
+        return float(self.prefix[high] - self.prefix[low]) / 100
+
+    def rollup(self, period):
+        """
+        Returns a dict with the sum of the amounts for each day ('D'), week starting on Monday ('W')
+        or month ('M'), labelled 'YYYY-MM-DD' for days and weeks and 'YYYY-MM' for months.
+        """
+        self.ensure_sorted()
+        if self.size == 0:
+            return {}
+        days = self.days[:self.size].astype("datetime64[D]")
+        if period == "M":
+            labels = days.astype("datetime64[M]")
+        elif period == "W":
+            # 1970-01-01 was a Thursday, so Mondays are the days with (day + 3) % 7 == 0.
+            labels = days - ((days.astype("int64") + 3) % 7)
+        elif period == "D":
+            labels = days
+        else:
+            raise ValueError(f"Unknown period '{period}', expected one of {PERIODS}")
+        starts = np.flatnonzero(np.concatenate(([True], labels[1:] != labels[:-1])))
+        totals = (self.prefix[np.append(starts[1:], self.size)] - self.prefix[starts]) / 100
+        return dict(zip(np.datetime_as_string(labels[starts]).tolist(), totals.tolist()))
+
+
+class TimeSeriesIndex:
+    """
+    Date index over all records, with one PrefixSeries per record type and category
+    and one per record type for all categories together.
+    Period rollups are computed on demand and cached until the next change.
+    """
+    def __init__(self):
+        self.series = {}
+        self.rollups = {}
+
+    def reset(self):
+        """
+        Removes all records from the index.
+        """
+        self.series = {}
+        self.rollups = {}
+
+    def get_series(self, record_type, category=None):
+        """
+        Returns the series for a record type and category (None means all categories), creating it if needed.
+        """
+        key = (record_type, category)
+        if key not in self.series:
+            self.series[key] = PrefixSeries()
+        return self.series[key]
+
+    def add(self, record_type, category, amount, date):
+        """
+        Adds a single record to the index.
+        """
+        day = to_day(date)
+        if day is None:
+            return
+        amount = float(amount)
+        self.get_series(record_type, category).append(day, amount)
+        self.get_series(record_type).append(day, amount)
+        self.rollups = {}
+
+    def add_frame(self, df):
+        """
+        Adds all records of a DataFrame to the index.
+        """
+        df = df[df["Date"].notna()]
+        if df.empty:
+            return
+        days = df["Date"].to_numpy(dtype="datetime64[D]").astype("int64")
+        amounts = df["Amount"].to_numpy(dtype="float64")
+        for record_type, positions in df.groupby("Type", observed=True).indices.items():
+            self.get_series(record_type).extend(days[positions], amounts[positions])
+        for (record_type, category), positions in df.groupby(["Type", "Category"], observed=True).indices.items():
+            self.get_series(record_type, category).extend(days[positions], amounts[positions])
+        self.rollups = {}
+
+    def rebuild(self, df):
+        """
+        Rebuilds the index from scratch from the DataFrame.
+        """
+        self.reset()
+        self.add_frame(df)
+
+    def sum(self, record_type, category=None, start_date=None, end_date=None):
+        """
+        Returns the sum of the records of a type (and category) between two dates, both inclusive.
+        """
+        series = self.series.get((record_type, category))
+        if series is None:
+            return 0.0
+        start_day = to_day(start_date) if start_date is not None else None
+        end_day = to_day(end_date) if end_date is not None else None
+        return series.sum_between(start_day, end_day)
+
+    def rollup(self, period="M", record_type="expense", category=None):
+        """
+        Returns a dict with the sum of the records of a type (and category) for each period, see PrefixSeries.rollup.
+        """
+        key = (period, record_type, category)
+        if key not in self.rollups:
+            series = self.series.get((record_type, category))
+            self.rollups[key] = series.rollup(period) if series is not None else {}
+        return self.rollups[key]
@@ -1,19 +1,38 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-from budget_manager.data_manager import DataManager
-from budget_manager.limits_manager import LimitsManager
+from budget_manager.alerts import LimitAlerts, format_alert
+from budget_manager.categorizer import Categorizer
+from budget_manager.currency import DEFAULT_CURRENCY, currency_label
+from budget_manager.data_manager import create_data_manager
+from budget_manager.limits_manager import CATEGORY_NAME, LimitsManager
 from budget_manager.stats_manager import StatsManager
+from budget_manager.chart_renderer import ChartRenderer
 import datetime
-import re
 
 class App:
-    def __init__(self, root):
+    # Category names are letters only, so this choice cannot clash with a real category.
+    AUTO_CATEGORY = "(auto)"
+    LOADING_POLL_MS = 100
+    SYNC_POLL_MS = 2000
+
+    def __init__(self, root, data_file="budget_data.csv", categories_file="categories.csv", currency=DEFAULT_CURRENCY):
+        """
+        data_file: data file of the ledger (.csv, .parquet, .feather, .sqlite)
+        categories_file: categories and limits file of the ledger
+        currency: reporting currency of the totals, limits and charts
+        """
         self.root = root
         self.root.title("Home Budget Manager")
 
-        self.limits_manager = LimitsManager()
-        self.data_manager = DataManager(self.limits_manager)
+        self.limits_manager = LimitsManager(categories_file)
+        self.data_manager = create_data_manager(self.limits_manager, data_file, background=True, currency=currency)
+        self.symbol = currency_label(self.data_manager.currency)
         self.stats_manager = StatsManager(self.data_manager, self.limits_manager)
+        self.chart_renderer = ChartRenderer(root, self.stats_manager)
+        self.limit_alerts = LimitAlerts(self.data_manager, self.limits_manager)
+        self.new_alerts = []
+        self.limit_alerts.subscribe(self.new_alerts.append)
+        self.categorizer = Categorizer(self.data_manager)
 
         self.categories = self.limits_manager.get_all_categories()
 
@@ -26,30 +45,37 @@ class App:
         self.category_label = tk.Label(self.entry_frame, text="Category:")
         self.category_label.grid(row=0, column=1, padx=5, pady=(0, 5))
 
-        self.amount_label = tk.Label(self.entry_frame, text="Amount (PLN):")
+        self.amount_label = tk.Label(self.entry_frame, text="Amount:")
         self.amount_label.grid(row=0, column=2, padx=5, pady=(0, 5))
 
+        self.currency_label = tk.Label(self.entry_frame, text="Currency:")
+        self.currency_label.grid(row=0, column=3, padx=5, pady=(0, 5))
+
         self.record_type_var = tk.StringVar(value="expense")
         self.record_type_dropdown = tk.OptionMenu(self.entry_frame, self.record_type_var, "expense", "income")
         self.record_type_dropdown.grid(row=1, column=0, padx=5)
 
         self.category_var = tk.StringVar(value=self.categories[0] if self.categories else "")
-        self.category_dropdown = tk.OptionMenu(self.entry_frame, self.category_var, *self.categories)
+        self.category_dropdown = tk.OptionMenu(self.entry_frame, self.category_var, self.AUTO_CATEGORY, *self.categories)
         self.category_dropdown.grid(row=1, column=1, padx=5)
 
         self.amount_var = tk.StringVar()
         self.amount_entry = tk.Entry(self.entry_frame, textvariable=self.amount_var, width=10)
         self.amount_entry.grid(row=1, column=2, padx=5)
 
+        self.currencies = self.data_manager.fx_rates.currencies()
+        self.currency_var = tk.StringVar(value=self.data_manager.currency)
+        self.currency_dropdown = tk.OptionMenu(self.entry_frame, self.currency_var, *self.currencies)
+        self.currency_dropdown.grid(row=1, column=3, padx=5)
+
         self.add_button = tk.Button(self.entry_frame, text="Add Entry", command=self.add_record)
-        self.add_button.grid(row=1, column=3, padx=5)
+        self.add_button.grid(row=1, column=4, padx=5)
 
         self.add_category_button = tk.Button(self.entry_frame, text="Add Category", command=self.add_category)
-        self.add_category_button.grid(row=1, column=4, padx=5)
+        self.add_category_button.grid(row=1, column=5, padx=5)
 
         self.summary_label = tk.Label(root, text="", font=("Arial", 15), padx=10, pady=10)
         self.summary_label.pack()
-        self.update_summary()
 
         self.chart_frame = tk.Frame(root)
         self.chart_frame.pack()
@@ -60,6 +86,10 @@ class App:
         self.bar_chart_button = tk.Button(root, text="Show expenses and limits bar chart", command=self.show_bar_chart)
         self.bar_chart_button.pack()
 
+        self.projected_chart_button = tk.Button(root, text="Show projected month end vs limits",
+                                                command=self.show_projected_chart)
+        self.projected_chart_button.pack()
+
         self.line_chart_button = tk.Button(root, text="Show balance evolution chart",
                                            command=self.show_balance_evolution_chart)
         self.line_chart_button.pack()
@@ -72,13 +102,70 @@ class App:
 
         self.chart_label = tk.Label(root)
         self.chart_label.pack()
+        self.current_chart = None
+        self.chart_photo = None
 
+        self.data_buttons = [self.add_button, self.pie_chart_button, self.bar_chart_button,
+                             self.projected_chart_button, self.line_chart_button, self.show_records_button]
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.check_loading()
+
+    def on_close(self):
+        """
+        Stops the chart worker and closes the data manager, which takes the snapshot of the records
+        added in this session, before closing the window.
+        """
+        self.chart_renderer.shutdown()
+        if self.data_manager.is_loaded():
+            self.data_manager.close()
+        self.root.destroy()
+
+    def check_loading(self):
+        """
+        Shows the progress of loading the records in the background.
+        The buttons that need all records are enabled when loading is finished.
+        """
+        if not self.data_manager.is_loaded():
+            for button in self.data_buttons:
+                button.config(state=tk.DISABLED)
+            progress = self.data_manager.load_progress
+            self.summary_label.config(
+                text=f"Loading records... {progress['rows']} read | Total Income so far: "
+                     f"{progress['total_income']:.2f} {self.symbol} | Total Expenses so far: "
+                     f"{progress['total_expenses']:.2f} {self.symbol}"
+            )
+            self.root.after(self.LOADING_POLL_MS, self.check_loading)
+            return
+
+        for button in self.data_buttons:
+            button.config(state=tk.NORMAL)
+        try:
+            self.data_manager.wait_until_loaded()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
         self.update_summary()
+        self.root.after(self.SYNC_POLL_MS, self.check_changes)
+
+    def check_changes(self):
+        """
+        Picks up records and categories added by other processes using the same files
+        (another window of the app, an import script, ...) and updates the summary and the category list.
+        """
+        self.new_alerts.clear()
+        if self.data_manager.sync():
+            self.update_summary()
+            if self.new_alerts:
+                messagebox.showwarning("Limit alert", "\n".join(format_alert(alert) for alert in self.new_alerts))
+        if self.limits_manager.refresh():
+            self.categories = self.limits_manager.get_all_categories()
+            self.update_category_dropdown()
+        self.root.after(self.SYNC_POLL_MS, self.check_changes)
 
     def add_record(self):
         """Adds a new record to the data manager and updates the summary."""
         record_type = self.record_type_var.get()
         category = self.category_var.get()
+        currency = self.currency_var.get()
 
         try:
             amount = float(self.amount_var.get())
@@ -90,15 +177,22 @@ class App:
             messagebox.showerror("Error", "Amount must be a positive number!")
             return
 
+        date = datetime.date.today().strftime("%Y-%m-%d")
+
+        try:
+            converted = self.data_manager.convert_one(amount, currency, date)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
         if record_type == "expense":
             current_balance = self.data_manager.get_balance()
-            if amount > current_balance:
+            if converted > current_balance:
                 messagebox.showerror("Insufficient funds",
-                                     f"You only have {current_balance:.2f} zł. Expense of {amount:.2f} zł cannot be done!")
+                                     f"You only have {current_balance:.2f} {self.symbol}. "
+                                     f"Expense of {amount:.2f} {currency_label(currency)} cannot be done!")
                 return
 
-        date = datetime.date.today().strftime("%Y-%m-%d")
-
         desc = simpledialog.askstring(
             "Description (optional)",
             "Add a description for this record (leave blank if none):"
@@ -108,11 +202,22 @@ class App:
         if not desc:
             desc = "No description"
 
+        guessed = category == self.AUTO_CATEGORY
+        if guessed:
+            category, _ = self.categorizer.suggest(desc, record_type)
+            if category is None:
+                messagebox.showerror("Error", "No category could be guessed from this description, please choose one.")
+                self.amount_var.set("")
+                return
+
         try:
-            self.data_manager.add_record(record_type, category, amount, date, description=desc)
+            self.new_alerts.clear()
+            self.data_manager.add_record(record_type, category, amount, date, description=desc, currency=currency)
             self.update_summary()
+            if guessed:
+                messagebox.showinfo("Category", f"The record was added to the '{category}' category.")
             if record_type == "expense":
-                self.check_limit_info(category)
+                self.check_limit_info(category, date)
                 self.refresh_charts()
         except ValueError as e:
             messagebox.showerror("Error", str(e))
@@ -123,7 +228,7 @@ class App:
         """Adds a new category to the limits manager and updates the category dropdown."""
         new_category = simpledialog.askstring("Add new category", "Enter new category name:")
         if new_category:
-            if not re.match(r'^[A-Za-z]+$', new_category):
+            if not CATEGORY_NAME.match(new_category):
                 messagebox.showerror("Error", "Category name must contain only letters (A-Za-z)!")
                 return
 
@@ -143,7 +248,7 @@ class App:
         """Updates the category dropdown with the current list of categories"""
         menu = self.category_dropdown["menu"]
         menu.delete(0, "end")
-        for cat in self.categories:
+        for cat in [self.AUTO_CATEGORY] + self.categories:
             menu.add_command(label=cat, command=lambda value=cat: self.category_var.set(value))
 
     def update_summary(self):
@@ -152,70 +257,87 @@ class App:
         total_expenses = self.data_manager.get_total_expenses()
         balance = self.data_manager.get_balance()
         self.summary_label.config(
-            text=f"Total Income: {total_income:.2f} zł | Total Expenses: {total_expenses:.2f} zł | Your Balance: {balance:.2f} zł"
+            text=f"Total Income: {total_income:.2f} {self.symbol} | Total Expenses: {total_expenses:.2f} {self.symbol}"
+                 f" | Your Balance: {balance:.2f} {self.symbol}"
         )
 
+    def show_chart(self, chart, no_data_message):
+        """
+        Renders a chart in the background and shows it in the chart label when it is ready.
+        A placeholder text is shown meanwhile, a newer request replaces the one in progress.
+        """
+        def on_done(image):
+            # The pixels of the last photo are replaced in place when the new chart has the same size.
+            chart_img = self.stats_manager.to_photo_image(image, self.chart_photo)
+            if chart_img:
+                self.chart_photo = chart_img
+                self.chart_label.config(image=chart_img, text="")
+                self.chart_label.image = chart_img
+            else:
+                self.chart_label.config(text="")
+                messagebox.showinfo("Warning", no_data_message)
+
+        if not self.chart_renderer.request(chart, on_done):
+            self.chart_label.config(image="", text="Rendering chart...")
+            self.chart_label.image = None
+
     def show_pie_chart(self):
         """Generates a pie chart showing expenses by category."""
-        chart_img = self.stats_manager.generate_expenses_pie_chart()
-        if chart_img:
-            self.chart_label.config(image=chart_img)
-            self.chart_label.image = chart_img
-        else:
-            messagebox.showinfo("Warning", "There is no data you could show on the chart.")
+        self.current_chart = self.show_pie_chart
+        self.show_chart("pie", "There is no data you could show on the chart.")
+
     def show_bar_chart(self):
         """Generates a bar chart comparing expenses to limits."""
-        chart_img = self.stats_manager.compare_expenses_to_limits()
-        if chart_img:
-            self.chart_label.config(image=chart_img)
-            self.chart_label.image = chart_img
-        else:
-            messagebox.showinfo("Warning", "There is no data you could compare on the chart.")
+        self.current_chart = self.show_bar_chart
+        self.show_chart("limits", "There is no data you could compare on the chart.")
+
+    def show_projected_chart(self):
+        """Generates a bar chart comparing the expenses projected for the end of this month to limits."""
+        self.current_chart = self.show_projected_chart
+        self.show_chart("projected", "There is no data you could project on the chart.")
 
     def refresh_charts(self):
-        """Refreshes both charts."""
+        """
+        Refreshes the chart that is currently shown (the pie chart if none is shown yet).
+        Charts whose data did not change are taken from the StatsManager cache.
+        """
 
         self.chart_label.config(image="")
         self.chart_label.image = None
 
-        self.show_bar_chart()
-        self.show_balance_evolution_chart()
-        self.show_pie_chart()
+        show_chart = self.current_chart or self.show_pie_chart
+        show_chart()
 
-    def check_limit_info(self, category):
-        """Shows how much is left or how much over the limit in the given category."""
-        expenses = self.data_manager.df
-        expenses_by_cat = expenses[expenses["Type"] == "expense"].groupby("Category")["Amount"].sum()
-        current_expenses = expenses_by_cat.get(category, 0)
-
-        limit = self.limits_manager.get_limit(category)
-        if limit is None:
+    def check_limit_info(self, category, date=None):
+        """
+        Shows the limit alerts raised by the new expense, or how much is left of this month's limit in the given category.
+        """
+        if self.new_alerts:
+            messagebox.showwarning(
+                "Limit alert",
+                "Expense successfully added!\n" + "\n".join(format_alert(alert) for alert in self.new_alerts)
+            )
             return
 
-        if limit <= 0:
+        left = self.limit_alerts.remaining(category, "M", date)
+        if left is None:
             return
 
-        if current_expenses > limit:
-            over = current_expenses - limit
+        if left < 0:
             messagebox.showwarning(
                 "Limit exceeded",
-                f"Expense successfully added! You have exceeded the limit for '{category}' by {over:.2f} zł!"
+                f"Expense successfully added! You have exceeded this month's limit for '{category}' by {-left:.2f} {self.symbol}!"
             )
         else:
-            left = limit - current_expenses
             messagebox.showinfo(
                 "Limit status",
-                f"Expense successfully added! You have {left:.2f} zł left to reach the limit for '{category}'."
+                f"Expense successfully added! You have {left:.2f} {self.symbol} left to reach this month's limit for '{category}'."
             )
 
     def show_balance_evolution_chart(self):
         """Generates a line chart showing balance evolution by transaction index."""
-        chart_img = self.stats_manager.generate_balance_evolution_chart()
-        if chart_img:
-            self.chart_label.config(image=chart_img)
-            self.chart_label.image = chart_img
-        else:
-            messagebox.showinfo("Warning", "No data to display balance evolution.")
+        self.current_chart = self.show_balance_evolution_chart
+        self.show_chart("balance", "No data to display balance evolution.")
 
     def show_all_records(self):
         """
@@ -1,9 +1,18 @@
+import argparse
 import tkinter as tk
+from budget_manager import instrumentation
 from budget_manager.ui_main import App
 
 def main():
+    parser = argparse.ArgumentParser(description="Home Budget Manager")
+    parser.add_argument("--data", default="budget_data.csv", help="data file (.csv, .parquet, .feather, .sqlite)")
+    parser.add_argument("--categories", default="categories.csv", help="categories and limits file")
+    parser.add_argument("--currency", default="PLN", help="reporting currency of the totals and charts, for example: EUR")
+    args = parser.parse_args()
+
+    instrumentation.enable_from_env(include_ui=True)
     root = tk.Tk()
-    app = App(root)
+    app = App(root, args.data, args.categories, args.currency)
     root.mainloop()
 
 if __name__ == "__main__":
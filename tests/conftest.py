@@ -0,0 +1,26 @@
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+from budget_manager.limits_manager import LimitsManager
+
+HEADER = "Type,Category,Amount,Date,Description,Currency\n"
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    """
+    Returns (data file, categories file) of an empty ledger in a temporary directory,
+    with the categories Food and Salary.
+    """
+    categories_path = tmp_path / "categories.csv"
+    categories_path.write_text("Category,Limit\nFood,500.0\nSalary,0.0\n")
+    return tmp_path / "budget_data.csv", categories_path
+
+
+@pytest.fixture
+def limits_manager(ledger):
+    return LimitsManager(ledger[1])
@@ -0,0 +1,76 @@
+import pytest
+
+from budget_manager.aggregates import AggregateStore
+from budget_manager.currency import FxRates
+from budget_manager.data_manager import DataManager
+from budget_manager.timeseries import to_day
+from conftest import HEADER
+
+
+@pytest.fixture
+def fx_rates(tmp_path):
+    path = tmp_path / "fx_rates.csv"
+    path.write_text("Date,Currency,Rate\n2025-01-02,EUR,4.0\n2025-01-06,EUR,5.0\n2025-01-02,USD,3.0\n")
+    return FxRates(path)
+
+
+def test_rate_of_a_day_without_one_is_the_last_before_it(fx_rates):
+    assert fx_rates.rate("EUR", to_day("2025-01-04")) == 4.0
+    assert fx_rates.rate("EUR", to_day("2025-01-06")) == 5.0
+    assert fx_rates.rate("EUR", to_day("2025-02-01")) == 5.0
+    # Days before the first rate take the first one.
+    assert fx_rates.rate("EUR", to_day("2024-12-31")) == 4.0
+
+
+def test_convert_between_two_foreign_currencies(fx_rates):
+    day = to_day("2025-01-02")
+    assert fx_rates.convert_one(30.0, "USD", day, to="EUR") == pytest.approx(22.5)
+    converted = fx_rates.convert([10.0, 10.0, 10.0], ["PLN", "EUR", "USD"], [day] * 3)
+    assert converted.tolist() == [10.0, 40.0, 30.0]
+
+
+def test_currency_without_rates_raises_or_is_skipped(fx_rates):
+    day = to_day("2025-01-02")
+    with pytest.raises(ValueError):
+        fx_rates.convert([1.0], ["GBP"], [day])
+
+    skipped = set()
+    converted = fx_rates.convert([1.0, 2.0], ["GBP", "EUR"], [day, day], skipped=skipped)
+
+    assert converted.tolist() == [0.0, 8.0]
+    assert skipped == {"GBP"}
+
+
+def test_ledger_with_a_currency_without_rates_still_loads(ledger, limits_manager):
+    data_path, _ = ledger
+    data_path.write_text(HEADER + "expense,Food,10.0,2025-01-01,Lunch,PLN\nexpense,Food,12.0,2025-01-02,Lunch,EUR\n")
+
+    data_manager = DataManager(limits_manager, data_path, snapshots=False)
+
+    assert data_manager.get_total_expenses() == 10.0
+    assert data_manager.unconverted == {"EUR"}
+    with pytest.raises(ValueError):
+        data_manager.add_record("expense", "Food", 1.0, "2025-01-03", currency="EUR")
+    assert len(data_manager.records) == 2
+
+
+def test_totals_in_the_reporting_currency(ledger, limits_manager, fx_rates):
+    data_path, _ = ledger
+    data_path.write_text(HEADER + "income,Salary,100.0,2025-01-02,Pay,PLN\nexpense,Food,5.0,2025-01-02,Lunch,EUR\n")
+
+    data_manager = DataManager(limits_manager, data_path, snapshots=False, currency="EUR", fx_rates=fx_rates)
+
+    assert data_manager.get_total_incomes() == 25.0
+    assert data_manager.get_total_expenses() == 5.0
+    assert data_manager.get_records_page(0, 10)["Amount"].tolist() == [100.0, 5.0]
+
+
+def test_running_totals_are_exact():
+    aggregates = AggregateStore()
+    # Summed as floats, ten times 0.1 is 0.9999999999999999.
+    for _ in range(10):
+        aggregates.add("income", "Salary", 0.1, "2025-01-01")
+    aggregates.add("expense", "Food", 0.3, "2025-01-01")
+
+    assert aggregates.get_total("income") == 1.0
+    assert aggregates.get_balance() == 0.7
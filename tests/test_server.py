@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import pytest
+
+from budget_manager.data_manager import DataManager
+from budget_manager.server import BudgetServer
+
+
+@pytest.fixture
+def call(ledger, limits_manager):
+    """
+    Returns a function sending requests (method, path, JSON body, headers) to a running server,
+    which returns (status, parsed JSON) of each.
+    """
+    data_manager = DataManager(limits_manager, ledger[0], snapshots=False)
+
+    def call(*requests, token=None):
+        async def run():
+            server = BudgetServer(data_manager, limits_manager, token=token)
+            listener = await server.start("127.0.0.1", 0)
+            try:
+                responses = []
+                for method, path, *rest in requests:
+                    body = json.dumps(rest[0]).encode() if rest and rest[0] is not None else b""
+                    headers = rest[1] if len(rest) > 1 else {}
+                    status, payload, _ = await server.handle_request(method, path, body, headers)
+                    responses.append((int(status), json.loads(payload)))
+                return responses
+            finally:
+                listener.close()
+                await server.stop()
+        return asyncio.run(run())
+    return call
+
+
+def test_added_records_are_in_the_summary(call):
+    (status, added), (_, summary) = call(
+        ("POST", "/records", {"type": "expense", "category": "Food", "amount": 12.5, "date": "2025-01-19"}),
+        ("GET", "/summary"),
+    )
+
+    assert (status, added) == (201, {"added": 1})
+    assert summary["total_expenses"] == 12.5
+    assert summary["currency"] == "PLN"
+
+
+def test_bulk_records_are_all_or_nothing(call):
+    (status, error), (_, summary) = call(
+        ("POST", "/records/bulk", {"records": [{"type": "income", "category": "Salary", "amount": 100},
+                                               {"type": "expense", "category": "Food", "amount": -1}]}),
+        ("GET", "/summary"),
+    )
+
+    assert status == 400
+    assert error["error"].startswith("Record 1:")
+    assert summary["total_income"] == 0.0
+
+
+@pytest.mark.parametrize("record", [
+    {"type": "transfer", "category": "Food", "amount": 1},
+    {"type": "expense", "category": "Food", "amount": "12"},
+    {"type": "expense", "category": "Food", "amount": 1, "date": "19.01.2025"},
+    {"type": "expense", "category": "Pets", "amount": 1},
+    {"type": "expense", "category": "Food", "amount": 1, "currency": "XYZ"},
+])
+def test_invalid_records_are_refused(call, record):
+    [(status, error)] = call(("POST", "/records", record))
+
+    assert status == 400
+    assert "error" in error
+
+
+@pytest.mark.parametrize("name", ["(auto)", "Pets,Food", 'Pe"ts', "Pets1", ""])
+def test_category_names_must_be_letters(call, name):
+    [(status, _)] = call(("POST", "/categories", {"category": name}))
+
+    assert status == 400
+
+
+def test_categories_can_be_added_changed_and_removed(call):
+    responses = call(
+        ("POST", "/categories", {"category": "Pets", "limit": 300}),
+        ("PUT", "/categories/Pets", {"limit": 400}),
+        ("GET", "/categories"),
+        ("DELETE", "/categories/Pets"),
+        ("DELETE", "/categories/Pets"),
+    )
+
+    assert [status for status, _ in responses] == [201, 200, 200, 200, 404]
+    assert {"category": "Pets", "limit": 400.0} in responses[2][1]
+
+
+def test_unknown_paths_and_methods(call):
+    (missing, _), (not_allowed, _) = call(("GET", "/nothing"), ("DELETE", "/summary"))
+
+    assert missing == 404
+    assert not_allowed == 405
+
+
+def test_token_is_required_when_set(call):
+    (no_token, _), (wrong, _), (right, _) = call(
+        ("GET", "/summary"),
+        ("GET", "/summary", None, {"authorization": "Bearer wrong"}),
+        ("GET", "/summary", None, {"authorization": "Bearer secret"}),
+        token="secret",
+    )
+
+    assert (no_token, wrong, right) == (401, 401, 200)
+
+
+def test_other_addresses_need_a_token(ledger, limits_manager):
+    server = BudgetServer(DataManager(limits_manager, ledger[0], snapshots=False), limits_manager)
+
+    with pytest.raises(ValueError):
+        asyncio.run(server.start("0.0.0.0", 0))
@@ -0,0 +1,75 @@
+import os
+
+from budget_manager.data_manager import DataManager
+from budget_manager.snapshot import load_snapshot, snapshot_path
+from conftest import HEADER
+
+
+def write_ledger(path, amounts):
+    path.write_text(HEADER + "".join(f"expense,Food,{amount:.2f},2025-01-01,Lunch,PLN\n" for amount in amounts))
+
+
+def touch_later(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_reopen_uses_the_snapshot(ledger, limits_manager):
+    data_path, _ = ledger
+    write_ledger(data_path, [10.0, 20.0])
+    DataManager(limits_manager, data_path).close()
+
+    assert snapshot_path(data_path).exists()
+    data_manager = DataManager(limits_manager, data_path)
+    assert load_snapshot(data_manager, os.stat(data_path)) is not None
+    assert data_manager.get_total_expenses() == 30.0
+
+
+def test_records_appended_after_the_snapshot_are_read(ledger, limits_manager):
+    data_path, _ = ledger
+    write_ledger(data_path, [10.0])
+    DataManager(limits_manager, data_path).close()
+    with open(data_path, "a") as file:
+        file.write("expense,Food,5.00,2025-01-02,Bus,PLN\n")
+
+    data_manager = DataManager(limits_manager, data_path)
+
+    assert data_manager.get_total_expenses() == 15.0
+    assert len(data_manager.records) == 2
+
+
+def test_edit_of_the_covered_bytes_invalidates_the_snapshot(ledger, limits_manager):
+    data_path, _ = ledger
+    write_ledger(data_path, [10.0, 20.0])
+    DataManager(limits_manager, data_path).close()
+    # Same size, other bytes: only the hash of the covered prefix can tell.
+    write_ledger(data_path, [10.0, 90.0])
+    touch_later(data_path)
+
+    data_manager = DataManager(limits_manager, data_path)
+
+    assert data_manager.get_total_expenses() == 100.0
+
+
+def test_shrunk_file_invalidates_the_snapshot(ledger, limits_manager):
+    data_path, _ = ledger
+    write_ledger(data_path, [10.0, 20.0])
+    DataManager(limits_manager, data_path).close()
+    write_ledger(data_path, [10.0])
+
+    assert load_snapshot(DataManager(limits_manager, data_path, snapshots=False), os.stat(data_path)) is None
+    assert DataManager(limits_manager, data_path).get_total_expenses() == 10.0
+
+
+def test_close_refreshes_the_snapshot_after_writes(ledger, limits_manager):
+    data_path, _ = ledger
+    write_ledger(data_path, [10.0])
+    data_manager = DataManager(limits_manager, data_path)
+    data_manager.add_record("expense", "Food", 2.5, "2025-01-03")
+    data_manager.close()
+
+    reopened = DataManager(limits_manager, data_path)
+    snapshot = load_snapshot(reopened, os.stat(data_path))
+
+    assert snapshot is not None and snapshot[3] == os.stat(data_path).st_size
+    assert reopened.get_total_expenses() == 12.5
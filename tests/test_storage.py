@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from budget_manager.data_manager import DataManager
+from budget_manager.storage import COLUMNS, CsvStorage, ParquetStorage, apply_schema
+from conftest import HEADER
+
+LUNCH = "expense,Food,10.0,2025-01-01,Lunch,PLN\n"
+
+
+@pytest.mark.parametrize("torn", [
+    "expense,Food,12.0,2025-01-02,Lunch,PL",
+    "expense,Food,12.0,2025-01-02,Lun",
+    "expense,Food,1",
+])
+def test_torn_last_line_is_cut(tmp_path, torn):
+    path = tmp_path / "budget_data.csv"
+    path.write_text(HEADER + LUNCH + torn)
+
+    df = CsvStorage(path).load()
+
+    assert len(df) == 1
+    assert path.read_text() == HEADER + LUNCH
+
+
+def test_complete_file_is_left_alone(tmp_path):
+    path = tmp_path / "budget_data.csv"
+    path.write_text(HEADER + LUNCH)
+
+    CsvStorage(path).recover_torn_tail()
+
+    assert path.read_text() == HEADER + LUNCH
+
+
+def test_torn_header_is_written_again(tmp_path):
+    path = tmp_path / "budget_data.csv"
+    path.write_text("Type,Categ")
+
+    df = CsvStorage(path).load()
+
+    assert df.empty
+    assert path.read_text() == ",".join(COLUMNS) + "\n"
+
+
+def test_ledger_with_torn_record_opens(ledger, limits_manager):
+    data_path, _ = ledger
+    data_path.write_text(HEADER + LUNCH + "expense,Food,12.0,2025-01-02,Lunch,PL")
+
+    data_manager = DataManager(limits_manager, data_path, snapshots=False)
+
+    assert data_manager.get_total_expenses() == 10.0
+
+
+def test_journal_is_replayed_on_load(tmp_path):
+    path = tmp_path / "budget_data.parquet"
+    storage = ParquetStorage(path)
+    storage.save(apply_schema(pd.DataFrame(columns=COLUMNS)))
+    storage.append([{"Type": "expense", "Category": "Food", "Amount": 10.0, "Date": "2025-01-01",
+                     "Description": "Lunch", "Currency": "PLN"}])
+
+    df = ParquetStorage(path).load()
+
+    assert df["Amount"].tolist() == [10.0]
+
+
+def test_torn_journal_record_is_dropped(tmp_path):
+    path = tmp_path / "budget_data.parquet"
+    storage = ParquetStorage(path)
+    storage.save(apply_schema(pd.DataFrame(columns=COLUMNS)))
+    storage.journal_path().write_text(HEADER + LUNCH + "expense,Food,12.0,2025-01-02,Lunch,PL")
+
+    df = ParquetStorage(path).load()
+
+    assert df["Amount"].tolist() == [10.0]
+
+
+def test_journal_of_an_older_generation_is_ignored(tmp_path):
+    path = tmp_path / "budget_data.parquet"
+    storage = ParquetStorage(path)
+    storage.save(apply_schema(pd.DataFrame(columns=COLUMNS)))
+    stale = storage.journal_path(storage.generation - 1)
+    stale.write_text(HEADER + LUNCH)
+
+    df = ParquetStorage(path).load()
+
+    assert df.empty
+    assert not stale.exists()